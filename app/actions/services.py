@@ -0,0 +1,56 @@
+import json
+from typing import Any, Dict, List
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from app.config.settings import settings
+from app.core.actions import ActionError, ActionResult, register_action
+
+# Sample rows shown until the service call is wired (same as the prototype)
+SAMPLE_SERVICE_DATA: List[Dict[str, Any]] = [
+    {"id": 1, "nombre": "Servicio A", "precio": "$100"},
+    {"id": 2, "nombre": "Servicio B", "precio": "$200"},
+    {"id": 3, "nombre": "Servicio C", "precio": "$300"},
+]
+
+
+@register_action("sample_services")
+async def sample_services(context: Dict[str, Any], params: Dict[str, Any]) -> ActionResult:
+    """Default action of dynamicService nodes: the prototype's sample list.
+
+    ``params`` is the node's ``service`` block (endpoint, method, params).
+    """
+    return ActionResult(data=SAMPLE_SERVICE_DATA)
+
+
+@register_action(
+    "service_get",
+    cache_ttl_seconds=settings.SERVICE_CACHE_TTL_SECONDS,
+    cache_stale_seconds=settings.SERVICE_CACHE_STALE_SECONDS,
+    cache_negative_ttl_seconds=settings.SERVICE_CACHE_NEGATIVE_TTL_SECONDS,
+)
+def service_get(context: Dict[str, Any], params: Dict[str, Any]) -> ActionResult:
+    """GET ``endpoint`` (with ``params`` as query string) and return its JSON list.
+
+    The same listing is shown to every user, so results are shared through
+    the action cache. A JSON object is unwrapped from its ``items`` key.
+    """
+    endpoint = params.get("endpoint")
+    if not endpoint:
+        raise ValueError("service_get needs service.endpoint")
+    # urllib.request pulls in http.client and ssl; only flows calling
+    # services pay for it
+    from urllib.request import Request, urlopen
+
+    query = params.get("params") or {}
+    url = f"{endpoint}{'&' if '?' in endpoint else '?'}{urlencode(query)}" if query else endpoint
+    request = Request(url, headers={"Accept": "application/json"})
+    try:
+        with urlopen(request, timeout=settings.ACTION_DEFAULT_TIMEOUT_SECONDS) as response:
+            payload = json.loads(response.read())
+    except HTTPError as e:
+        raise ActionError(f"⚠️ Servicio no disponible ({e.code})") from e
+    except (URLError, TimeoutError, ValueError) as e:
+        raise ActionError("⚠️ Servicio no disponible") from e
+    if isinstance(payload, dict):
+        payload = payload.get("items", [])
+    return ActionResult(data=payload)
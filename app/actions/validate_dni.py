@@ -0,0 +1,12 @@
+from typing import Any, Dict
+from app.core.actions import ActionError, ActionResult, register_action
+
+
+@register_action("validate_dni", timeout_seconds=1)
+def validate_dni(context: Dict[str, Any], params: Dict[str, Any]) -> ActionResult:
+    """Check that the DNI saved in the context (``params.field``, default
+    ``dni``) has 8 digits."""
+    dni = str(context.get(params.get("field", "dni"), ""))
+    if len(dni) != 8 or not dni.isdigit():
+        raise ActionError("❌ DNI inválido. Debe tener 8 dígitos.")
+    return ActionResult(messages=["✅ DNI válido"])
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union
 from app.core.engine import DecisionTreeEngine
 from app.schemas.response import AgentResponse
 
@@ -6,9 +6,19 @@ from app.schemas.response import AgentResponse
 class DecisionTreeAgent:
     """Decision tree agent that processes conversation flows."""
 
-    def __init__(self):
-        self.engine = DecisionTreeEngine()
+    def __init__(self, engine: Optional[DecisionTreeEngine] = None):
+        self.engine = engine or DecisionTreeEngine()
 
-    def process(self, request_data: Dict[str, Any]) -> AgentResponse:
+    async def process(self, request_data: Dict[str, Any]) -> AgentResponse:
         """Process a conversation request through the decision tree."""
-        return self.engine.run(request_data)
+        return await self.engine.run(request_data)
+
+    async def process_batch(
+        self, requests: List[Dict[str, Any]]
+    ) -> List[Union[AgentResponse, Exception]]:
+        """Process several requests, batching state I/O (results in input order)."""
+        return await self.engine.run_batch(requests)
+
+    def close(self) -> None:
+        """Release resources held by the engine."""
+        self.engine.close()
@@ -0,0 +1,90 @@
+"""Conversion of prototype ChatBotEngine flows into decision tree flows.
+
+The prototype (``test/chatbot.py``) reads ``{"bot": {"defaultFlow": ...,
+"errorFlow": ..., "flows": {...}}}`` files where each entry of ``flows`` is
+a node with its text in ``content``. This maps them onto the format the
+engine compiles: ``defaultFlow`` becomes ``start_node`` and, like in the
+prototype, nodes without ``next`` continue to ``defaultFlow``, and failing
+conditions and service calls, as well as transitions to nodes missing from
+the file, go to ``errorFlow``.
+"""
+
+from typing import Any, Dict, Iterable
+
+from app.config.logging import logger
+
+# Node fields that default to the bot's defaultFlow when missing
+_DEFAULT_NEXT_TYPES = frozenset({"message", "dynamicService", "form"})
+
+
+def is_bot_format(flow_data: Dict[str, Any]) -> bool:
+    return isinstance(flow_data.get("bot"), dict)
+
+
+def from_bot_format(flow_id: str, flow_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the decision tree flow equivalent to a prototype bot file."""
+    bot = flow_data["bot"]
+    default_flow = bot.get("defaultFlow")
+    error_flow = bot.get("errorFlow")
+
+    nodes = {}
+    for node_id, raw in bot.get("flows", {}).items():
+        node = dict(raw)
+        node_type = node.get("type")
+        if node_type == "message":
+            node["message"] = node.pop("content", "")
+        if node_type in _DEFAULT_NEXT_TYPES and not node.get("next") and default_flow:
+            node["next"] = default_flow
+        if node_type in ("options", "qa"):
+            key = "options" if node_type == "options" else "questions"
+            node[key] = [
+                {**entry, "next": entry.get("next") or default_flow}
+                for entry in node.get(key, [])
+            ]
+        if node_type in ("conditional", "dynamicService") and error_flow:
+            node.setdefault("onError", error_flow)
+        if error_flow in bot.get("flows", {}):
+            _redirect_unknown_targets(flow_id, node_id, node, bot["flows"], error_flow)
+        nodes[node_id] = node
+
+    return {
+        "flow_id": flow_data.get("flow_id", flow_id),
+        "version": bot.get("version"),
+        "start_node": default_flow,
+        "nodes": nodes,
+    }
+
+
+def _redirect_unknown_targets(
+    flow_id: str, node_id: str, node: Dict[str, Any], known: Iterable[str], error_flow: str
+) -> None:
+    """Point the transitions of ``node`` to unknown nodes at ``errorFlow``.
+
+    The prototype sends a conversation that reaches a missing node to
+    ``errorFlow``; the engine would reject the whole flow instead.
+    """
+
+    def target(value: Any) -> Any:
+        if value and value not in known:
+            logger.warning(
+                "bot_flow_unknown_target", flow_id=flow_id, node_id=node_id,
+                target=value, redirected_to=error_flow,
+            )
+            return error_flow
+        return value
+
+    for key in ("next", "ifTrue", "ifFalse", "onError"):
+        if key in node:
+            node[key] = target(node[key])
+    for key in ("options", "questions"):
+        if isinstance(node.get(key), list):
+            node[key] = [{**entry, "next": target(entry.get("next"))} for entry in node[key]]
+    if isinstance(node.get("onSubmit"), dict):
+        node["onSubmit"] = {**node["onSubmit"], "next": target(node["onSubmit"].get("next"))}
+
+
+def normalize_flow_data(flow_id: str, flow_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return ``flow_data`` in decision tree format, converting bot files."""
+    if is_bot_format(flow_data):
+        return from_bot_format(flow_id, flow_data)
+    return flow_data
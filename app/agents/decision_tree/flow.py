@@ -0,0 +1,138 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from app.agents.decision_tree.bot_format import normalize_flow_data
+from app.agents.decision_tree.nodes.base import BaseNode
+from app.agents.decision_tree.nodes.factory import create_node
+from app.agents.decision_tree.nodes.message import MessageNode
+from app.agents.decision_tree.validator import ERROR, FlowValidationError, validate_flow
+from app.core.renderer import MessageTemplate
+from app.config.logging import logger
+
+
+@dataclass(frozen=True)
+class MacroStep:
+    """A precomputed run of auto-advancing message nodes.
+
+    Message nodes always continue to their ``next`` node and only read the
+    context to render, so the whole run from an entry node up to the next
+    node that needs processing (``next_node``) can be resolved at once.
+    """
+
+    nodes: Tuple[str, ...]
+    messages: Tuple[MessageTemplate, ...]
+    next_node: Optional[str]
+    static: bool
+
+
+@dataclass(frozen=True)
+class CompiledFlow:
+    """Immutable, pre-instantiated graph of a decision tree flow.
+
+    Built once per flow file version and shared by every conversation, so
+    running a turn only needs dictionary lookups on ``nodes``.
+    """
+
+    flow_id: str
+    version: Optional[str]
+    start_node: Optional[str]
+    nodes: Mapping[str, BaseNode]
+    fingerprint: str = ""
+    # Macro-steps keyed by their entry node (empty when the flow disables them)
+    chains: Mapping[str, MacroStep] = field(default_factory=lambda: MappingProxyType({}))
+
+    def get_node(self, node_id: str) -> BaseNode:
+        """Return the node instance for ``node_id``."""
+        try:
+            return self.nodes[node_id]
+        except KeyError:
+            raise ValueError(f"Node {node_id} not found in flow") from None
+
+
+def compile_flow(
+    flow_id: str, flow_data: Dict[str, Any], fingerprint: str = ""
+) -> CompiledFlow:
+    """Instantiate every node of a flow and resolve its transition targets.
+
+    Raises:
+        FlowValidationError: If :func:`validate_flow` finds errors (unknown
+            node types, dangling references, auto-advance cycles). Warnings
+            are logged.
+    """
+    # Flows exported from the prototype ChatBotEngine ({"bot": {...}})
+    flow_data = normalize_flow_data(flow_id, flow_data)
+    issues = validate_flow(flow_id, flow_data)
+    errors = [issue for issue in issues if issue.level == ERROR]
+    if errors:
+        raise FlowValidationError(flow_id, errors)
+    for issue in issues:
+        logger.warning(
+            "flow_validation_warning",
+            flow_id=flow_id,
+            node_id=issue.node_id,
+            issue=issue.message,
+        )
+
+    nodes = {
+        node_id: create_node(node_id, node_data)
+        for node_id, node_data in flow_data["nodes"].items()
+    }
+    start_node = flow_data["start_node"]
+
+    chains = _build_chains(nodes) if flow_data.get("auto_advance_chains", True) else {}
+
+    return CompiledFlow(
+        flow_id=flow_id,
+        version=flow_data.get("version"),
+        start_node=start_node,
+        nodes=MappingProxyType(nodes),
+        fingerprint=fingerprint,
+        chains=MappingProxyType(chains),
+    )
+
+
+def _build_chains(nodes: Mapping[str, BaseNode]) -> Dict[str, MacroStep]:
+    """Precompute the macro-step starting at every message node.
+
+    Runs that loop back onto themselves are left out (the validator already
+    rejects them). Each node is walked once: a run is its first node plus
+    the run of its ``next`` node, so long chains stay linear to build.
+    """
+    # node_id -> (nodes, messages, next_node, static) of the run it starts;
+    # None when the run loops
+    runs: Dict[str, Optional[Tuple[Tuple[str, ...], Tuple[MessageTemplate, ...], Optional[str], bool]]] = {}
+    for entry_id, entry in nodes.items():
+        if type(entry) is not MessageNode or entry_id in runs:
+            continue
+        path = []
+        on_path = set()
+        node: Optional[BaseNode] = entry
+        while type(node) is MessageNode and node.node_id not in runs and node.node_id not in on_path:
+            path.append(node)
+            on_path.add(node.node_id)
+            next_id = node.get_next_node()
+            node = nodes.get(next_id) if next_id else None
+
+        if type(node) is not MessageNode:
+            run = ((), (), node.node_id if node is not None else None, True)
+        elif node.node_id in on_path:
+            run = None  # cycle
+        else:
+            run = runs[node.node_id]
+        for message_node in reversed(path):
+            if run is not None:
+                run_nodes, messages, next_node, static = run
+                run = (
+                    (message_node.node_id,) + run_nodes,
+                    tuple(message_node.messages) + messages,
+                    next_node,
+                    static and all(message.static for message in message_node.messages),
+                )
+            runs[message_node.node_id] = run
+
+    return {
+        entry_id: MacroStep(nodes=run[0], messages=run[1], next_node=run[2], static=run[3])
+        for entry_id, run in ((entry_id, runs.get(entry_id)) for entry_id in nodes)
+        if run is not None
+    }
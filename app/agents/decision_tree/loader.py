@@ -1,12 +1,101 @@
+import hashlib
 import json
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.agents.decision_tree.flow import CompiledFlow, compile_flow
+from app.config.settings import settings
+from app.core.metrics import FLOW_LOAD_LATENCY
 
 flows_path = Path("assets/flow")
 
-def load_flow(flow_id: str) -> dict :
+
+def _flow_path(flow_id: str) -> Path:
     path = flows_path / f"{flow_id}.json"
     if not path.exists():
         raise ValueError(F"Flow {flow_id} no existe")
-    
+    return path
+
+
+def load_flow(flow_id: str) -> dict :
+    """Read the raw flow definition from disk (no caching)."""
+    path = _flow_path(flow_id)
+
     with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
\ No newline at end of file
+        return json.load(f)
+
+
+@dataclass
+class _CacheEntry:
+    flow: CompiledFlow
+    signature: Tuple[int, int]  # (mtime_ns, size) of the file when last checked
+    checked_at: float
+
+
+class FlowCache:
+    """Process-wide cache of compiled flows keyed by flow id.
+
+    A flow file is only re-read when its mtime/size change, and only
+    recompiled when its content hash changes. The file is stat'ed at most
+    once every ``check_interval`` seconds per flow, so the hot path is a
+    dictionary lookup.
+    """
+
+    def __init__(self, check_interval: float = 2.0):
+        self.check_interval = check_interval
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, flow_id: str) -> CompiledFlow:
+        """Return the compiled flow, reloading it if the file changed."""
+        entry = self._entries.get(flow_id)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            return entry.flow
+
+        with self._lock:
+            return self._refresh(flow_id, self._entries.get(flow_id), now)
+
+    def invalidate(self, flow_id: Optional[str] = None) -> None:
+        """Drop one flow (or all flows) from the cache."""
+        with self._lock:
+            if flow_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(flow_id, None)
+
+    def _refresh(
+        self, flow_id: str, entry: Optional[_CacheEntry], now: float
+    ) -> CompiledFlow:
+        path = _flow_path(flow_id)
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        if entry is not None and entry.signature == signature:
+            entry.checked_at = now
+            return entry.flow
+
+        raw = path.read_bytes()
+        fingerprint = hashlib.sha256(raw).hexdigest()
+        if entry is not None and entry.flow.fingerprint == fingerprint:
+            # Touched but unchanged: keep the already compiled graph
+            flow = entry.flow
+        else:
+            flow = compile_flow(flow_id, json.loads(raw), fingerprint)
+
+        self._entries[flow_id] = _CacheEntry(flow, signature, now)
+        return flow
+
+
+flow_cache = FlowCache(check_interval=settings.FLOW_RELOAD_INTERVAL_SECONDS)
+
+
+def get_flow(flow_id: str) -> CompiledFlow:
+    """Get the compiled flow for ``flow_id`` from the process-wide cache."""
+    started = time.perf_counter()
+    flow = flow_cache.get(flow_id)
+    FLOW_LOAD_LATENCY.labels(flow_id).observe(time.perf_counter() - started)
+    return flow
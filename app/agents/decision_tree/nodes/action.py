@@ -1,39 +1,71 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+from app.core.actions import ActionError, ActionTimeoutError, get_action, run_action
 from .base import BaseNode
 
 
 class ActionNode(BaseNode):
-    """Node that executes an action (like validation)."""
+    """Node that executes a registered action (validation, lookup, call...).
+
+    ``action`` names an action registered in :mod:`app.core.actions` and
+    ``params`` is passed to it. Its messages are sent and its updates set in
+    the context; ``save_as`` also saves its data. If the action fails the
+    error is shown and the flow goes to ``on_error`` (``on_timeout`` for
+    timeouts, defaulting to ``on_error``); without a target the node waits
+    and runs the action again on the next message.
+    """
+    
+    FAILED = "⚠️ No pudimos completar la operación. Intenta nuevamente."
+    
+    def __init__(self, node_id: str, node_data: Dict[str, Any]):
+        super().__init__(node_id, node_data)
+        self.action_name: Optional[str] = node_data.get("action")
+        self.params: Dict[str, Any] = dict(node_data.get("params") or {})
+        self.save_as: Optional[str] = node_data.get("save_as")
+        self.on_error: Optional[str] = node_data.get("on_error")
+        self.on_timeout: Optional[str] = node_data.get("on_timeout") or self.on_error
+        # Fail at flow load, not on the first conversation reaching the node
+        self.provides = get_action(self.action_name).provides if self.action_name else frozenset()
+    
+    def targets(self) -> Tuple[str, ...]:
+        return tuple(
+            dict.fromkeys(t for t in (self.next_node_id, self.on_error, self.on_timeout) if t)
+        )
+    
+    def provided_variables(self) -> FrozenSet[str]:
+        return self.provides | ({self.save_as} if self.save_as else frozenset())
     
     def execute(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
-        """Execute action node - runs custom logic."""
-        action_name = self.node_data.get("action")
-        messages = []
-        
-        if action_name:
-            # For now, we'll implement basic validation actions
-            if action_name == "validate_dni":
-                dni = context.get("dni", "")
-                if self._validate_dni(dni):
-                    messages.append("✅ DNI válido")
-                else:
-                    messages.append("❌ DNI inválido. Debe tener 8 dígitos.")
-                    # Return to input node or show error
-                    return {
-                        "messages": messages,
-                        "next_node": None,  # Stay on same node or go back
-                        "should_continue": False,
-                        "handoff": False
-                    }
+        """Action nodes wait on I/O; the engine awaits :meth:`run` instead."""
+        raise RuntimeError(f"Action node {self.node_id} must be run with 'await node.run()'")
+    
+    async def run(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
+        """Execute action node - runs the action, then continues or routes the error."""
+        if not self.action_name:
+            return self._result([], self.get_next_node(), True)
+        try:
+            result = await run_action(self.action_name, context, self.params)
+        except ActionError as e:
+            messages = [str(e)] if str(e) and not isinstance(e, ActionTimeoutError) else []
+            target = self.on_timeout if isinstance(e, ActionTimeoutError) else self.on_error
+            if target is None:
+                # Stay on this node; the action runs again with the next message
+                return self._result(messages or [self.FAILED], None, False)
+            return self._result(messages, target, True)
+        except Exception:
+            if self.on_error is None:
+                raise
+            return self._result([], self.on_error, True)
         
-        # If action succeeds, continue to next node
+        context.update(result.updates)
+        if self.save_as:
+            context[self.save_as] = result.data
+        return self._result(list(result.messages), self.get_next_node(), True)
+    
+    @staticmethod
+    def _result(messages: list, next_node: Optional[str], should_continue: bool) -> Dict[str, Any]:
         return {
             "messages": messages,
-            "next_node": self.get_next_node(),
-            "should_continue": True,
+            "next_node": next_node,
+            "should_continue": should_continue,
             "handoff": False
         }
-    
-    def _validate_dni(self, dni: str) -> bool:
-        """Validate DNI format."""
-        return len(dni) == 8 and dni.isdigit()
\ No newline at end of file
@@ -1,14 +1,26 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+from app.core.renderer import MessageTemplate, compile_template
 
 
 class BaseNode(ABC):
-    """Base class for all decision tree nodes."""
+    """Base class for all decision tree nodes.
+
+    Nodes are built once when a flow is compiled and shared by every
+    conversation running that flow, so they must not keep per-conversation
+    state: everything that changes between turns lives in ``context``.
+    """
     
     def __init__(self, node_id: str, node_data: Dict[str, Any]):
         self.node_id = node_id
         self.node_data = node_data
         self.node_type = node_data.get("type", "unknown")
+        self.next_node_id: Optional[str] = node_data.get("next")
+        # Parsed once here so rendering a turn only joins segments
+        self.messages: Tuple[MessageTemplate, ...] = tuple(
+            compile_template(message)
+            for message in self._normalize_messages(node_data.get("message"))
+        )
     
     @abstractmethod
     def execute(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
@@ -24,9 +36,29 @@ class BaseNode(ABC):
         """
         pass
     
+    async def run(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
+        """Execute the node from the engine's event loop.
+
+        Nodes that wait on I/O (actions, service calls) override this
+        instead of :meth:`execute`; the rest run inline.
+        """
+        return self.execute(context, user_input)
+    
+    def targets(self) -> Tuple[str, ...]:
+        """Node IDs this node can transition to."""
+        return (self.next_node_id,) if self.next_node_id else ()
+    
+    def template_variables(self) -> FrozenSet[str]:
+        """Context variables referenced by this node's messages."""
+        return frozenset().union(*(message.variables for message in self.messages))
+    
+    def provided_variables(self) -> FrozenSet[str]:
+        """Context variables this node writes."""
+        return frozenset()
+    
     def get_next_node(self) -> Optional[str]:
         """Get the next node ID from node data."""
-        return self.node_data.get("next")
+        return self.next_node_id
     
     def get_message(self) -> Optional[str]:
         """Get the message from node data."""
@@ -34,4 +66,13 @@ class BaseNode(ABC):
     
     def get_messages(self) -> Optional[list]:
         """Get multiple messages from node data."""
-        return self.node_data.get("message", [])
\ No newline at end of file
+        return self.node_data.get("message", [])
+    
+    @staticmethod
+    def _normalize_messages(message: Any) -> Tuple[str, ...]:
+        """Normalize a ``message`` field (string or list) into a tuple."""
+        if isinstance(message, list):
+            return tuple(message)
+        if isinstance(message, str):
+            return (message,)
+        return ()
@@ -0,0 +1,80 @@
+import ast
+import re
+from typing import Any, Dict, Optional, Tuple
+from .base import BaseNode
+
+# Expression nodes a condition may use: comparisons, boolean logic and
+# arithmetic over context variables and literals (no calls, attributes or
+# subscripts)
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.In, ast.NotIn, ast.Is, ast.IsNot,
+    ast.Name, ast.Load, ast.Constant, ast.List, ast.Tuple,
+)
+_PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_]\w*)\s*\}\}")
+_NUMBER = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+class ConditionalNode(BaseNode):
+    """Node that branches on a boolean expression over the context.
+
+    ``condition`` is a Python-like expression such as ``{{edad}} >= 18``
+    (the braces are optional); it is parsed and checked once when the flow
+    is compiled. Numeric strings in the context compare as numbers. Goes to
+    ``ifTrue`` or ``ifFalse``, or to ``onError`` if the expression fails
+    (e.g. a variable is missing).
+    """
+    
+    def __init__(self, node_id: str, node_data: Dict[str, Any]):
+        super().__init__(node_id, node_data)
+        self.condition: str = node_data.get("condition", "")
+        self.if_true: Optional[str] = node_data.get("ifTrue")
+        self.if_false: Optional[str] = node_data.get("ifFalse")
+        self.on_error: Optional[str] = node_data.get("onError")
+        
+        expression = _PLACEHOLDER.sub(r"\1", self.condition)
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid condition in node {node_id}: {e.msg}") from None
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ValueError(
+                    f"Invalid condition in node {node_id}: {type(node).__name__} not allowed"
+                )
+        self.variables = frozenset(
+            node.id for node in ast.walk(tree) if isinstance(node, ast.Name)
+        )
+        self._code = compile(tree, f"<condition {node_id}>", "eval")
+    
+    def targets(self) -> Tuple[str, ...]:
+        return tuple(t for t in (self.if_true, self.if_false, self.on_error) if t)
+    
+    def evaluate(self, context: Dict[str, Any]) -> bool:
+        """Evaluate the condition (raises if a variable is missing)."""
+        names = {name: _coerce(context[name]) for name in self.variables if name in context}
+        return bool(eval(self._code, {"__builtins__": {}}, names))
+    
+    def execute(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
+        """Execute conditional node - continues to the matching branch."""
+        try:
+            next_node = self.if_true if self.evaluate(context) else self.if_false
+        except Exception:
+            if self.on_error is None:
+                raise
+            next_node = self.on_error
+        return {
+            "messages": [],
+            "next_node": next_node,
+            "should_continue": True,
+            "handoff": False
+        }
+
+
+def _coerce(value: Any) -> Any:
+    # The prototype substituted values as text before evaluating
+    if isinstance(value, str) and _NUMBER.match(value.strip()):
+        return float(value) if "." in value else int(value)
+    return value
@@ -0,0 +1,76 @@
+from typing import Any, Dict, Optional, Tuple
+from app.config.logging import logger
+from app.core.actions import ActionError, get_action, run_action
+from app.core.renderer import compile_template, literal
+from .base import BaseNode
+
+# Action used when the ``service`` block does not name one
+DEFAULT_SERVICE_ACTION = "sample_services"
+
+
+class DynamicServiceNode(BaseNode):
+    """Node that lists items from an external service and continues.
+
+    ``service`` describes the endpoint and is passed as ``params`` to the
+    action named by ``service.action`` (the prototype's sample list by
+    default), whose data is listed below ``content`` as
+    "  • nombre - precio". Only ``content`` is rendered as a template: the
+    rows are shown verbatim. If the call fails, or returns rows without those
+    fields, the flow goes to ``onError``.
+    """
+    
+    UNAVAILABLE = "⚠️ El servicio no está disponible en este momento."
+    
+    def __init__(self, node_id: str, node_data: Dict[str, Any]):
+        super().__init__(node_id, node_data)
+        self.service: Dict[str, Any] = dict(node_data.get("service", {}))
+        self.action_name: str = self.service.get("action", DEFAULT_SERVICE_ACTION)
+        get_action(self.action_name)
+        self.on_error: Optional[str] = node_data.get("onError")
+        self.content = compile_template(node_data.get("content", ""))
+        self.messages = (self.content,)
+    
+    def targets(self) -> Tuple[str, ...]:
+        return tuple(t for t in (self.next_node_id, self.on_error) if t)
+    
+    def execute(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
+        """Service nodes wait on I/O; the engine awaits :meth:`run` instead."""
+        raise RuntimeError(f"Service node {self.node_id} must be run with 'await node.run()'")
+    
+    async def run(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
+        """Execute dynamic service node - shows the items and continues."""
+        try:
+            result = await run_action(self.action_name, context, self.service)
+            data_text = self._format_rows(result.data)
+        except Exception as e:
+            if self.on_error is None and not isinstance(e, ActionError):
+                raise
+            return {
+                "messages": [self.UNAVAILABLE],
+                "next_node": self.on_error or self.get_next_node(),
+                "should_continue": True,
+                "handoff": False
+            }
+        
+        return {
+            "messages": [literal(f"{self.content.render(context)}\n{data_text}")],
+            "next_node": self.get_next_node(),
+            "should_continue": True,
+            "handoff": False
+        }
+
+    def _format_rows(self, rows: Any) -> str:
+        """The service rows as "  • nombre - precio" lines.
+
+        Raises:
+            ActionError: If ``rows`` is not a list of objects with ``nombre``
+                and ``precio``.
+        """
+        if not rows:
+            return ""
+        if not isinstance(rows, list) or not all(
+            isinstance(item, dict) and "nombre" in item and "precio" in item for item in rows
+        ):
+            logger.warning("service_rows_invalid", node_id=self.node_id, action=self.action_name)
+            raise ActionError(f"{self.action_name} returned rows without nombre and precio")
+        return "\n".join(f"  • {item['nombre']} - {item['precio']}" for item in rows)
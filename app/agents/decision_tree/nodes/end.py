@@ -10,10 +10,7 @@ class EndNode(BaseNode):
         messages = []
         
         # Show final message
-        if isinstance(self.node_data.get("message"), list):
-            messages.extend(self.node_data["message"])
-        elif isinstance(self.node_data.get("message"), str):
-            messages.append(self.node_data["message"])
+        messages.extend(self.messages)
         
         return {
             "messages": messages,
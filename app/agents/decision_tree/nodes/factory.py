@@ -1,25 +1,35 @@
-from typing import Dict, Any
+from typing import Any, Dict, Type
 from .base import BaseNode
 from .message import MessageNode
 from .menu import MenuNode
 from .input import InputNode
 from .action import ActionNode
 from .end import EndNode
+from .options import OptionsNode
+from .qa import QANode
+from .form import FormNode
+from .condition import ConditionalNode
+from .dynamic_service import DynamicServiceNode
+
+# Node classes by the "type" used in flow files
+NODE_TYPES: Dict[str, Type[BaseNode]] = {
+    "message": MessageNode,
+    "menu": MenuNode,
+    "input": InputNode,
+    "action": ActionNode,
+    "end": EndNode,
+    "options": OptionsNode,
+    "qa": QANode,
+    "form": FormNode,
+    "conditional": ConditionalNode,
+    "dynamicService": DynamicServiceNode,
+}
 
 
 def create_node(node_id: str, node_data: Dict[str, Any]) -> BaseNode:
     """Factory function to create appropriate node instance based on type."""
     node_type = node_data.get("type", "unknown")
-    
-    if node_type == "message":
-        return MessageNode(node_id, node_data)
-    elif node_type == "menu":
-        return MenuNode(node_id, node_data)
-    elif node_type == "input":
-        return InputNode(node_id, node_data)
-    elif node_type == "action":
-        return ActionNode(node_id, node_data)
-    elif node_type == "end":
-        return EndNode(node_id, node_data)
-    else:
-        raise ValueError(f"Unknown node type: {node_type}")
\ No newline at end of file
+    node_class = NODE_TYPES.get(node_type)
+    if node_class is None:
+        raise ValueError(f"Unknown node type: {node_type}")
+    return node_class(node_id, node_data)
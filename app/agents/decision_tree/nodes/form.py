@@ -0,0 +1,143 @@
+import re
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from app.core.renderer import MessageTemplate, compile_template
+from .base import BaseNode
+
+# "lat, long" or "lat,long (address)", as forwarded by the gateway for
+# location messages
+LOCATION_PATTERN = re.compile(
+    r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*(?:\((.*)\))?\s*$"
+)
+
+
+class FormField:
+    """One field of a form node, with its validation compiled once."""
+    
+    def __init__(self, field_data: Dict[str, Any]):
+        self.name: str = field_data["name"]
+        self.label: str = field_data.get("label", self.name)
+        self.type: str = field_data.get("type", "text")
+        self.required: bool = bool(field_data.get("required"))
+        validation = field_data.get("validation") or {}
+        self.regex = re.compile(validation["regex"]) if validation.get("regex") else None
+        self.min = validation.get("min")
+        self.max = validation.get("max")
+        self.error_message: Optional[str] = validation.get("errorMessage")
+        
+        required = " (*)" if self.required else ""
+        if self.type == "location":
+            self.prompt = f"📍 {self.label}{required}\n\nPor favor, envía tu ubicación actual"
+        else:
+            self.prompt = f"📝 {self.label}{required}"
+    
+    def parse(self, user_input: str) -> Tuple[Any, Optional[str]]:
+        """Validate and convert the user's answer; returns (value, error)."""
+        if self.type == "location":
+            match = LOCATION_PATTERN.match(user_input)
+            if not match:
+                return None, "❌ Por favor, envía tu ubicación actual usando el botón de ubicación de WhatsApp"
+            latitude, longitude, address = match.groups()
+            text = f"{latitude}, {longitude}" + (f" ({address})" if address else "")
+            return (text, float(latitude), float(longitude)), None
+        
+        if self.regex and not self.regex.match(user_input):
+            return None, self._error("Valor inválido")
+        if self.min is not None or self.max is not None:
+            try:
+                number = float(user_input)
+            except ValueError:
+                return None, self._error("Debe ser un número")
+            if (self.min is not None and number < self.min) or (self.max is not None and number > self.max):
+                return None, self._error("Valor inválido")
+        
+        if self.type == "number":
+            for convert in (int, float):
+                try:
+                    return convert(user_input), None
+                except ValueError:
+                    pass
+        return user_input, None
+    
+    def _error(self, default: str) -> str:
+        return f"❌ {self.error_message or default}\n\n{self.prompt}"
+
+
+class FormNode(BaseNode):
+    """Node that asks for several fields, one per turn, then continues.
+
+    Each answer is validated (``regex``, ``min``/``max``) and saved to the
+    context under the field ``name``; location fields also save ``latitud``
+    and ``longitud``. The current field is kept in the context under
+    ``_form_<node_id>`` until the form is completed, then the flow goes to
+    ``onSubmit.next`` (or ``next``).
+    """
+    
+    SAVED = "✅ Guardado.\n\n"
+    EMPTY = "Por favor, proporciona un valor para este campo."
+    
+    def __init__(self, node_id: str, node_data: Dict[str, Any]):
+        super().__init__(node_id, node_data)
+        self.fields: Tuple[FormField, ...] = tuple(
+            FormField(field_data) for field_data in node_data.get("fields", [])
+        )
+        if not self.fields:
+            raise ValueError(f"Form node {node_id} has no fields")
+        self.progress_key = f"_form_{node_id}"
+        self.on_submit: Dict[str, Any] = dict(node_data.get("onSubmit") or {})
+        self.submit_node: Optional[str] = self.on_submit.get("next") or self.next_node_id
+        
+        intro = node_data.get("content", "")
+        first_prompt = self.fields[0].prompt
+        self.messages: Tuple[MessageTemplate, ...] = (
+            compile_template(f"{intro}\n\n{first_prompt}" if intro else first_prompt),
+        )
+    
+    def targets(self) -> Tuple[str, ...]:
+        return (self.submit_node,) if self.submit_node else ()
+    
+    def provided_variables(self) -> FrozenSet[str]:
+        names = {field.name for field in self.fields}
+        if any(field.type == "location" for field in self.fields):
+            names.update(("latitud", "longitud"))
+        return frozenset(names)
+    
+    def execute(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
+        """Execute form node - asks, validates and saves one field per turn."""
+        index = context.get(self.progress_key)
+        if type(index) is not int or not 0 <= index < len(self.fields):
+            # Arriving at the form, or a progress index left by another
+            # version of the flow (e.g. with fewer fields): ask for the first
+            context[self.progress_key] = 0
+            return self._wait(list(self.messages))
+        if not user_input:
+            return self._wait([self.EMPTY])
+        
+        field = self.fields[index]
+        value, error = field.parse(user_input.strip())
+        if error:
+            return self._wait([error])
+        
+        if field.type == "location":
+            value, context["latitud"], context["longitud"] = value
+        context[field.name] = value
+        
+        if index + 1 < len(self.fields):
+            context[self.progress_key] = index + 1
+            return self._wait([self.SAVED + self.fields[index + 1].prompt])
+        
+        # Form completed
+        del context[self.progress_key]
+        return {
+            "messages": [],
+            "next_node": self.submit_node,
+            "should_continue": True,
+            "handoff": False
+        }
+    
+    def _wait(self, messages: List[str]) -> Dict[str, Any]:
+        return {
+            "messages": messages,
+            "next_node": None,  # Stay on the form
+            "should_continue": False,
+            "handoff": False
+        }
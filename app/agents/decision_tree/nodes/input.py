@@ -1,10 +1,15 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, FrozenSet, Optional
 from .base import BaseNode
 
 
 class InputNode(BaseNode):
     """Node that requests user input and saves it to context."""
     
+    def provided_variables(self) -> FrozenSet[str]:
+        """The context key the user input is saved as."""
+        save_as = self.node_data.get("save_as")
+        return frozenset((save_as,)) if save_as else frozenset()
+    
     def execute(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
         """Execute input node - saves user input to context."""
         messages = []
@@ -21,10 +26,7 @@ class InputNode(BaseNode):
             }
         
         # If no input provided, show the input prompt
-        if isinstance(self.node_data.get("message"), list):
-            messages.extend(self.node_data["message"])
-        elif isinstance(self.node_data.get("message"), str):
-            messages.append(self.node_data["message"])
+        messages.extend(self.messages)
         
         return {
             "messages": messages,
@@ -0,0 +1,75 @@
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Mn: accents and variation selectors (1️⃣ = "1" + U+FE0F + U+20E3),
+# Me: the enclosing keycap U+20E3, Cf: zero-width joiners and the like
+_DROPPED_CATEGORIES = frozenset({"Mn", "Me", "Cf"})
+_WHITESPACE = re.compile(r"\s+")
+_KEYCAP_TEN = "\U0001F51F"  # 🔟
+_MISSING = object()
+
+
+def normalize_choice(text: str) -> str:
+    """Normalize what a user typed (or an option key/label) for matching.
+
+    Casefolds, strips accents and keycap emoji marks (``1️⃣`` -> ``1``),
+    drops punctuation and symbols (emoji, ``¿?``, ``1.``) and collapses
+    whitespace. Text made only of symbols is kept casefolded as-is, so keys
+    like ``*`` still match.
+    """
+    text = text.replace(_KEYCAP_TEN, "10")
+    kept = []
+    for char in unicodedata.normalize("NFKD", text):
+        category = unicodedata.category(char)
+        if category in _DROPPED_CATEGORIES:
+            continue
+        kept.append(" " if category[0] in "PSZ" else char)
+    normalized = _WHITESPACE.sub(" ", "".join(kept)).strip().casefold()
+    return normalized or _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class OptionIndex:
+    """O(1) lookup of a user's choice among a node's options.
+
+    Built once when the flow is compiled. Each option registers several
+    keys (its number, value, label...) under their normalized form; keys
+    added first win, so callers add the most specific keys first. Keys
+    claimed by two different options are recorded in ``conflicts``.
+    """
+
+    __slots__ = ("_index", "conflicts")
+
+    def __init__(self, entries: Iterable[Tuple[Iterable[str], Any]] = ()):
+        self._index: Dict[str, Any] = {}
+        self.conflicts: List[Tuple[str, Any, Any]] = []
+        for keys, target in entries:
+            self.add(keys, target)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(self, keys: Iterable[str], target: Any) -> None:
+        """Register ``target`` under every (normalized) key."""
+        for key in keys:
+            if key is None:
+                continue
+            for variant in {str(key).strip(), normalize_choice(str(key))}:
+                current = self._index.setdefault(variant, target)
+                if current is not target and current != target:
+                    self.conflicts.append((variant, current, target))
+
+    def lookup(self, text: Optional[str]) -> Any:
+        """Return the target matching ``text``, or None."""
+        if not text:
+            return None
+        target = self._index.get(text.strip(), _MISSING)
+        if target is _MISSING:
+            target = self._index.get(normalize_choice(text))
+        return target
+
+
+def format_choices(intro: str, labels: Iterable[str], hint: str) -> str:
+    """Numbered list of choices ("  1️⃣. label") between an intro and a hint."""
+    lines = "\n".join(f"  {i}️⃣. {label}" for i, label in enumerate(labels, start=1))
+    return f"{intro}\n{lines}\n\n{hint}"
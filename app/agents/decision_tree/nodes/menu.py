@@ -1,23 +1,34 @@
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Optional, Tuple
 from .base import BaseNode
+from .matching import OptionIndex
 
 
 class MenuNode(BaseNode):
     """Node that displays a menu and waits for user input."""
     
+    def __init__(self, node_id: str, node_data: Dict[str, Any]):
+        super().__init__(node_id, node_data)
+        self.options = MappingProxyType(dict(node_data.get("options", {})))
+        # Exact keys first, then their normalized forms ("1️⃣", " 1 ", "Sí")
+        self.match_index = OptionIndex(([key], target) for key, target in self.options.items())
+    
+    def targets(self) -> Tuple[str, ...]:
+        """Node IDs reachable from the menu options."""
+        return tuple(self.options.values())
+    
     def execute(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
         """Execute menu node - waits for user input."""
         messages = []
         
         # If we have user input, process the selection
         if user_input:
-            options = self.node_data.get("options", {})
-            selected_option = user_input.strip()
+            next_node = self.match_index.lookup(user_input)
             
-            if selected_option in options:
+            if next_node is not None:
                 return {
                     "messages": [],  # No additional messages on valid selection
-                    "next_node": options[selected_option],
+                    "next_node": next_node,
                     "should_continue": True,  # Continue to next node
                     "handoff": False
                 }
@@ -26,14 +37,12 @@ class MenuNode(BaseNode):
                 messages.append("❌ Opción inválida. Por favor, seleccione una opción válida.")
         
         # Show the menu (first time or after invalid selection)
-        if isinstance(self.node_data.get("message"), list):
-            messages.extend(self.node_data["message"])
-        elif isinstance(self.node_data.get("message"), str):
-            messages.append(self.node_data["message"])
+        messages.extend(self.messages)
         
         return {
             "messages": messages,
             "next_node": None,  # Don't advance automatically
             "should_continue": False,  # Wait for user input
-            "handoff": False
+            "handoff": False,
+            "invalid_input": bool(user_input),
         }
\ No newline at end of file
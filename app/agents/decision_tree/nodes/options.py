@@ -0,0 +1,63 @@
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+from app.core.renderer import compile_template
+from .base import BaseNode
+from .matching import OptionIndex, format_choices
+
+
+class OptionsNode(BaseNode):
+    """Node that lists labelled options and branches on the user's choice.
+
+    ``options`` is a list of ``{"label", "value", "next"}``. The user can
+    answer with the option number, its value or its label (see
+    :class:`OptionIndex`).
+    """
+    
+    HINT = "💡 Responde con el número o nombre de la opción"
+    INVALID = "❌ Opción inválida. "
+    
+    def __init__(self, node_id: str, node_data: Dict[str, Any]):
+        super().__init__(node_id, node_data)
+        self.choices: Tuple[Dict[str, Any], ...] = tuple(node_data.get("options", []))
+        prompt = format_choices(
+            node_data.get("content", ""), (choice["label"] for choice in self.choices), self.HINT
+        )
+        self.messages = (compile_template(prompt),)
+        self.invalid_message = compile_template(self.INVALID + prompt)
+        
+        # Numbers first, then values, then labels: earlier keys win
+        self.match_index = OptionIndex()
+        for position, choice in enumerate(self.choices, start=1):
+            self.match_index.add([str(position)], choice.get("next"))
+        for key in ("value", "label"):
+            for choice in self.choices:
+                self.match_index.add([choice.get(key)], choice.get("next"))
+    
+    def targets(self) -> Tuple[str, ...]:
+        """Node IDs reachable from the options."""
+        return tuple(choice["next"] for choice in self.choices if choice.get("next"))
+    
+    def template_variables(self) -> FrozenSet[str]:
+        return self.invalid_message.variables
+    
+    def execute(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
+        """Execute options node - branches on a valid choice, else shows the options."""
+        if user_input:
+            next_node = self.match_index.lookup(user_input)
+            if next_node is not None:
+                return {
+                    "messages": [],
+                    "next_node": next_node,
+                    "should_continue": True,
+                    "handoff": False
+                }
+            messages = [self.invalid_message]
+        else:
+            messages = list(self.messages)
+        
+        return {
+            "messages": messages,
+            "next_node": None,  # Wait for a choice
+            "should_continue": False,
+            "handoff": False,
+            "invalid_input": bool(user_input),
+        }
@@ -0,0 +1,66 @@
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+from app.core.renderer import MessageTemplate, compile_template
+from .base import BaseNode
+from .matching import OptionIndex, format_choices
+
+
+class QANode(BaseNode):
+    """Node that lists questions and replies with the chosen one's answer.
+
+    ``questions`` is a list of ``{"question", "answer", "next"}``; the user
+    picks one by number or by writing the question.
+    """
+    
+    HINT = "💡 Escribe tu pregunta"
+    INVALID = "❌ Pregunta no reconocida. "
+    
+    def __init__(self, node_id: str, node_data: Dict[str, Any]):
+        super().__init__(node_id, node_data)
+        self.questions: Tuple[Dict[str, Any], ...] = tuple(node_data.get("questions", []))
+        prompt = format_choices(
+            node_data.get("content", ""), (q["question"] for q in self.questions), self.HINT
+        )
+        self.messages = (compile_template(prompt),)
+        self.invalid_message = compile_template(self.INVALID + prompt)
+        self.answers: Tuple[Optional[MessageTemplate], ...] = tuple(
+            compile_template(q["answer"]) if q.get("answer") else None for q in self.questions
+        )
+        
+        # Numbers first, then the question text
+        self.match_index = OptionIndex()
+        for position in range(len(self.questions)):
+            self.match_index.add([str(position + 1)], position)
+        for position, question in enumerate(self.questions):
+            self.match_index.add([question.get("question")], position)
+    
+    def targets(self) -> Tuple[str, ...]:
+        """Node IDs reachable after answering."""
+        return tuple(q["next"] for q in self.questions if q.get("next"))
+    
+    def template_variables(self) -> FrozenSet[str]:
+        answers = (answer.variables for answer in self.answers if answer is not None)
+        return self.invalid_message.variables.union(*answers)
+    
+    def execute(self, context: Dict[str, Any], user_input: Optional[str] = None) -> Dict[str, Any]:
+        """Execute QA node - answers a recognized question, else lists them."""
+        if user_input:
+            position = self.match_index.lookup(user_input)
+            if position is not None:
+                answer = self.answers[position]
+                return {
+                    "messages": [answer] if answer else [],
+                    "next_node": self.questions[position].get("next"),
+                    "should_continue": True,
+                    "handoff": False
+                }
+            messages = [self.invalid_message]
+        else:
+            messages = list(self.messages)
+        
+        return {
+            "messages": messages,
+            "next_node": None,  # Wait for a question
+            "should_continue": False,
+            "handoff": False,
+            "invalid_input": bool(user_input),
+        }
@@ -0,0 +1,209 @@
+"""Static checks for decision tree flow definitions.
+
+Runs when a flow is compiled (errors refuse the flow, warnings are logged)
+and as a CLI over the flow files::
+
+    python -m app.agents.decision_tree.validator [FLOW.json ...]
+
+Without arguments every file in ``assets/flow/`` is checked. The exit code
+is 1 if any flow has errors.
+"""
+
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.agents.decision_tree.bot_format import normalize_flow_data
+from app.agents.decision_tree.nodes.base import BaseNode
+from app.agents.decision_tree.nodes.factory import create_node
+
+ERROR = "error"
+WARNING = "warning"
+
+# Node types that move on to ``next`` without waiting for the user; a cycle
+# made only of these would keep a turn running forever
+AUTO_ADVANCE_TYPES = frozenset({"message", "action", "conditional", "dynamicService"})
+
+
+@dataclass(frozen=True)
+class FlowIssue:
+    """A problem found in a flow definition."""
+
+    level: str
+    message: str
+    node_id: Optional[str] = None
+
+    def __str__(self) -> str:
+        where = f" [{self.node_id}]" if self.node_id else ""
+        return f"{self.level}{where}: {self.message}"
+
+
+class FlowValidationError(ValueError):
+    """A flow has errors that would break it at runtime."""
+
+    def __init__(self, flow_id: str, issues: List[FlowIssue]):
+        self.flow_id = flow_id
+        self.issues = issues
+        details = "; ".join(str(issue) for issue in issues)
+        super().__init__(f"Flow {flow_id} is invalid: {details}")
+
+
+def validate_flow(flow_id: str, flow_data: Dict[str, Any]) -> List[FlowIssue]:
+    """Check a raw flow definition without running it.
+
+    Reports unknown node types, dangling ``start_node``/transition
+    references and auto-advance cycles as errors, and unreachable nodes and
+    template variables that no node writes as warnings.
+    """
+    raw_nodes = flow_data.get("nodes")
+    if not isinstance(raw_nodes, dict):
+        return [FlowIssue(ERROR, "flow has no 'nodes' mapping")]
+
+    issues: List[FlowIssue] = []
+    nodes: Dict[str, BaseNode] = {}
+    for node_id, node_data in raw_nodes.items():
+        try:
+            nodes[node_id] = create_node(node_id, node_data)
+        except ValueError as e:
+            issues.append(FlowIssue(ERROR, str(e), node_id))
+
+    start_node = flow_data.get("start_node")
+    if start_node is None:
+        issues.append(FlowIssue(ERROR, "start_node is not set"))
+    elif start_node not in raw_nodes:
+        issues.append(FlowIssue(ERROR, f"start_node {start_node} not found"))
+
+    for node in nodes.values():
+        for target in node.targets():
+            if target not in raw_nodes:
+                issues.append(
+                    FlowIssue(ERROR, f"references unknown node {target}", node.node_id)
+                )
+
+    issues.extend(_auto_advance_cycles(nodes))
+
+    for node in nodes.values():
+        match_index = getattr(node, "match_index", None)
+        for key, first, second in getattr(match_index, "conflicts", ()):
+            issues.append(
+                FlowIssue(
+                    WARNING,
+                    f"choice '{key}' matches both {first} and {second}; {first} wins",
+                    node.node_id,
+                )
+            )
+
+    if start_node in raw_nodes:
+        reachable = _reachable(start_node, nodes)
+        for node_id in raw_nodes:
+            if node_id not in reachable:
+                issues.append(FlowIssue(WARNING, "unreachable from start_node", node_id))
+
+    # Variables no node writes can only come from the request context: flag
+    # them once at load time instead of rendering "{name}" to users
+    provided = frozenset().union(*(node.provided_variables() for node in nodes.values()))
+    for node in nodes.values():
+        unknown = node.template_variables() - provided
+        if unknown:
+            issues.append(
+                FlowIssue(
+                    WARNING,
+                    f"template variables not written by any node: {', '.join(sorted(unknown))}",
+                    node.node_id,
+                )
+            )
+
+    return issues
+
+
+def _reachable(start_node: str, nodes: Dict[str, BaseNode]) -> set:
+    seen = {start_node}
+    stack = [start_node]
+    while stack:
+        node = nodes.get(stack.pop())
+        if node is None:
+            continue
+        for target in node.targets():
+            if target not in seen:
+                seen.add(target)
+                stack.append(target)
+    return seen
+
+
+def _auto_advance_cycles(nodes: Dict[str, BaseNode]) -> List[FlowIssue]:
+    """Find cycles made only of auto-advancing nodes (one issue per cycle).
+
+    Conditional nodes branch, so this is a depth-first search over every
+    target of the auto-advancing nodes rather than a walk along ``next``.
+    """
+    issues = []
+    done = set()
+    for entry_id in nodes:
+        if entry_id in done:
+            continue
+        path: List[str] = []
+        on_path: Dict[str, int] = {}
+        # (node_id, remaining targets) frames of the iterative DFS
+        stack = []
+
+        def enter(node_id: str) -> None:
+            node = nodes.get(node_id)
+            if node is None or node.node_type not in AUTO_ADVANCE_TYPES:
+                done.add(node_id)
+                return
+            on_path[node_id] = len(path)
+            path.append(node_id)
+            stack.append(iter(node.targets()))
+
+        enter(entry_id)
+        while stack:
+            target = next(stack[-1], None)
+            if target is None:
+                stack.pop()
+                finished = path.pop()
+                del on_path[finished]
+                done.add(finished)
+            elif target in on_path:
+                cycle = path[on_path[target]:] + [target]
+                issues.append(
+                    FlowIssue(
+                        ERROR,
+                        f"auto-advance cycle {' -> '.join(cycle)} never waits for input",
+                        target,
+                    )
+                )
+            elif target not in done:
+                enter(target)
+    return issues
+
+
+def _validate_file(path: Path) -> List[FlowIssue]:
+    try:
+        flow_data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        return [FlowIssue(ERROR, f"cannot read flow: {e}")]
+    flow_id = flow_data.get("flow_id", path.stem)
+    return validate_flow(flow_id, normalize_flow_data(flow_id, flow_data))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Validate flow files and print their issues; returns the exit code."""
+    args = sys.argv[1:] if argv is None else argv
+    paths = [Path(arg) for arg in args] or sorted(Path("assets/flow").glob("*.json"))
+
+    failed = False
+    for path in paths:
+        issues = _validate_file(path)
+        errors = sum(issue.level == ERROR for issue in issues)
+        failed |= errors > 0
+        status = "FAIL" if errors else "ok"
+        print(f"{status:4} {path} ({errors} errors, {len(issues) - errors} warnings)")
+        for issue in issues:
+            print(f"     {issue}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+import secrets
+from typing import Optional
+
+from app.config.settings import settings
+from app.core.orchestrator import Orchestrator
+from fastapi import Header, HTTPException, Request
+
+
+def get_orchestrator(request: Request) -> Orchestrator:
+    """Return the application-scoped orchestrator created in the lifespan.
+
+    Falls back to creating it on first use when the app runs without its
+    lifespan (e.g. a bare ``TestClient``), so the instance is still shared.
+    """
+    orchestrator = getattr(request.app.state, "orchestrator", None)
+    if orchestrator is None:
+        orchestrator = Orchestrator()
+        request.app.state.orchestrator = orchestrator
+    return orchestrator
+
+
+def require_admin(x_admin_key: Optional[str] = Header(None)) -> None:
+    """Guard the admin API: it exposes live conversations of every user.
+
+    Answers 404 while ``ADMIN_API_ENABLED`` is off (the default), and 401
+    unless the ``X-Admin-Key`` header matches ``ADMIN_API_KEY``; with no key
+    configured every request is rejected.
+    """
+    if not settings.ADMIN_API_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = settings.ADMIN_API_KEY
+    if not expected or not x_admin_key or not secrets.compare_digest(
+        x_admin_key.encode(), expected.encode()
+    ):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
@@ -0,0 +1,52 @@
+from typing import Tuple
+
+from app.config.logging import logger
+from app.core.tracing import Trace
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ServerTimingMiddleware:
+    """Trace requests under ``path_prefixes`` and report where their time went.
+
+    Each traced request gets a ``Server-Timing`` header with the time per
+    span name (``state_get``, ``node``, ``action``...) and the total. Requests
+    slower than ``slow_threshold_ms`` also log a ``slow_request`` record with
+    the span tree, the conversation id and the node path (negative disables).
+    """
+
+    def __init__(self, app: ASGIApp, path_prefixes: Tuple[str, ...], slow_threshold_ms: float):
+        self.app = app
+        self.path_prefixes = path_prefixes
+        self.slow_threshold_ms = slow_threshold_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace("request")
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            with trace:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            duration_ms = trace.duration * 1000
+            if 0 <= self.slow_threshold_ms <= duration_ms:
+                logger.warning(
+                    "slow_request",
+                    path=scope["path"],
+                    status_code=status_code,
+                    duration_ms=round(duration_ms, 3),
+                    conversation_id=trace.conversation_id,
+                    node_path=trace.node_path,
+                    spans=[child.to_dict(trace.started) for child in trace.children],
+                )
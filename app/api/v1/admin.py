@@ -0,0 +1,90 @@
+from typing import List, Optional
+
+from app.core.actions import action_stats
+from app.core.state import count_sessions, list_sessions, near_cache_stats, state_store_health
+from app.schemas.session import (
+    ActionLatency,
+    SessionCount,
+    SessionPage,
+    StateCacheStats,
+    StateStoreHealth,
+)
+from fastapi import APIRouter, HTTPException, Query
+
+router = APIRouter()
+
+
+def _check_filters(flow_id: Optional[str], node: Optional[str]) -> None:
+    # Los ids de nodo solo son únicos dentro de un flujo
+    if node is not None and flow_id is None:
+        raise HTTPException(status_code=400, detail="node requiere flow_id")
+
+
+@router.get("/sessions", response_model=SessionPage)
+async def get_sessions(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    flow_id: Optional[str] = None,
+    node: Optional[str] = None,
+    include_context: bool = False,
+):
+    """List active sessions, newest first, with cursor pagination.
+
+    The context of each session holds user data, so it is only returned
+    with ``include_context=true``.
+
+    Returns:
+        SessionPage: The sessions in this page and the cursor of the next one.
+    """
+    _check_filters(flow_id, node)
+    try:
+        items, next_cursor = await list_sessions(cursor, limit, flow_id, node)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not include_context:
+        items = [{**item, "context": None} for item in items]
+    return SessionPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/sessions/count", response_model=SessionCount)
+async def get_session_count(
+    flow_id: Optional[str] = None,
+    node: Optional[str] = None,
+):
+    """Count active sessions, optionally filtered by flow and node.
+
+    Returns:
+        SessionCount: The number of active sessions.
+    """
+    _check_filters(flow_id, node)
+    return SessionCount(count=await count_sessions(flow_id, node), flow_id=flow_id, node=node)
+
+
+@router.get("/state-cache", response_model=StateCacheStats)
+async def get_state_cache_stats():
+    """Near-cache counters of this worker, to size the cache.
+
+    Returns:
+        StateCacheStats: Hits, misses, evictions and current size.
+    """
+    return StateCacheStats(**near_cache_stats())
+
+
+@router.get("/state-store", response_model=StateStoreHealth)
+async def get_state_store_health():
+    """Circuit breaker and degraded mode of the state store in this worker.
+
+    Returns:
+        StateStoreHealth: Breaker state and counters, and pending writes.
+    """
+    return StateStoreHealth(**state_store_health())
+
+
+@router.get("/actions", response_model=List[ActionLatency])
+async def get_action_stats():
+    """Latency of every flow action in this worker.
+
+    Returns:
+        List[ActionLatency]: Calls, errors, timeouts and latency percentiles.
+    """
+    return [ActionLatency(action=name, **stats) for name, stats in action_stats().items()]
@@ -1,10 +1,15 @@
+from app.api.deps import require_admin
+from app.api.v1.admin import router as admin_router
 from app.api.v1.process import router as process_router
 from app.config.logging import logger
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 api_router = APIRouter()
 
 api_router.include_router(process_router, prefix="/agent", tags=["agent"])
+api_router.include_router(
+    admin_router, prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)]
+)
 
 
 @api_router.get("/health")
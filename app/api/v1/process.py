@@ -1,14 +1,22 @@
+from typing import List
+
+from app.api.deps import get_orchestrator
 from app.config.logging import logger
+from app.config.settings import settings
 from app.core.orchestrator import Orchestrator
+from app.core.state import StateConflictError
 from app.schemas.webhook_request import WebhookRequest
-from app.schemas.webhook_response import WebhookResponse
-from fastapi import APIRouter
+from app.schemas.webhook_response import WebhookBatchItem, WebhookResponse
+from fastapi import APIRouter, Depends, HTTPException
 
 router = APIRouter()
 
 
 @router.post("/process", response_model=WebhookResponse)
-async def process_webhook(payload: WebhookRequest):
+async def process_webhook(
+    payload: WebhookRequest,
+    orchestrator: Orchestrator = Depends(get_orchestrator),
+):
     """
     Process a webhook from external messaging platform.
     El estado conversacional se resuelve internamente usando channel + from.
@@ -18,8 +26,43 @@ async def process_webhook(payload: WebhookRequest):
         channel=payload.channel,
         from_user=payload.from_,
         message_type=payload.message.type,
-        message_content=payload.message.content,
+        # Not the content itself: it is user data and unbounded in size
+        message_length=len(payload.message.content),
     )
     
-    orchestrator = Orchestrator()
-    return orchestrator.handle_webhook(payload)
\ No newline at end of file
+    try:
+        return await orchestrator.handle_webhook(payload)
+    except StateConflictError as e:
+        # El gateway puede reintentar: el turno no se aplicó
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/process/batch", response_model=List[WebhookBatchItem])
+async def process_webhook_batch(
+    payload: List[WebhookRequest],
+    orchestrator: Orchestrator = Depends(get_orchestrator),
+):
+    """
+    Process a burst of webhooks in one call.
+    Los mensajes de una misma conversación se procesan en el orden recibido y
+    las respuestas se devuelven en el mismo orden que la entrada; un mensaje
+    fallido no invalida a los demás.
+    """
+    if len(payload) > settings.WEBHOOK_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote excede {settings.WEBHOOK_BATCH_MAX_SIZE} mensajes",
+        )
+    logger.info("webhook_batch_received", size=len(payload))
+
+    results = await orchestrator.handle_webhook_batch(payload)
+    items = []
+    for result in results:
+        if isinstance(result, StateConflictError):
+            # El gateway puede reintentar: el turno no se aplicó
+            items.append(WebhookBatchItem(status=409, error=str(result)))
+        elif isinstance(result, Exception):
+            items.append(WebhookBatchItem(status=500, error="Internal Server Error"))
+        else:
+            items.append(WebhookBatchItem(response=result))
+    return items
@@ -7,67 +7,220 @@ console-friendly development logging and JSON-formatted production logging.
 
 import json
 import logging
+import queue
+import random
 import sys
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, TextIO
 
 import structlog
 from app.config.settings import Environment, settings
 
-# Ensure log directory exists
-settings.LOG_DIR.mkdir(parents=True, exist_ok=True)
+# Tells the writer thread of JsonlFileHandler to finish
+_STOP = object()
 
 
-def get_log_file_path() -> Path:
-    """Get the current log file path based on date and environment.
+def get_log_file_path(when: Optional[datetime] = None) -> Path:
+    """Get the log file path for a date (today by default) and environment.
 
     Returns:
         Path: The path to the log file
     """
     env_prefix = settings.ENVIRONMENT.value
-    return (
-        settings.LOG_DIR / f"{env_prefix}-{datetime.now().strftime('%Y-%m-%d')}.jsonl"
-    )
+    day = (when or datetime.now()).strftime("%Y-%m-%d")
+    return settings.LOG_DIR / f"{env_prefix}-{day}.jsonl"
 
 
 class JsonlFileHandler(logging.Handler):
-    """Custom handler for writing JSONL logs to daily files."""
+    """Non-blocking handler for writing JSONL logs to daily files.
+
+    ``emit`` only puts the record on a bounded queue; a writer thread
+    formats the records and appends them to the current day's file, which
+    it keeps open and switches at midnight. Writes are batched: the buffer
+    goes to disk when it reaches ``buffer_bytes``, every
+    ``flush_interval_seconds``, on :meth:`flush` and on :meth:`close`
+    (``logging.shutdown`` at exit). If the queue is full the record is
+    dropped and counted; the count is written to the log as a
+    ``log_records_dropped`` entry.
+    """
 
-    def __init__(self, file_path: Path):
-        """Initialize the JSONL file handler.
+    def __init__(
+        self,
+        queue_size: int = 10000,
+        flush_interval_seconds: float = 1.0,
+        buffer_bytes: int = 64 * 1024,
+    ):
+        """Initialize the handler and start its writer thread.
 
         Args:
-            file_path: Path to the log file where entries will be written.
+            queue_size: Records waiting to be written before new ones are dropped.
+            flush_interval_seconds: Maximum time a record waits in the buffer.
+            buffer_bytes: Buffered bytes that trigger a write.
         """
         super().__init__()
-        self.file_path = file_path
+        self.flush_interval_seconds = flush_interval_seconds
+        self.buffer_bytes = buffer_bytes
+        self.dropped = 0
+        self._reported_dropped = 0
+        # Not self.lock: logging.shutdown() holds it while closing the handler
+        self._dropped_lock = threading.Lock()
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._file: Optional[TextIO] = None
+        self._file_path: Optional[Path] = None
+        self._rollover_at = 0.0
+        self._writer = threading.Thread(target=self._run, name="jsonl-log-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def file_path(self) -> Optional[Path]:
+        """The file currently being written."""
+        return self._file_path
 
     def emit(self, record: logging.LogRecord) -> None:
-        """Emit a record to the JSONL file."""
+        """Queue a record for the writer thread (never blocks)."""
         try:
-            log_entry = {
-                "timestamp": datetime.fromtimestamp(record.created).isoformat(),
-                "level": record.levelname,
-                "message": record.getMessage(),
-                "module": record.module,
-                "function": record.funcName,
-                "filename": record.pathname,
-                "line": record.lineno,
-                "environment": settings.ENVIRONMENT.value,
-            }
-            if hasattr(record, "extra"):
-                log_entry.update(record.extra)
-
-            with open(self.file_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry) + "\n")
+            # Resolve the message now: its arguments may change afterwards
+            record.msg = record.getMessage()
+            record.args = None
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
         except Exception:
             self.handleError(record)
 
+    def flush(self, timeout: float = 5.0) -> None:
+        """Write everything queued so far to disk."""
+        if not self._writer.is_alive():
+            return
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
     def close(self) -> None:
-        """Close the handler."""
+        """Write the pending records, stop the writer and close the file."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
         super().close()
 
+    def _run(self) -> None:
+        lines: List[str] = []
+        size = 0
+        deadline = time.monotonic() + self.flush_interval_seconds
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, logging.LogRecord):
+                if item.created >= self._rollover_at and lines:
+                    # The buffer belongs to the previous day's file
+                    self._write(lines)
+                    lines, size = [], 0
+                line = self._format_line(item)
+                lines.append(line)
+                size += len(line)
+                if size < self.buffer_bytes and time.monotonic() < deadline:
+                    continue
+            elif item is None and not lines:
+                deadline = time.monotonic() + self.flush_interval_seconds
+                continue
+
+            self._write(lines)
+            lines, size = [], 0
+            deadline = time.monotonic() + self.flush_interval_seconds
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _format_line(self, record: logging.LogRecord) -> str:
+        if record.created >= self._rollover_at:
+            self._open(record.created)
+        log_entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "message": record.msg,
+            "module": record.module,
+            "function": record.funcName,
+            "filename": record.pathname,
+            "line": record.lineno,
+            "environment": settings.ENVIRONMENT.value,
+        }
+        if hasattr(record, "extra"):
+            log_entry.update(record.extra)
+        return json.dumps(log_entry) + "\n"
+
+    def _open(self, created: float) -> None:
+        """Switch to the file of the day ``created`` falls in."""
+        day = datetime.fromtimestamp(created)
+        next_midnight = datetime.combine(day.date() + timedelta(days=1), dt_time.min)
+        self._rollover_at = next_midnight.timestamp()
+        path = get_log_file_path(day)
+        if path != self._file_path:
+            if self._file is not None:
+                self._file.close()
+            self._file_path = path
+            # Created on the first write rather than at import
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+
+    def _write(self, lines: List[str]) -> None:
+        with self._dropped_lock:
+            dropped = self.dropped - self._reported_dropped
+            self._reported_dropped = self.dropped
+        if dropped:
+            lines.append(json.dumps({
+                "timestamp": datetime.now().isoformat(),
+                "level": "WARNING",
+                "message": "log_records_dropped",
+                "dropped": dropped,
+                "environment": settings.ENVIRONMENT.value,
+            }) + "\n")
+        if not lines:
+            return
+        try:
+            if self._file is None:
+                self._open(time.time())
+            self._file.write("".join(lines))
+            self._file.flush()
+        except Exception as e:
+            sys.stderr.write(f"JsonlFileHandler: cannot write {self._file_path}: {e}\n")
+
+
+class EventSampler:
+    """Structlog processor that keeps a fraction of some verbose events.
+
+    ``rates`` maps event names to the fraction kept (``LOG_SAMPLE_RATES``);
+    kept events carry ``sample_rate`` so counts can be scaled back up.
+    Warnings and errors are never dropped.
+    """
+
+    _ALWAYS_KEPT = frozenset({"warning", "warn", "error", "exception", "critical", "fatal"})
+
+    def __init__(self, rates: Dict[str, float]):
+        self.rates = {event: rate for event, rate in rates.items() if rate < 1}
+
+    def __call__(self, _, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is None or method_name in self._ALWAYS_KEPT:
+            return event_dict
+        if random.random() >= rate:
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
 
 def get_structlog_processors(include_file_info: bool = True) -> List[Any]:
     """Get the structlog processors based on configuration.
@@ -78,9 +231,11 @@ def get_structlog_processors(include_file_info: bool = True) -> List[Any]:
     Returns:
         List[Any]: List of structlog processors
     """
-    # Set up processors that are common to both outputs
+    # Set up processors that are common to both outputs; sampling goes first
+    # so dropped events skip the rest of the chain
     processors = [
         structlog.stdlib.filter_by_level,
+        EventSampler(settings.LOG_SAMPLE_RATES),
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
         structlog.stdlib.PositionalArgumentsFormatter(),
@@ -90,7 +245,8 @@ def get_structlog_processors(include_file_info: bool = True) -> List[Any]:
         structlog.processors.UnicodeDecoder(),
     ]
 
-    # Add callsite parameters if file info is requested
+    # Add callsite parameters if file info is requested (inspects the stack
+    # on every event, so development only)
     if include_file_info:
         processors.append(
             structlog.processors.CallsiteParameterAdder(
@@ -120,9 +276,22 @@ def setup_logging() -> None:
 
     In development: pretty console output
     In staging/production: structured JSON logs
+
+    Called by the application lifespan (and by scripts that want the file
+    sink), not at import: it starts the writer thread of the JSONL handler,
+    which creates ``LOG_DIR`` on its first record. Later calls do nothing.
     """
-    # Create file handler for JSON logs
-    file_handler = JsonlFileHandler(get_log_file_path())
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    # Create file handler for JSON logs (written off the request path)
+    file_handler = JsonlFileHandler(
+        queue_size=settings.LOG_QUEUE_SIZE,
+        flush_interval_seconds=settings.LOG_FLUSH_INTERVAL_SECONDS,
+        buffer_bytes=settings.LOG_BUFFER_BYTES,
+    )
     file_handler.setLevel(settings.LOG_LEVEL)
 
     # Create console handler
@@ -131,9 +300,8 @@ def setup_logging() -> None:
 
     # Get shared processors
     shared_processors = get_structlog_processors(
-        # Include detailed file info only in development and test
-        include_file_info=settings.ENVIRONMENT
-        in [Environment.DEVELOPMENT, Environment.TEST]
+        # Include detailed file info only in development
+        include_file_info=settings.ENVIRONMENT == Environment.DEVELOPMENT
     )
 
     # Configure standard logging
@@ -143,6 +311,12 @@ def setup_logging() -> None:
         handlers=[file_handler, console_handler],
     )
 
+    # Calls below LOG_LEVEL return at once, before any processor runs; keep
+    # their arguments cheap (ids, sizes), never dumps of the context
+    wrapper_class = structlog.make_filtering_bound_logger(
+        logging.getLevelName(settings.LOG_LEVEL.upper())
+    )
+
     # Configure structlog based on environment
     if settings.LOG_FORMAT == "console":
         # Development-friendly console logging
@@ -152,7 +326,7 @@ def setup_logging() -> None:
                 # Use ConsoleRenderer for pretty output to the console
                 structlog.dev.ConsoleRenderer(),
             ],
-            wrapper_class=structlog.stdlib.BoundLogger,
+            wrapper_class=wrapper_class,
             logger_factory=structlog.stdlib.LoggerFactory(),
             cache_logger_on_first_use=True,
         )
@@ -163,20 +337,28 @@ def setup_logging() -> None:
                 *shared_processors,
                 structlog.processors.JSONRenderer(),
             ],
-            wrapper_class=structlog.stdlib.BoundLogger,
+            wrapper_class=wrapper_class,
             logger_factory=structlog.stdlib.LoggerFactory(),
             cache_logger_on_first_use=True,
         )
 
+    logger.info(
+        "logging_initialized",
+        environment=settings.ENVIRONMENT.value,
+        log_level=settings.LOG_LEVEL,
+        log_format=settings.LOG_FORMAT,
+    )
+
 
-# Initialize logging
-setup_logging()
+_configured = False
+
+# Until setup_logging() runs (scripts, a bare TestClient) events go to
+# stdout through structlog's defaults, still filtered by LOG_LEVEL
+structlog.configure(
+    wrapper_class=structlog.make_filtering_bound_logger(
+        logging.getLevelName(settings.LOG_LEVEL.upper())
+    )
+)
 
 # Create logger instance
 logger = structlog.get_logger()
-logger.info(
-    "logging_initialized",
-    environment=settings.ENVIRONMENT.value,
-    log_level=settings.LOG_LEVEL,
-    log_format=settings.LOG_FORMAT,
-)
@@ -49,9 +49,13 @@ def get_environment() -> Environment:
 
 # Load appropriate .env file based on environment
 def load_env_file():
-    """Load environment-specific .env file."""
+    """Load environment-specific .env file.
+
+    Runs once, when this module is imported; the file loaded (``ENV_FILE``)
+    is logged at application startup, since logging is configured from these
+    settings.
+    """
     env = get_environment()
-    print(f"Loading environment: {env}")
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 
     # Define env files in priority order
@@ -66,7 +70,6 @@ def load_env_file():
     for env_file in env_files:
         if os.path.isfile(env_file):
             load_dotenv(dotenv_path=env_file)
-            print(f"Loaded environment from {env_file}")
             return env_file
 
     # Fall back to default if no env file found
@@ -136,6 +139,12 @@ class Settings:
         )
         self.API_V1_STR = os.getenv("API_V1_STR", "/api/v1")
         self.DEBUG = os.getenv("DEBUG", "false").lower() in ("true", "1", "t", "yes")
+        # Admin API (/admin: sessions, caches, state store): off by default;
+        # when on, requests must send ADMIN_API_KEY in the X-Admin-Key header
+        self.ADMIN_API_ENABLED = os.getenv("ADMIN_API_ENABLED", "false").lower() in (
+            "true", "1", "t", "yes"
+        )
+        self.ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
 
         # CORS Settings
         self.ALLOWED_ORIGINS = parse_list_from_env("ALLOWED_ORIGINS", ["*"])
@@ -170,6 +179,30 @@ class Settings:
         self.LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
         self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
         self.LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "console"
+        # JSONL file sink: records queued for the writer thread before new
+        # ones are dropped, and when the buffer is written to disk
+        self.LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+        self.LOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("LOG_FLUSH_INTERVAL_SECONDS", "1"))
+        self.LOG_BUFFER_BYTES = int(os.getenv("LOG_BUFFER_BYTES", "65536"))
+        # Fraction of DEBUG/INFO events kept, per event name, e.g.
+        # "webhook_received:0.1,turn_started:0.01" (warnings/errors always kept)
+        self.LOG_SAMPLE_RATES = {
+            event.strip(): float(rate)
+            for event, _, rate in (
+                item.partition(":") for item in parse_list_from_env("LOG_SAMPLE_RATES")
+            )
+        }
+        # /agent/process requests slower than this log a "slow_request" record
+        # with their span tree (0 = every request, negative = never)
+        self.SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "500"))
+        # Channels kept as the "channel" label of metrics; any other value
+        # sent by a client is counted as "other" (bounded series)
+        self.METRICS_CHANNELS = [
+            channel.lower()
+            for channel in parse_list_from_env(
+                "METRICS_CHANNELS", ["whatsapp", "telegram", "web", "messenger", "instagram", "sms"]
+            )
+        ]
 
         # Postgres Configuration
         self.POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
@@ -189,7 +222,92 @@ class Settings:
         self.REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
         self.REDIS_TTL_SECONDS = int(os.getenv("REDIS_TTL_SECONDS", "3600"))  # 1 hour
         self.USE_REDIS = os.getenv("USE_REDIS", "true").lower() == "true"
+        self.REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "100"))
+        self.REDIS_POOL_TIMEOUT_SECONDS = float(
+            os.getenv("REDIS_POOL_TIMEOUT_SECONDS", "5")
+        )
+        self.REDIS_SOCKET_TIMEOUT_SECONDS = float(
+            os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", "5")
+        )
+        # Also bounds the startup ping, so an unresponsive Redis delays
+        # readiness by at most this long
+        self.REDIS_CONNECT_TIMEOUT_SECONDS = float(
+            os.getenv("REDIS_CONNECT_TIMEOUT_SECONDS", "2")
+        )
+
+        # Conversation state encoding in Redis: "json" (orjson when installed)
+        # or "msgpack"; values above the threshold are zlib-compressed (0 = never)
+        self.STATE_CODEC = os.getenv("STATE_CODEC", "json")
+        self.STATE_COMPRESSION_THRESHOLD_BYTES = int(
+            os.getenv("STATE_COMPRESSION_THRESHOLD_BYTES", "1024")
+        )
+
+        # Conversation state concurrency
+        # In-process lock stripes keyed by conversation id (0 disables them)
+        self.STATE_LOCK_STRIPES = int(os.getenv("STATE_LOCK_STRIPES", "1024"))
+        # Turn retries after a cross-worker version conflict
+        self.STATE_SAVE_MAX_RETRIES = int(os.getenv("STATE_SAVE_MAX_RETRIES", "3"))
+        # Session cap of the in-memory store (USE_REDIS=false) and of the
+        # states kept by the "local" degraded mode while Redis is down (0 = none)
+        self.MEMORY_STATE_MAX_SESSIONS = int(
+            os.getenv("MEMORY_STATE_MAX_SESSIONS", "10000")
+        )
+        # Circuit breaker around Redis: it opens when STATE_BREAKER_FAILURE_RATE
+        # of the calls of the last STATE_BREAKER_WINDOW_SECONDS failed (with at
+        # least STATE_BREAKER_MIN_CALLS calls); while open, state operations
+        # skip Redis, and after STATE_BREAKER_OPEN_SECONDS one probe is sent
+        self.STATE_BREAKER_FAILURE_RATE = float(os.getenv("STATE_BREAKER_FAILURE_RATE", "0.5"))
+        self.STATE_BREAKER_MIN_CALLS = int(os.getenv("STATE_BREAKER_MIN_CALLS", "10"))
+        self.STATE_BREAKER_WINDOW_SECONDS = float(
+            os.getenv("STATE_BREAKER_WINDOW_SECONDS", "10")
+        )
+        self.STATE_BREAKER_OPEN_SECONDS = float(os.getenv("STATE_BREAKER_OPEN_SECONDS", "5"))
+        # Conversations while Redis is unavailable: "local" serves the states
+        # this worker last saw and keeps what it saves, to write it back when
+        # Redis recovers; "reset" starts them over and drops their writes
+        self.STATE_DEGRADED_MODE = os.getenv("STATE_DEGRADED_MODE", "local").lower()
+        # In-process near-cache in front of Redis: "off", "validate" (version
+        # check per read) or "pubsub" (invalidations published by the workers)
+        self.STATE_NEAR_CACHE_MODE = os.getenv("STATE_NEAR_CACHE_MODE", "off").lower()
+        self.STATE_NEAR_CACHE_MAX_ENTRIES = int(
+            os.getenv("STATE_NEAR_CACHE_MAX_ENTRIES", "10000")
+        )
+        self.STATE_NEAR_CACHE_TTL_SECONDS = float(
+            os.getenv("STATE_NEAR_CACHE_TTL_SECONDS", "30")
+        )
         self.DEFAULT_FLOW_ID = os.getenv("DEFAULT_FLOW_ID", "citas_essalud")
+        # Maximum messages accepted by /agent/process/batch
+        self.WEBHOOK_BATCH_MAX_SIZE = int(os.getenv("WEBHOOK_BATCH_MAX_SIZE", "500"))
+
+        # Flow Configuration
+        # Seconds between checks of a flow file for changes (0 = every turn)
+        self.FLOW_RELOAD_INTERVAL_SECONDS = float(
+            os.getenv("FLOW_RELOAD_INTERVAL_SECONDS", "2")
+        )
+        # Nodes a single turn may process before it is aborted as a runaway loop
+        self.FLOW_MAX_STEPS_PER_TURN = int(os.getenv("FLOW_MAX_STEPS_PER_TURN", "100"))
+
+        # Flow actions (action / dynamicService nodes)
+        # Threads running sync actions, so they never block the event loop
+        self.ACTION_THREAD_POOL_SIZE = int(os.getenv("ACTION_THREAD_POOL_SIZE", "16"))
+        # Defaults for actions that do not set their own limits (0 = none)
+        self.ACTION_DEFAULT_TIMEOUT_SECONDS = float(
+            os.getenv("ACTION_DEFAULT_TIMEOUT_SECONDS", "5")
+        )
+        self.ACTION_DEFAULT_MAX_CONCURRENCY = int(
+            os.getenv("ACTION_DEFAULT_MAX_CONCURRENCY", "32")
+        )
+        # Shared results of cacheable actions (entries per action)
+        self.ACTION_CACHE_MAX_ENTRIES = int(os.getenv("ACTION_CACHE_MAX_ENTRIES", "1024"))
+        # service_get (dynamicService over HTTP): fresh / stale-while-revalidate
+        # / failure TTLs of the shared results
+        self.SERVICE_CACHE_TTL_SECONDS = float(os.getenv("SERVICE_CACHE_TTL_SECONDS", "60"))
+        self.SERVICE_CACHE_STALE_SECONDS = float(
+            os.getenv("SERVICE_CACHE_STALE_SECONDS", "300")
+        )
+        self.SERVICE_CACHE_NEGATIVE_TTL_SECONDS = float(
+            os.getenv("SERVICE_CACHE_NEGATIVE_TTL_SECONDS", "5")
+        )
 
         # Rate Limiting Configuration
         self.RATE_LIMIT_DEFAULT = parse_list_from_env(
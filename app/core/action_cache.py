@@ -0,0 +1,151 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+
+from app.config.logging import logger
+
+
+class ActionCache:
+    """In-process cache of an action's results, shared by all conversations.
+
+    Results are keyed by the action's normalized arguments and are:
+
+    - fresh for ``ttl_seconds``: served without calling the action;
+    - stale for ``stale_seconds`` more: served right away while a single
+      background call refreshes them (stale-while-revalidate);
+    - failures of the ``negative_errors`` types are remembered for
+      ``negative_ttl_seconds``, so a failing upstream is not retried by
+      every user.
+
+    Concurrent misses for the same key share one call (single-flight): a
+    burst of users reaching the same node produces one upstream request.
+    The shared call is shielded, so a cancelled request does not cancel it
+    for the others. Cached values are shared; actions must not return data
+    that callers mutate.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        stale_seconds: float = 0.0,
+        negative_ttl_seconds: float = 0.0,
+        max_entries: int = 1024,
+        negative_errors: Tuple[type, ...] = (),
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self.negative_errors = negative_errors
+        # key -> (stored at, result or error); least to most recently used
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refreshing: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(params: Dict[str, Any], context: Dict[str, Any], vary_on: Tuple[str, ...]) -> str:
+        """Normalized key: same arguments in any order give the same key."""
+        arguments = {"params": params, "vary": {name: context.get(name) for name in vary_on}}
+        return json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached result for ``key``, calling ``load`` as needed.
+
+        Raises the cached (or new) error for failures.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if isinstance(value, Exception):
+                if age < self.negative_ttl_seconds:
+                    self.negative_hits += 1
+                    self._entries.move_to_end(key)
+                    raise value.with_traceback(None)
+            elif age < self.ttl_seconds:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            elif age < self.ttl_seconds + self.stale_seconds:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._refresh(key, load)
+                return value
+
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._start(key, load)
+        return await asyncio.shield(task)
+
+    def _start(self, key: str, load: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, load))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._load_done(key, done))
+        return task
+
+    def _refresh(self, key: str, load: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._inflight:
+            return
+        self.refreshes += 1
+        task = self._start(key, load)
+        # Keep a reference until it finishes; a failed refresh keeps serving
+        # the stale value until it ages out
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    def _load_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the error even if every waiter was cancelled
+        if not task.cancelled() and task.exception() is not None and task in self._refreshing:
+            logger.warning("action_cache_refresh_failed", error=str(task.exception()))
+
+    async def _load(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await load()
+        except self.negative_errors as e:
+            if self.negative_ttl_seconds > 0:
+                self._store(key, e)
+            raise
+        self._store(key, value)
+        return value
+
+    def _store(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters to tune the TTLs."""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,334 @@
+"""Action registry and executor for ``action`` and ``dynamicService`` nodes.
+
+Actions are registered by name with :func:`register_action` and may be
+coroutines or plain functions; plain functions run on a bounded thread pool
+so a blocking lookup never stalls the event loop. Every call gets a timeout
+and each action a concurrency limit (waiting for a slot counts against the
+timeout). Latency, errors and timeouts are tracked per action.
+
+An action receives a copy of the conversation context and the node's
+``params`` and returns an :class:`ActionResult` (or ``None``); the engine
+applies it to the real context, so a call abandoned on timeout can never
+modify the conversation. Raise :class:`ActionError` for failures the user
+should see; the node routes them to its ``on_error`` node.
+
+Actions whose result is the same for every user (service listings,
+catalogs) can opt into a shared :class:`ActionCache` with
+``cache_ttl_seconds``; they then only see the context variables listed in
+``cache_vary_on``, which are part of the cache key with the params.
+"""
+
+import asyncio
+import copy
+import inspect
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.config.logging import logger
+from app.core.action_cache import ActionCache
+from app.core.tracing import span
+from app.config.settings import settings
+
+
+class ActionError(Exception):
+    """An action failed; ``str(error)`` is shown to the user when set."""
+
+
+class ActionTimeoutError(ActionError):
+    """An action did not finish within its timeout."""
+
+
+@dataclass
+class ActionResult:
+    """Outcome of an action.
+
+    ``messages`` are sent to the user and ``updates`` set in the context;
+    ``data`` is handed to the node (saved under ``save_as`` by action nodes,
+    listed by dynamicService nodes).
+    """
+
+    messages: List[str] = field(default_factory=list)
+    updates: Dict[str, Any] = field(default_factory=dict)
+    data: Any = None
+
+
+class ActionStats:
+    """Latency counters of one action (recent samples for percentiles)."""
+
+    def __init__(self, window: int = 1024):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self._recent.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = sorted(self._recent)
+
+        def percentile(q: float) -> float:
+            if not recent:
+                return 0.0
+            return round(recent[min(int(q * len(recent)), len(recent) - 1)] * 1000, 3)
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "avg_ms": round(self.total_seconds / self.calls * 1000, 3) if self.calls else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+class ActionSpec:
+    """A registered action with its limits."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        timeout_seconds: float,
+        max_concurrency: int,
+        provides: Tuple[str, ...],
+        cache: Optional[ActionCache] = None,
+        cache_vary_on: Tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.func = func
+        self.is_async = inspect.iscoroutinefunction(func)
+        self.timeout_seconds = timeout_seconds
+        self.max_concurrency = max_concurrency
+        self.provides = frozenset(provides)
+        self.cache = cache
+        self.cache_vary_on = tuple(cache_vary_on)
+        self.stats = ActionStats()
+        # asyncio primitives belong to one event loop (scripts may run several)
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def semaphore(self) -> Optional[asyncio.Semaphore]:
+        if self.max_concurrency <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+
+# Actions by the name used in flow files
+ACTIONS: Dict[str, ActionSpec] = {}
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def register_action(
+    name: str,
+    *,
+    timeout_seconds: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+    provides: Tuple[str, ...] = (),
+    cache_ttl_seconds: float = 0.0,
+    cache_stale_seconds: float = 0.0,
+    cache_negative_ttl_seconds: float = 0.0,
+    cache_vary_on: Tuple[str, ...] = (),
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator that makes a function available to flows as action ``name``.
+
+    Args:
+        timeout_seconds: Per-call timeout (``ACTION_DEFAULT_TIMEOUT_SECONDS``).
+        max_concurrency: Calls allowed in flight at once per worker
+            (``ACTION_DEFAULT_MAX_CONCURRENCY``; 0 = unlimited).
+        provides: Context variables the action sets, for flow validation.
+        cache_ttl_seconds: Share results for this long (0 = no cache).
+        cache_stale_seconds: Then serve them while refreshing for this long.
+        cache_negative_ttl_seconds: Remember :class:`ActionError` failures.
+        cache_vary_on: Context variables the cached result depends on.
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        cache = None
+        if cache_ttl_seconds > 0:
+            cache = ActionCache(
+                cache_ttl_seconds,
+                cache_stale_seconds,
+                cache_negative_ttl_seconds,
+                settings.ACTION_CACHE_MAX_ENTRIES,
+                negative_errors=(ActionError,),
+            )
+        ACTIONS[name] = ActionSpec(
+            name,
+            func,
+            settings.ACTION_DEFAULT_TIMEOUT_SECONDS if timeout_seconds is None else timeout_seconds,
+            settings.ACTION_DEFAULT_MAX_CONCURRENCY if max_concurrency is None else max_concurrency,
+            provides,
+            cache,
+            cache_vary_on,
+        )
+        return func
+    return decorator
+
+
+def get_action(name: str) -> ActionSpec:
+    """Return the registered action ``name``.
+
+    Raises:
+        ValueError: If no action is registered under that name.
+    """
+    spec = ACTIONS.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown action: {name}")
+    return spec
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ACTION_THREAD_POOL_SIZE, thread_name_prefix="action"
+        )
+    return _executor
+
+
+def close_action_executor() -> None:
+    """Shut down the thread pool of sync actions (application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _call(
+    spec: ActionSpec,
+    context: Dict[str, Any],
+    params: Dict[str, Any],
+    semaphore: Optional[asyncio.Semaphore],
+) -> Any:
+    """Call the action in a slot of ``semaphore``.
+
+    The slot and ``in_flight`` are released when the call really ends. For
+    a sync action that is when its pool thread returns, even if the caller
+    was cancelled by the timeout meanwhile (the thread cannot be stopped),
+    so ``max_concurrency`` also bounds abandoned calls.
+    """
+    spec.stats.in_flight += 1
+    acquired = False
+    handed_off = False
+    try:
+        if semaphore is not None:
+            await semaphore.acquire()
+            acquired = True
+        if spec.is_async:
+            return await spec.func(context, params)
+        loop = asyncio.get_running_loop()
+        future = _get_executor().submit(spec.func, context, params)
+        slot = semaphore if acquired else None
+        future.add_done_callback(lambda _: _release_threadsafe(loop, spec, slot))
+        handed_off = True
+        return await asyncio.wrap_future(future)
+    finally:
+        if not handed_off:
+            _release(spec, semaphore if acquired else None)
+
+
+def _release(spec: ActionSpec, semaphore: Optional[asyncio.Semaphore]) -> None:
+    spec.stats.in_flight -= 1
+    if semaphore is not None:
+        semaphore.release()
+
+
+def _release_threadsafe(
+    loop: asyncio.AbstractEventLoop, spec: ActionSpec, semaphore: Optional[asyncio.Semaphore]
+) -> None:
+    """Done callback of a pool call (runs on the pool thread)."""
+    try:
+        loop.call_soon_threadsafe(_release, spec, semaphore)
+    except RuntimeError:
+        # The loop is closed: nothing can wait for the slot any more
+        pass
+
+
+async def run_action(
+    name: str, context: Dict[str, Any], params: Optional[Dict[str, Any]] = None
+) -> ActionResult:
+    """Run action ``name`` with its timeout and concurrency limit.
+
+    Cached actions are served from their :class:`ActionCache` when possible;
+    each conversation gets its own copy of the messages and updates.
+
+    Raises:
+        ActionTimeoutError: If the call (including the wait for a free slot)
+            took longer than the action's timeout. A sync action keeps its
+            pool thread and its concurrency slot until it returns; its
+            result is discarded.
+        ActionError: If the action failed (or failed recently, if cached).
+        ValueError: If the action is not registered.
+    """
+    spec = get_action(name)
+    params = dict(params or {})
+    with span("action", action=name):
+        if spec.cache is None:
+            return await _execute(spec, dict(context), params)
+
+        context = {key: context[key] for key in spec.cache_vary_on if key in context}
+        key = ActionCache.make_key(params, context, spec.cache_vary_on)
+        result = await spec.cache.get_or_load(key, lambda: _execute(spec, context, params))
+    return ActionResult(list(result.messages), copy.deepcopy(result.updates), result.data)
+
+
+async def _execute(spec: ActionSpec, context: Dict[str, Any], params: Dict[str, Any]) -> ActionResult:
+    name = spec.name
+    semaphore = spec.semaphore()
+    started = time.perf_counter()
+    try:
+        async with asyncio.timeout(spec.timeout_seconds or None):
+            result = await _call(spec, context, params, semaphore)
+    except TimeoutError:
+        spec.stats.timeouts += 1
+        logger.warning("action_timeout", action=name, timeout_seconds=spec.timeout_seconds)
+        raise ActionTimeoutError(f"Action {name} timed out") from None
+    except ActionError:
+        spec.stats.errors += 1
+        raise
+    except Exception:
+        spec.stats.errors += 1
+        logger.exception("action_failed", action=name)
+        raise
+    finally:
+        spec.stats.record(time.perf_counter() - started)
+
+    if result is None:
+        return ActionResult()
+    if not isinstance(result, ActionResult):
+        raise TypeError(f"Action {name} returned {type(result).__name__}, expected ActionResult")
+    return result
+
+
+def action_stats() -> Dict[str, Dict[str, Any]]:
+    """Latency counters of every registered action (per worker).
+
+    Latencies are of actual calls; cache hits are only counted in ``cache``.
+    """
+    return {
+        name: {**spec.stats.snapshot(), "cache": spec.cache.stats() if spec.cache else None}
+        for name, spec in sorted(ACTIONS.items())
+    }
+
+
+# Built-in actions register themselves on import
+from app.actions import services, validate_dni  # noqa: E402,F401
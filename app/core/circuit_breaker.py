@@ -0,0 +1,174 @@
+"""Circuit breaker for calls to a backend that can brown out.
+
+The breaker watches the outcome of recent calls over a sliding window and
+stops sending calls while the failure rate is high, so callers fail fast
+instead of each waiting for a socket timeout:
+
+- ``closed``: calls go through; when at least ``min_calls`` calls in the last
+  ``window_seconds`` were recorded and ``failure_rate`` of them failed, the
+  breaker opens;
+- ``open``: :meth:`CircuitBreaker.allow` returns False for ``open_seconds``;
+- ``half_open``: one probe call at a time is allowed; its success closes the
+  breaker, its failure opens it again.
+
+Like the metrics registry it has no locks: it is used from the event loop
+thread. Callers record every allowed call with :meth:`record_success` or
+:meth:`record_failure`; outcomes of calls sent before the breaker opened are
+ignored, and a probe that never reports (a cancelled call) is replaced by a
+new one after ``open_seconds``.
+"""
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Buckets per window: outcomes are counted per bucket, so old calls leave the
+# window at most window_seconds / WINDOW_BUCKETS late
+WINDOW_BUCKETS = 10
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker (closed / open / half-open).
+
+    Args:
+        name: Backend name, for logs and stats.
+        failure_rate: Fraction of failed calls in the window that opens it.
+        min_calls: Calls the window needs before the rate is considered.
+        window_seconds: Length of the sliding window.
+        open_seconds: Time spent open before probing the backend again.
+        on_state_change: Called with ``(old_state, new_state)`` on every
+            transition.
+        clock: Monotonic time source (seconds).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window_seconds: float = 10.0,
+        open_seconds: float = 5.0,
+        on_state_change: Optional[Callable[[str, str], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = max(min_calls, 1)
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.on_state_change = on_state_change
+        self._clock = clock
+        self._bucket_seconds = window_seconds / WINDOW_BUCKETS
+        # [bucket start, calls, failures], oldest first, plus running totals
+        self._buckets: Deque[List[float]] = deque()
+        self._calls = 0
+        self._failures = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Current state; an open breaker turns half-open after ``open_seconds``."""
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to the backend now (False: fail fast)."""
+        if self._state == CLOSED:
+            return True
+        state = self.state
+        if state == HALF_OPEN:
+            now = self._clock()
+            if self._probe_started is None or now - self._probe_started >= self.open_seconds:
+                self._probe_started = now
+                return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """Record an allowed call that succeeded."""
+        if self._state == HALF_OPEN:
+            self._close()
+        elif self._state == CLOSED:
+            self._add(0)
+
+    def record_failure(self) -> None:
+        """Record an allowed call that failed."""
+        if self._state == HALF_OPEN:
+            self._open()
+            return
+        if self._state == OPEN:
+            # A call sent before the breaker opened; it does not extend it
+            return
+        self._add(1)
+        if self._calls >= self.min_calls and self._failures >= self.failure_rate * self._calls:
+            self._open()
+
+    def trip(self) -> None:
+        """Open the breaker now (e.g. the backend was unreachable at startup)."""
+        self._open()
+
+    def stats(self) -> Dict[str, Any]:
+        """State and window counters, for health reporting."""
+        state = self.state
+        self._expire(self._clock())
+        return {
+            "name": self.name,
+            "state": state,
+            "window_calls": self._calls,
+            "window_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "open_for_seconds": (
+                round(self._clock() - self._opened_at, 3) if state != CLOSED else None
+            ),
+        }
+
+    def _add(self, failed: int) -> None:
+        now = self._clock()
+        self._expire(now)
+        if not self._buckets or now - self._buckets[-1][0] >= self._bucket_seconds:
+            self._buckets.append([now, 0, 0])
+        bucket = self._buckets[-1]
+        bucket[1] += 1
+        bucket[2] += failed
+        self._calls += 1
+        self._failures += failed
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._buckets and self._buckets[0][0] <= cutoff:
+            _, calls, failures = self._buckets.popleft()
+            self._calls -= calls
+            self._failures -= failures
+
+    def _reset_window(self) -> None:
+        self._buckets.clear()
+        self._calls = 0
+        self._failures = 0
+
+    def _open(self) -> None:
+        self._opened_at = self._clock()
+        self._probe_started = None
+        self._reset_window()
+        if self._state != OPEN:
+            self.opened += 1
+            self._transition(OPEN)
+
+    def _close(self) -> None:
+        self._probe_started = None
+        self._reset_window()
+        self._transition(CLOSED)
+
+    def _transition(self, state: str) -> None:
+        old, self._state = self._state, state
+        if old != state and self.on_state_change is not None:
+            self.on_state_change(old, state)
@@ -0,0 +1,172 @@
+"""Codecs para serializar el estado de conversación guardado en Redis.
+
+Cada valor codificado empieza con un byte de formato: los 7 bits bajos
+identifican el esquema y el codec (JSON o msgpack) y el bit alto indica
+compresión zlib. Así se puede cambiar de codec, de esquema o activar la
+compresión sin vaciar Redis: la lectura entiende todos los formatos
+conocidos, incluido el JSON plano anterior, y la escritura usa el formato
+configurado.
+
+El esquema v1 guarda ``[flow_id, current_node, context]`` como arreglo: el
+``conversation_id`` ya va en la clave y no se repite.
+"""
+
+import json
+import zlib
+from typing import Any, Dict, NamedTuple, Optional
+
+from app.config.logging import logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+# Byte de formato
+FORMAT_JSON_V1 = 0x01
+FORMAT_MSGPACK_V1 = 0x02
+FLAG_ZLIB = 0x80
+_LEGACY_JSON = ord("{")
+
+
+class StateRecord(NamedTuple):
+    """Campos persistidos de un ``ConversationState``."""
+
+    flow_id: Optional[str]
+    current_node: Optional[str]
+    context: Dict[str, Any]
+
+
+class StateCodec:
+    """Serializa objetos planos (listas, dicts, strings, números) a bytes."""
+
+    name = "base"
+    format_id = 0
+
+    def dumps(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(StateCodec):
+    """JSON compacto; usa orjson si está instalado."""
+
+    name = "json"
+    format_id = FORMAT_JSON_V1
+
+    def dumps(self, obj: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(obj)
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+
+class MsgpackCodec(StateCodec):
+    """Formato binario compacto (requiere ``msgpack``)."""
+
+    name = "msgpack"
+    format_id = FORMAT_MSGPACK_V1
+
+    def __init__(self):
+        # Importado al usarlo: la mayoría de los despliegues usan JSON
+        try:
+            import msgpack
+        except ImportError:  # pragma: no cover - dependencia opcional
+            raise ImportError("msgpack no está instalado") from None
+        self._packb = msgpack.packb
+        self._unpackb = msgpack.unpackb
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._packb(obj, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return self._unpackb(data, raw=False)
+
+
+CODECS = {JsonCodec.name: JsonCodec, MsgpackCodec.name: MsgpackCodec}
+
+
+def get_codec(name: str) -> StateCodec:
+    """Instancia el codec ``name``; si no está disponible, usa JSON."""
+    codec_class = CODECS.get(name)
+    if codec_class is None:
+        raise ValueError(f"Codec de estado desconocido: {name}")
+    try:
+        return codec_class()
+    except ImportError as e:
+        logger.warning("state_codec_unavailable", codec=name, fallback="json", error=str(e))
+        return JsonCodec()
+
+
+class StateSerializer:
+    """Codifica ``StateRecord`` con el codec configurado y decodifica cualquier formato.
+
+    Args:
+        codec: Codec usado para escribir
+        compress_threshold: Tamaño (bytes) a partir del cual se comprime con
+            zlib; 0 desactiva la compresión
+        compression_level: Nivel de zlib (1 = el más rápido)
+    """
+
+    def __init__(
+        self,
+        codec: Optional[StateCodec] = None,
+        compress_threshold: int = 1024,
+        compression_level: int = 1,
+    ):
+        self.codec = codec or JsonCodec()
+        self.compress_threshold = compress_threshold
+        self.compression_level = compression_level
+        self._decoders = {JsonCodec.format_id: JsonCodec()}
+        self._decoders[self.codec.format_id] = self.codec
+
+    def encode(self, record: StateRecord) -> bytes:
+        body = self.codec.dumps([record.flow_id, record.current_node, record.context])
+        header = self.codec.format_id
+        if self.compress_threshold and len(body) >= self.compress_threshold:
+            body = zlib.compress(body, self.compression_level)
+            header |= FLAG_ZLIB
+        return bytes((header,)) + body
+
+    def decode(self, data: bytes) -> StateRecord:
+        """Decodifica un valor en cualquiera de los formatos conocidos.
+
+        Raises:
+            ValueError: Si el formato es desconocido o el valor está corrupto.
+        """
+        if not data:
+            raise ValueError("Valor de estado vacío")
+        header = data[0]
+        if header == _LEGACY_JSON:
+            legacy = json.loads(data)
+            return StateRecord(
+                legacy.get("flow_id"), legacy.get("current_node"), legacy.get("context", {})
+            )
+
+        decoder = self._decoders.get(header & ~FLAG_ZLIB)
+        if decoder is None:
+            decoder = self._load_decoder(header & ~FLAG_ZLIB)
+        body = data[1:]
+        try:
+            if header & FLAG_ZLIB:
+                body = zlib.decompress(body)
+            flow_id, current_node, context = decoder.loads(body)
+        except Exception as e:
+            raise ValueError(f"Estado corrupto: {e}") from e
+        return StateRecord(flow_id, current_node, context or {})
+
+    def _load_decoder(self, format_id: int) -> StateCodec:
+        """Crea el decodificador de un formato escrito por otro worker (msgpack)."""
+        if format_id != MsgpackCodec.format_id:
+            raise ValueError(f"Formato de estado desconocido: {format_id:#04x}")
+        try:
+            decoder = self._decoders[format_id] = MsgpackCodec()
+        except ImportError as e:
+            raise ValueError(f"Formato de estado no soportado: {e}") from e
+        return decoder
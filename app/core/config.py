@@ -1,27 +0,0 @@
-from pydantic_settings import BaseSettings
-from typing import Optional
-
-
-class Settings(BaseSettings):
-    """Configuración de la aplicación con variables de entorno."""
-    
-    # Redis Configuration
-    redis_url: str = "redis://localhost:6379/0"
-    redis_ttl_seconds: int = 3600  # 1 hour
-    use_redis: bool = True
-    
-    # API Configuration
-    api_host: str = "0.0.0.0"
-    api_port: int = 8000
-    debug: bool = False
-    
-    # Flow Configuration
-    default_flow_id: str = "citas_essalud"
-    
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-
-
-# Instancia global de configuración
-settings = Settings()
\ No newline at end of file
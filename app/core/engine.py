@@ -1,38 +1,268 @@
-from typing import List, Dict, Any, Optional
-from app.agents.decision_tree.loader import load_flow
-from app.core.state import get_state, save_state, debug_state_store
+import asyncio
+import random
+import time
+from typing import List, Dict, Any, Optional, Tuple, Union
+from app.agents.decision_tree.flow import CompiledFlow
+from app.agents.decision_tree.loader import get_flow
+from app.config.logging import logger
+from app.config.settings import settings
+from app.core.metrics import (
+    HANDOFFS,
+    STATE_GET_LATENCY,
+    STATE_SAVE_LATENCY,
+    TURNS,
+    channel_label,
+)
+from app.core.state import (
+    StateConflictError,
+    close_state_store,
+    conversation_lock,
+    conversation_locks,
+    get_state,
+    get_states,
+    save_state,
+    save_states,
+    touch_state,
+)
+from app.core.tracing import current_trace, span, traced
 from app.core.transition import TransitionManager
+from app.persistence.models import ConversationState
 from app.schemas.response import AgentResponse, Reply
 
 
+class StepBudgetExceededError(RuntimeError):
+    """A turn processed more nodes than ``FLOW_MAX_STEPS_PER_TURN``."""
+
+
 class DecisionTreeEngine:
     """Engine that processes decision tree flows."""
 
-    def __init__(self):
-        self.transition_manager = TransitionManager()
+    def __init__(self, transition_manager: Optional[TransitionManager] = None):
+        self.transition_manager = transition_manager or TransitionManager()
+        # Event loop of run_sync, created on first use
+        self._runner: Optional[asyncio.Runner] = None
+
+    def close(self) -> None:
+        """Release engine resources on application shutdown.
+
+        Also closes the event loop of :meth:`run_sync`, with the state store
+        connections opened on it.
+        """
+        if self._runner is not None:
+            self._runner.run(close_state_store())
+            self._runner.close()
+            self._runner = None
+
+    def run_sync(self, request_data: Dict[str, Any]) -> AgentResponse:
+        """Synchronous wrapper around :meth:`run` for scripts and tests.
 
-    def run(self, request_data: Dict[str, Any]) -> AgentResponse:
-        """Process a decision tree flow based on the request data."""
+        Every call runs on the same event loop: the Redis connection pool of
+        the state store is bound to the loop that opened it. Call
+        :meth:`close` when done.
+        """
+        if self._runner is None:
+            self._runner = asyncio.Runner()
+        return self._runner.run(self.run(request_data))
+
+    @traced("engine")
+    async def run(self, request_data: Dict[str, Any]) -> AgentResponse:
+        """Process a decision tree flow based on the request data.
+
+        Turns of the same conversation are serialized in-process by a striped
+        lock; across workers the state is saved with compare-and-set, and the
+        turn is replayed on a fresh state if another worker won the race.
+
+        Raises:
+            StateConflictError: If the state kept changing underneath after
+                ``STATE_SAVE_MAX_RETRIES`` replays.
+            StepBudgetExceededError: If the turn never reached a node waiting
+                for input (the state is not saved).
+        """
         conversation_id = request_data["conversation_id"]
         flow_id = request_data["flow_id"]
-        user_input = request_data.get("user_input")
+        trace = current_trace()
+        if trace is not None:
+            trace.conversation_id = conversation_id
+
+        # Get the compiled flow (cached per process)
+        with span("flow_load"):
+            flow = get_flow(flow_id)
+
+        async with conversation_lock(conversation_id):
+            for attempt in range(settings.STATE_SAVE_MAX_RETRIES + 1):
+                # Get or create conversation state
+                started = time.perf_counter()
+                state = await get_state(conversation_id, flow_id)
+                STATE_GET_LATENCY.labels(flow_id).observe(time.perf_counter() - started)
+                all_messages, handoff = await self._advance(flow, state, request_data)
+
+                # Persistir una sola vez por turno: escritura completa solo si
+                # el estado cambió; si no, basta con renovar el TTL
+                started = time.perf_counter()
+                if not state.dirty:
+                    await touch_state(state)
+                    saved = True
+                else:
+                    saved = await save_state(state)
+                STATE_SAVE_LATENCY.labels(flow_id).observe(time.perf_counter() - started)
+                if not saved:
+                    logger.info(
+                        "state_version_conflict",
+                        conversation_id=conversation_id,
+                        attempt=attempt,
+                    )
+                    # Jitter para no volver a chocar con el otro worker
+                    await asyncio.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+                    continue
+
+                self._count_turn(request_data, handoff)
+                return AgentResponse(
+                    reply=Reply(type="text", content=all_messages), handoff=handoff
+                )
+
+        raise StateConflictError(
+            f"Conversation {conversation_id} changed concurrently; gave up after "
+            f"{settings.STATE_SAVE_MAX_RETRIES} retries"
+        )
+
+    @traced("engine")
+    async def run_batch(
+        self, requests: List[Dict[str, Any]]
+    ) -> List[Union[AgentResponse, Exception]]:
+        """Process several requests with one state read and one state write.
+
+        Requests are grouped by conversation; the turns of each conversation
+        run in input order on the same in-memory state. All states are read
+        together and written back together, and conversations that hit a
+        version conflict are replayed on a fresh state like in :meth:`run`.
+
+        Returns:
+            One item per request, in input order: the response, or the
+            exception that turn raised (``StateConflictError`` if the
+            conversation kept conflicting). A failed turn leaves the state as
+            it was, so later turns of the conversation still apply.
+        """
+        results: List[Union[AgentResponse, Exception, None]] = [None] * len(requests)
+        groups: Dict[str, List[int]] = {}
+        for index, request_data in enumerate(requests):
+            groups.setdefault(request_data["conversation_id"], []).append(index)
+
+        async with conversation_locks(groups):
+            pending = groups
+            for attempt in range(settings.STATE_SAVE_MAX_RETRIES + 1):
+                started = time.perf_counter()
+                states = await get_states(
+                    {cid: requests[indexes[0]]["flow_id"] for cid, indexes in pending.items()}
+                )
+                STATE_GET_LATENCY.labels("batch").observe(time.perf_counter() - started)
+                # Conversations run concurrently (their actions overlap), the
+                # turns of each one in order
+                outcomes = await asyncio.gather(
+                    *(
+                        self._run_turns(states[cid], [requests[i] for i in indexes])
+                        for cid, indexes in pending.items()
+                    )
+                )
+                # Conversaciones con al menos un turno aplicado; si todos
+                # fallaron no se persiste nada, igual que en run()
+                applied: Dict[str, None] = {}
+                for (conversation_id, indexes), (turn_results, state) in zip(
+                    pending.items(), outcomes
+                ):
+                    for index, result in zip(indexes, turn_results):
+                        results[index] = result
+                        if not isinstance(result, Exception):
+                            applied[conversation_id] = None
+                    states[conversation_id] = state
 
-        # Load the flow configuration
-        flow = load_flow(flow_id)
+                started = time.perf_counter()
+                saved = await save_states([states[cid] for cid in applied])
+                STATE_SAVE_LATENCY.labels("batch").observe(time.perf_counter() - started)
+                for cid, ok in zip(applied, saved):
+                    if ok:
+                        for index in pending[cid]:
+                            if isinstance(results[index], AgentResponse):
+                                self._count_turn(requests[index], results[index].handoff)
+                pending = {cid: pending[cid] for cid, ok in zip(applied, saved) if not ok}
+                if not pending:
+                    return results
+                logger.info(
+                    "state_version_conflict",
+                    conversations=len(pending),
+                    attempt=attempt,
+                    batch=True,
+                )
+                await asyncio.sleep(random.uniform(0, 0.005 * (attempt + 1)))
 
-        # Get or create conversation state
-        state = get_state(conversation_id, flow_id)
-        
-        # Debug: Log estado actual
-        print(f"DEBUG: Estado actual - conversation_id: {conversation_id}, current_node: {state.current_node}, context: {state.context}")
-        debug_state_store()
+        for conversation_id, indexes in pending.items():
+            error = StateConflictError(
+                f"Conversation {conversation_id} changed concurrently; gave up after "
+                f"{settings.STATE_SAVE_MAX_RETRIES} retries"
+            )
+            for index in indexes:
+                results[index] = error
+        return results
+
+    @staticmethod
+    def _count_turn(request_data: Dict[str, Any], handoff: bool) -> None:
+        """Count a persisted turn (and its handoff) by flow and channel."""
+        labels = (request_data["flow_id"], channel_label(request_data.get("channel", "")))
+        TURNS.labels(*labels).inc()
+        if handoff:
+            HANDOFFS.labels(*labels).inc()
+
+    async def _run_turns(
+        self, state: ConversationState, requests: List[Dict[str, Any]]
+    ) -> Tuple[List[Union[AgentResponse, Exception]], ConversationState]:
+        """Run the turns of one conversation of a batch, in order."""
+        results = []
+        with span("conversation", conversation_id=state.conversation_id):
+            for request_data in requests:
+                result, state = await self._run_turn(state, request_data)
+                results.append(result)
+        return results, state
+
+    async def _run_turn(
+        self, state: ConversationState, request_data: Dict[str, Any]
+    ) -> Tuple[Union[AgentResponse, Exception], ConversationState]:
+        """Run one turn of a batch; on error, return the state untouched."""
+        snapshot = state.copy()
+        try:
+            flow = get_flow(request_data["flow_id"])
+            all_messages, handoff = await self._advance(flow, state, request_data)
+        except Exception as e:
+            logger.exception("batch_turn_failed", conversation_id=state.conversation_id)
+            return e, snapshot
+        return AgentResponse(reply=Reply(type="text", content=all_messages), handoff=handoff), state
+
+    async def _advance(
+        self,
+        flow: CompiledFlow,
+        state: ConversationState,
+        request_data: Dict[str, Any],
+    ) -> Tuple[List[str], bool]:
+        """Run one turn on ``state`` in memory; returns (messages, handoff).
+
+        Raises:
+            StepBudgetExceededError: After ``FLOW_MAX_STEPS_PER_TURN`` nodes,
+                so a loop the validator could not see cannot pin the worker.
+        """
+        conversation_id = state.conversation_id
+        user_input = request_data.get("user_input")
 
         # Set initial node if not set
-        if state.current_node is None:
-            state.current_node = flow.get("start_node")
-            print(f"DEBUG: Estableciendo nodo inicial: {state.current_node}")
-        else:
-            print(f"DEBUG: Continuando desde nodo: {state.current_node}")
+        resumed = state.current_node is not None
+        if not resumed:
+            state.current_node = flow.start_node
+        # Only ids and sizes: the context holds user data
+        logger.debug(
+            "turn_started",
+            conversation_id=conversation_id,
+            flow_id=flow.flow_id,
+            node_id=state.current_node,
+            resumed=resumed,
+            context_size=len(state.context),
+        )
 
         # Update context with any provided context
         if request_data.get("context"):
@@ -42,8 +272,23 @@ class DecisionTreeEngine:
         handoff = False
 
         # Process nodes until we hit one that requires user input
+        steps = 0
         while state.current_node:
-            result = self.transition_manager.process_node(
+            steps += 1
+            if steps > settings.FLOW_MAX_STEPS_PER_TURN:
+                logger.error(
+                    "turn_step_budget_exceeded",
+                    conversation_id=conversation_id,
+                    flow_id=flow.flow_id,
+                    node_id=state.current_node,
+                    max_steps=settings.FLOW_MAX_STEPS_PER_TURN,
+                )
+                raise StepBudgetExceededError(
+                    f"Flow {flow.flow_id} processed more than "
+                    f"{settings.FLOW_MAX_STEPS_PER_TURN} nodes in one turn "
+                    f"(stopped at {state.current_node}); check it for loops"
+                )
+            result = await self.transition_manager.process_node(
                 state.current_node, flow, state.context, user_input
             )
 
@@ -51,27 +296,25 @@ class DecisionTreeEngine:
             if result.get("messages"):
                 all_messages.extend(result["messages"])
 
-            # Update current node
-            state.current_node = result.get("next_node")
-            
-            # Guardar estado después de cada nodo procesado
-            save_state(state)
-
-            # Check if we should continue processing
-            if not result.get("should_continue", False):
-                break
+            next_node = result.get("next_node")
 
             # Check if conversation should end
             if result.get("handoff", False):
                 handoff = True
+                state.current_node = next_node
+                break
+
+            # Check if we should continue processing; a node waiting for
+            # input without an explicit next node stays current
+            if not result.get("should_continue", False):
+                if next_node:
+                    state.current_node = next_node
                 break
 
+            # Update current node
+            state.current_node = next_node
+
             # Clear user input after first processing (only used for first node)
             user_input = None
 
-        # Guardar el estado después del procesamiento
-        save_state(state)
-
-        return AgentResponse(
-            reply=Reply(type="text", content=all_messages), handoff=handoff
-        )
+        return all_messages, handoff
@@ -0,0 +1,173 @@
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.session_index import decode_cursor, encode_cursor, is_after_cursor
+from app.persistence.models import ConversationState
+
+
+class MemoryStateStore:
+    """Almacenamiento de estado en memoria (fallback cuando Redis no está disponible).
+
+    Expone la misma API que ``AsyncRedisStateStore``, pero síncrona. Las
+    sesiones se mantienen ordenadas por última actividad, con contadores por
+    flujo y por nodo para que los conteos sean O(1). Se guardan copias versionadas de los estados,
+    de modo que ``save_state`` aplica el mismo compare-and-set que Redis.
+
+    Igual que en Redis, una sesión expira ``ttl_seconds`` después de su
+    última escritura o renovación. Como el TTL es el mismo para todas, el
+    orden por actividad es también el orden de expiración: cada operación
+    descarta las vencidas desde el principio (O(1) amortizado, sin recorrer
+    todo el almacenamiento). Al superar ``max_sessions`` se descartan las
+    menos recientes (LRU).
+
+    Args:
+        ttl_seconds: Tiempo de vida de las sesiones (0 = no expiran)
+        max_sessions: Máximo de sesiones guardadas (0 = sin límite)
+    """
+
+    def __init__(self, ttl_seconds: int = 3600, max_sessions: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        # Ordenado de menor a mayor última actividad
+        self._states: "OrderedDict[str, ConversationState]" = OrderedDict()
+        self._index: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._flow_counts: Counter = Counter()
+        self._node_counts: Counter = Counter()
+        self._last_activity = 0.0
+        # Sesiones descartadas por expiración y por el límite de capacidad
+        self.expired = 0
+        self.evicted = 0
+
+    def get_state(self, conversation_id: str, flow_id: str) -> ConversationState:
+        """Obtiene el estado de una conversación; si no existe, crea uno nuevo."""
+        self._expire()
+        stored = self._states.get(conversation_id)
+        if stored is None:
+            return ConversationState(conversation_id, flow_id)
+        return stored.copy()
+
+    def save_state(self, state: ConversationState) -> bool:
+        """Guarda el estado si nadie lo modificó desde que se leyó.
+
+        Returns:
+            False si ya hay guardada una versión más nueva (conflicto).
+        """
+        self._expire()
+        conversation_id = state.conversation_id
+        stored = self._states.get(conversation_id)
+        if (stored.version if stored else 0) != state.version:
+            return False
+
+        # Marcas estrictamente crecientes: el orden del índice no tiene empates
+        self._last_activity = max(time.time(), self._last_activity + 1e-6)
+        state.last_activity = self._last_activity
+        state.version += 1
+        state.indexed_node = state.current_node
+        state.mark_clean()
+
+        self._unindex(conversation_id)
+        self._states[conversation_id] = state.copy()
+        self._states.move_to_end(conversation_id)
+        self._index[conversation_id] = (state.flow_id, state.current_node)
+        self._flow_counts[state.flow_id] += 1
+        self._node_counts[(state.flow_id, state.current_node)] += 1
+
+        while self.max_sessions and len(self._states) > self.max_sessions:
+            self._evict_oldest()
+            self.evicted += 1
+        return True
+
+    def touch_state(self, state: ConversationState):
+        """Renueva la actividad de un estado sin cambios."""
+        self._expire()
+        self._last_activity = max(time.time(), self._last_activity + 1e-6)
+        state.last_activity = self._last_activity
+        stored = self._states.get(state.conversation_id)
+        if stored is not None:
+            stored.last_activity = state.last_activity
+            self._states.move_to_end(state.conversation_id)
+
+    def delete_state(self, conversation_id: str):
+        """Elimina el estado de una conversación."""
+        self._unindex(conversation_id)
+        self._states.pop(conversation_id, None)
+
+    def count_sessions(
+        self, flow_id: Optional[str] = None, node: Optional[str] = None
+    ) -> int:
+        """Cuenta las sesiones activas, opcionalmente por flujo y nodo."""
+        self._expire()
+        if node is not None:
+            return self._node_counts[(flow_id, node)]
+        if flow_id is not None:
+            return self._flow_counts[flow_id]
+        return len(self._states)
+
+    def list_sessions(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        flow_id: Optional[str] = None,
+        node: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Lista sesiones activas de la más reciente a la más antigua.
+
+        Returns:
+            La página de sesiones y el cursor de la siguiente página (o None).
+        """
+        position = decode_cursor(cursor)
+        self._expire()
+        page: List[Dict[str, Any]] = []
+
+        for state in reversed(self._states.values()):
+            if not is_after_cursor(state.last_activity, state.conversation_id, position):
+                continue
+            if flow_id is not None and state.flow_id != flow_id:
+                continue
+            if node is not None and state.current_node != node:
+                continue
+            if len(page) == limit:
+                last = page[-1]
+                return page, encode_cursor(last["last_activity"], last["conversation_id"])
+            page.append(_summary(state))
+
+        return page, None
+
+    def _expire(self):
+        """Descarta las sesiones vencidas (siempre están al principio)."""
+        if not self.ttl_seconds:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        while self._states:
+            oldest = next(iter(self._states.values()))
+            if oldest.last_activity > cutoff:
+                break
+            self._evict_oldest()
+            self.expired += 1
+
+    def _evict_oldest(self):
+        conversation_id, _ = self._states.popitem(last=False)
+        self._unindex(conversation_id)
+
+    def _unindex(self, conversation_id: str):
+        previous = self._index.pop(conversation_id, None)
+        if previous is None:
+            return
+        flow_id, node = previous
+        self._flow_counts[flow_id] -= 1
+        if self._flow_counts[flow_id] <= 0:
+            del self._flow_counts[flow_id]
+        self._node_counts[previous] -= 1
+        if self._node_counts[previous] <= 0:
+            del self._node_counts[previous]
+
+
+def _summary(state: ConversationState) -> Dict[str, Any]:
+    return {
+        "conversation_id": state.conversation_id,
+        "flow_id": state.flow_id,
+        "current_node": state.current_node,
+        "context": state.context,
+        "last_activity": state.last_activity,
+    }
@@ -0,0 +1,279 @@
+"""In-process metrics registry exposed in the Prometheus text format.
+
+Counters, gauges and fixed-bucket histograms, labelled, cheap enough to
+leave on: recording is a dict lookup plus a bisect over the bucket bounds,
+with no locks (metrics are recorded from the event loop thread). Each
+worker process has its own registry; Prometheus scrapes and sums them.
+
+``GET /metrics`` renders :data:`registry`. Label values must come from
+bounded sets: a series is never freed, so values sent by clients go through
+a mapping such as :func:`channel_label` first.
+"""
+
+import math
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from app.config.settings import settings
+
+# Seconds: sub-millisecond steps for in-memory work up to multi-second turns
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+_KNOWN_CHANNELS = frozenset(settings.METRICS_CHANNELS)
+
+
+def channel_label(channel: str) -> str:
+    """The ``channel`` label for a client-sent channel (``METRICS_CHANNELS`` or "other")."""
+    channel = (channel or "").lower()
+    return channel if channel in _KNOWN_CHANNELS else "other"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """The series for these label values (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_text(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonic count (``<name>_total``)."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled series."""
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{self._label_text(values)} {child.value:g}"]
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Gauge(_Metric):
+    """Current value that goes up and down."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        """Set the unlabelled series."""
+        self.labels().set(value)
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{self._label_text(values)} {child.value:g}"]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One count per bucket plus +Inf; made cumulative when rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the ``with`` block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed ``buckets``."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(b for b in buckets if not math.isinf(b)))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Observe into the unlabelled series."""
+        self.labels().observe(value)
+
+    def _render_child(self, values, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), child.counts):
+            cumulative += count
+            le = "+Inf" if math.isinf(bound) else f"{bound:g}"
+            bucket_labels = self._label_text(values, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(values)} {child.sum:.9g}")
+        lines.append(f"{self.name}_count{self._label_text(values)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics of this process, in registration order."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency per stage of a turn
+WEBHOOK_LATENCY = registry.histogram(
+    "webhook_latency_seconds", "Time to answer a webhook, end to end.", ("flow_id", "channel")
+)
+WEBHOOK_BATCH_LATENCY = registry.histogram(
+    "webhook_batch_latency_seconds", "Time to answer a batch of webhooks."
+)
+FLOW_LOAD_LATENCY = registry.histogram(
+    "flow_load_seconds", "Time to get a compiled flow (cache check or reload).", ("flow_id",)
+)
+STATE_GET_LATENCY = registry.histogram(
+    "state_get_seconds", "Time to read conversation states (flow_id=batch for batches).", ("flow_id",)
+)
+STATE_SAVE_LATENCY = registry.histogram(
+    "state_save_seconds", "Time to save or touch conversation states (flow_id=batch for batches).", ("flow_id",)
+)
+NODE_EXECUTE_LATENCY = registry.histogram(
+    "node_execute_seconds", "Time to execute a node (macro_step: a precomputed chain).", ("flow_id", "node_type")
+)
+RENDER_LATENCY = registry.histogram(
+    "render_seconds", "Time to render the messages of a node.", ("flow_id",)
+)
+
+# Counters
+TURNS = registry.counter("turns_total", "Turns processed.", ("flow_id", "channel"))
+HANDOFFS = registry.counter("handoffs_total", "Turns that handed the conversation off.", ("flow_id", "channel"))
+INVALID_SELECTIONS = registry.counter(
+    "invalid_selections_total", "Inputs that matched no option of a menu-like node.", ("flow_id", "node_type")
+)
+STATE_STORE_ERRORS = registry.counter(
+    "state_store_errors_total", "State store operations that failed and were degraded.", ("operation",)
+)
+
+# State store circuit breaker and degraded mode
+STATE_BREAKER_STATE = registry.gauge(
+    "state_breaker_state", "Circuit breaker of the state store: 0 closed, 1 half-open, 2 open."
+)
+STATE_BREAKER_TRANSITIONS = registry.counter(
+    "state_breaker_transitions_total", "State store circuit breaker transitions, by new state.", ("state",)
+)
+STATE_DEGRADED_READS = registry.counter(
+    "state_degraded_reads_total",
+    "States served without Redis, by source (pending, last_known, new).",
+    ("source",),
+)
+STATE_PENDING_WRITES = registry.gauge(
+    "state_pending_writes", "Conversations saved while Redis was unavailable, waiting for replay."
+)
+STATE_REPLAYED_WRITES = registry.counter(
+    "state_replayed_writes_total",
+    "Pending writes replayed to Redis, by result (saved, deleted, conflict, dropped).",
+    ("result",),
+)
@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.persistence.models import ConversationState
+
+
+class NearCache:
+    """Caché LRU en proceso de los estados leídos o guardados recientemente.
+
+    Va delante de Redis: con ruteo pegajoso el mismo worker suele atender el
+    turno anterior de una conversación, así que el estado que acaba de
+    guardar sigue siendo el vigente. Cada entrada expira a los
+    ``ttl_seconds`` y, al superar ``max_entries``, se descarta la usada hace
+    más tiempo. Se guardan y devuelven copias, porque el engine muta el
+    estado que recibe.
+
+    La caché no decide si una entrada sigue vigente frente a otros workers:
+    eso lo hace ``app.core.state`` validando la versión o escuchando las
+    invalidaciones publicadas en Redis. Servir una entrada desactualizada no
+    pierde datos (el compare-and-set del guardado la rechaza y el turno se
+    repite sin caché), solo cuesta un reintento.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # conversation_id -> (expira en, estado); de menos a más reciente
+        self._entries: "OrderedDict[str, Tuple[float, ConversationState]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, conversation_id: str) -> Optional[ConversationState]:
+        """Devuelve la entrada vigente (sin copiarla ni contar hit/miss)."""
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return None
+        expires_at, state = entry
+        if expires_at <= time.monotonic():
+            del self._entries[conversation_id]
+            self.expirations += 1
+            return None
+        return state
+
+    def get(self, conversation_id: str) -> Optional[ConversationState]:
+        """Devuelve una copia del estado cacheado, o None (miss)."""
+        state = self.peek(conversation_id)
+        if state is None:
+            self.misses += 1
+            return None
+        self.hit(conversation_id)
+        return state.copy()
+
+    def hit(self, conversation_id: str) -> None:
+        """Registra un acierto y marca la entrada como usada recientemente."""
+        self.hits += 1
+        self._entries.move_to_end(conversation_id)
+
+    def miss(self) -> None:
+        self.misses += 1
+
+    def put(self, state: ConversationState) -> None:
+        """Cachea una copia de un estado persistido (versión > 0)."""
+        if self.max_entries <= 0 or not state.version:
+            return
+        conversation_id = state.conversation_id
+        self._entries[conversation_id] = (time.monotonic() + self.ttl_seconds, state.copy())
+        self._entries.move_to_end(conversation_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, conversation_id: str) -> None:
+        """Descarta la entrada de una conversación (si existe)."""
+        if self._entries.pop(conversation_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Descarta todas las entradas (p. ej. al perder las invalidaciones)."""
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para dimensionar la caché."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -1,41 +1,86 @@
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional, Union
 from app.agents.decision_tree.agent import DecisionTreeAgent
+from app.schemas.response import AgentResponse
 from app.schemas.webhook_request import WebhookRequest
 from app.schemas.webhook_response import WebhookResponse
-from app.core.config import settings
+from app.config.settings import settings
+from app.core.metrics import WEBHOOK_BATCH_LATENCY, WEBHOOK_LATENCY, channel_label
+from app.core.tracing import span
 
 
 class Orchestrator:
     """Main orchestrator that handles incoming requests and delegates to appropriate agents."""
     
-    def __init__(self):
-        self.decision_tree_agent = DecisionTreeAgent()
+    def __init__(self, decision_tree_agent: Optional[DecisionTreeAgent] = None):
+        self.decision_tree_agent = decision_tree_agent or DecisionTreeAgent()
     
-    def handle_webhook(self, webhook: WebhookRequest) -> WebhookResponse:
+    def close(self) -> None:
+        """Release resources held by the agents on application shutdown."""
+        self.decision_tree_agent.close()
+    
+    async def handle_webhook(self, webhook: WebhookRequest) -> WebhookResponse:
         """
         Handle an incoming webhook request.
         Genera conversation_id a partir de channel + from.
         """
+        started = time.perf_counter()
+        request_data = self._request_data(webhook)
+        
+        # Process with decision tree agent
+        with span("orchestrator"):
+            agent_response = await self.decision_tree_agent.process(request_data)
+        
+        response = self._webhook_response(webhook, request_data, agent_response)
+        WEBHOOK_LATENCY.labels(request_data["flow_id"], channel_label(webhook.channel)).observe(
+            time.perf_counter() - started
+        )
+        return response
+    
+    async def handle_webhook_batch(
+        self, webhooks: List[WebhookRequest]
+    ) -> List[Union[WebhookResponse, Exception]]:
+        """
+        Handle several webhooks at once, in input order.
+        Los turnos de una misma conversación se aplican en el orden recibido.
+        """
+        started = time.perf_counter()
+        requests = [self._request_data(webhook) for webhook in webhooks]
+        with span("orchestrator"):
+            results = await self.decision_tree_agent.process_batch(requests)
+        responses = [
+            result if isinstance(result, Exception)
+            else self._webhook_response(webhook, request_data, result)
+            for webhook, request_data, result in zip(webhooks, requests, results)
+        ]
+        WEBHOOK_BATCH_LATENCY.observe(time.perf_counter() - started)
+        return responses
+    
+    def _request_data(self, webhook: WebhookRequest) -> Dict[str, Any]:
         # Generar conversation_id único a partir de channel + from
         conversation_id = f"{webhook.channel}:{webhook.from_}"
         
         # Determinar flow_id (por ahora usamos uno por defecto, pero podría venir de config o metadata)
-        flow_id = settings.default_flow_id  # Usar configuración centralizada
+        flow_id = settings.DEFAULT_FLOW_ID  # Usar configuración centralizada
         
-        # Extraer user_input del mensaje
-        user_input = webhook.message.content if webhook.message.type == "text" else None
+        # Extraer user_input del mensaje (las ubicaciones llegan como "lat, long")
+        user_input = webhook.message.content if webhook.message.type in ("text", "location") else None
         
         # Convert request to dict format expected by the agent
-        request_data = {
+        return {
             "conversation_id": conversation_id,
             "flow_id": flow_id,
+            "channel": webhook.channel,
             "user_input": user_input,
             "context": {}  # El contexto se maneja internamente
         }
-        
-        # Process with decision tree agent
-        agent_response = self.decision_tree_agent.process(request_data)
-        
+    
+    def _webhook_response(
+        self,
+        webhook: WebhookRequest,
+        request_data: Dict[str, Any],
+        agent_response: AgentResponse,
+    ) -> WebhookResponse:
         # Convertir la respuesta del agente al formato webhook
         return WebhookResponse(
             reply={
@@ -44,8 +89,8 @@ class Orchestrator:
             },
             handoff=agent_response.handoff,
             metadata={
-                "flow_id": flow_id,
+                "flow_id": request_data["flow_id"],
                 "channel": webhook.channel,
                 "from": webhook.from_
             }
-        )
\ No newline at end of file
+        )
@@ -1,95 +1,499 @@
-import json
-import redis
-from typing import Optional
+import time
+import uuid
+import redis.asyncio as aioredis
+from typing import Any, Dict, List, Optional, Tuple
+from app.config.logging import logger
+from app.core.codecs import StateRecord, StateSerializer
+from app.core.metrics import STATE_STORE_ERRORS
+from app.core.session_index import decode_cursor, encode_cursor, is_after_cursor
 from app.persistence.models import ConversationState
 
+# Índices secundarios: sorted sets de conversation_id por última actividad
+ACTIVE_INDEX_KEY = "conversations:active"
 
-class RedisStateStore:
-    """Almacenamiento de estado usando Redis para persistencia y escalabilidad."""
+# Canal pub/sub donde cada worker avisa qué conversaciones guardó o borró
+# ("<origen>:<conversation_id>"), para invalidar las near-caches de los demás
+INVALIDATION_CHANNEL = "conversations:invalidate"
+
+# Compare-and-set del estado + actualización de índices en un solo viaje.
+# El valor se guarda como "<versión>:<payload codificado>"; si la versión guardada no es
+# la esperada (otro worker escribió antes) no se escribe nada y devuelve -1.
+# KEYS: estado, índice global, índice del flujo, nodo anterior, nodo actual
+# ARGV: versión esperada, payload, ttl, ahora, conversation_id, corte de
+#       expiración, quitar del nodo anterior (0/1), indexar nodo actual (0/1),
+#       canal de invalidación ('' = no publicar), origen
+SAVE_STATE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+local version = 0
+if current then
+    version = tonumber(string.match(current, '^(%d+):')) or 0
+end
+if version ~= tonumber(ARGV[1]) then
+    return -1
+end
+version = version + 1
+redis.call('SET', KEYS[1], version .. ':' .. ARGV[2], 'EX', ARGV[3])
+local now, member, cutoff = ARGV[4], ARGV[5], ARGV[6]
+redis.call('ZADD', KEYS[2], now, member)
+redis.call('ZADD', KEYS[3], now, member)
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', cutoff)
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', cutoff)
+if ARGV[7] == '1' then
+    redis.call('ZREM', KEYS[4], member)
+end
+if ARGV[8] == '1' then
+    redis.call('ZADD', KEYS[5], now, member)
+    redis.call('ZREMRANGEBYSCORE', KEYS[5], '-inf', cutoff)
+end
+if ARGV[9] ~= '' then
+    redis.call('PUBLISH', ARGV[9], ARGV[10] .. ':' .. member)
+end
+return version
+"""
+
+# Lectura condicionada a la versión para validar la near-cache en un solo
+# viaje: nil si no existe, 1 si la versión guardada es ARGV[1], si no el valor.
+GET_IF_CHANGED_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return false
+end
+local version = tonumber(string.match(current, '^(%d+):')) or 0
+if version == tonumber(ARGV[1]) then
+    return 1
+end
+return current
+"""
+
+
+def split_version(data: bytes) -> Tuple[int, bytes]:
+    """Separa la versión del payload de un valor guardado ("<versión>:<payload>").
+
+    Los valores anteriores al versionado (JSON sin prefijo) tienen versión 0.
+    """
+    if data[:1].isdigit():
+        version, _, payload = data.partition(b":")
+        return int(version), payload
+    return 0, data
+
+
+def _decode_entries(entries: List[Tuple[bytes, float]]) -> List[Tuple[str, float]]:
+    return [(member.decode("utf-8"), score) for member, score in entries]
+
+
+def _store_failed(operation: str, error: Exception) -> None:
+    """Registra una operación degradada por un fallo de Redis (log y métrica)."""
+    STATE_STORE_ERRORS.labels(operation).inc()
+    logger.warning(f"redis_{operation}_failed", error=str(error))
+
+
+class _RedisStateBase:
+    """Claves, serialización e índices del store de Redis."""
+
+    ttl_seconds: int
+    serializer: StateSerializer
+    # Origen con el que se publican las invalidaciones (None = no publicar)
+    invalidation_origin: Optional[str] = None
+
+    def _get_key(self, conversation_id: str) -> str:
+        """Genera la clave Redis para una conversación."""
+        return f"conversation:{conversation_id}"
+
+    def _index_key(self, flow_id: Optional[str] = None, node: Optional[str] = None) -> str:
+        """Clave del índice de sesiones activas (global, por flujo o por nodo)."""
+        if node is not None:
+            return f"{ACTIVE_INDEX_KEY}:node:{flow_id}:{node}"
+        if flow_id is not None:
+            return f"{ACTIVE_INDEX_KEY}:flow:{flow_id}"
+        return ACTIVE_INDEX_KEY
+
+    def _decode_record(self, data: bytes) -> StateRecord:
+        return self.serializer.decode(split_version(data)[1])
+
+    def _decode_state(self, data: bytes, conversation_id: str, flow_id: str) -> ConversationState:
+        """Deserializa el estado guardado en Redis."""
+        version, payload = split_version(data)
+        record = self.serializer.decode(payload)
+        state = ConversationState(conversation_id, flow_id)
+        state.current_node = record.current_node
+        state.context = record.context
+        state.indexed_node = state.current_node
+        state.version = version
+        state.mark_clean()
+        return state
+
+    def _save_call(self, state: ConversationState, now: float) -> Tuple[List[str], List[Any]]:
+        """Arma KEYS y ARGV de ``SAVE_STATE_SCRIPT`` para guardar ``state``."""
+        payload = self.serializer.encode(
+            StateRecord(state.flow_id, state.current_node, state.context)
+        )
+        old_node = state.indexed_node if state.indexed_node != state.current_node else None
+        keys = [
+            self._get_key(state.conversation_id),
+            ACTIVE_INDEX_KEY,
+            self._index_key(state.flow_id),
+            self._index_key(state.flow_id, old_node or ""),
+            self._index_key(state.flow_id, state.current_node or ""),
+        ]
+        args = [
+            state.version,
+            payload,
+            self.ttl_seconds,
+            repr(now),
+            state.conversation_id,
+            repr(now - self.ttl_seconds),
+            "1" if old_node else "0",
+            "1" if state.current_node else "0",
+            INVALIDATION_CHANNEL if self.invalidation_origin else "",
+            self.invalidation_origin or "",
+        ]
+        return keys, args
+
+    def _apply_save(self, state: ConversationState, result: int, now: float) -> bool:
+        """Actualiza ``state`` según el resultado del script; False si hubo conflicto."""
+        if result < 0:
+            return False
+        state.version = result
+        state.last_activity = now
+        state.indexed_node = state.current_node
+        state.mark_clean()
+        return True
+
+    def _queue_touch(self, pipe: Any, state: ConversationState, now: float) -> None:
+        """Encola solo la renovación del TTL y de la actividad, sin reescribir el estado."""
+        member = {state.conversation_id: now}
+        pipe.expire(self._get_key(state.conversation_id), self.ttl_seconds)
+        pipe.zadd(ACTIVE_INDEX_KEY, member)
+        pipe.zadd(self._index_key(state.flow_id), member)
+        if state.current_node:
+            pipe.zadd(self._index_key(state.flow_id, state.current_node), member)
+
+    def _queue_delete(self, pipe: Any, conversation_id: str, data: Optional[bytes]) -> None:
+        """Encola el borrado del estado y de sus entradas en los índices."""
+        pipe.delete(self._get_key(conversation_id))
+        pipe.zrem(ACTIVE_INDEX_KEY, conversation_id)
+        if self.invalidation_origin:
+            pipe.publish(INVALIDATION_CHANNEL, f"{self.invalidation_origin}:{conversation_id}")
+        if data:
+            record = self._decode_record(data)
+            pipe.zrem(self._index_key(record.flow_id), conversation_id)
+            if record.current_node:
+                pipe.zrem(
+                    self._index_key(record.flow_id, record.current_node),
+                    conversation_id,
+                )
+
+    def _page_bounds(self, cursor: Optional[str]) -> Tuple[Optional[Tuple[float, str]], Any]:
+        """Decodifica el cursor y devuelve el límite superior (exclusivo) del rango."""
+        position = decode_cursor(cursor)
+        if position is None:
+            return None, "+inf"
+        return position, f"({position[0]!r}"
+
+    def _build_page(
+        self,
+        entries: List[Tuple[str, float]],
+        values: List[Optional[bytes]],
+        has_more: bool,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Combina las entradas del índice con los estados leídos vía MGET."""
+        page = []
+        for (member, member_score), data in zip(entries, values):
+            if not data:
+                continue  # Expiró antes de purgarse del índice
+            record = self._decode_record(data)
+            page.append(
+                {
+                    "conversation_id": member,
+                    "flow_id": record.flow_id,
+                    "current_node": record.current_node,
+                    "context": record.context,
+                    "last_activity": member_score,
+                }
+            )
+
+        last_member, last_score = entries[-1]
+        next_cursor = encode_cursor(last_score, last_member) if has_more else None
+        return page, next_cursor
+
+
+class AsyncRedisStateStore(_RedisStateBase):
+    """Almacenamiento de estado en Redis con ``redis.asyncio``.
+
+    Todas las operaciones comparten un pool de conexiones acotado: cuando se
+    agotan las conexiones, las corrutinas esperan (hasta ``pool_timeout``) en
+    lugar de abrir conexiones nuevas. redis-py usa el parser hiredis
+    automáticamente cuando está instalado.
+
+    A diferencia del store síncrono, los fallos de Redis se propagan
+    (``redis.RedisError``): ``app.core.state`` los cuenta en su circuit
+    breaker y decide el modo degradado. Los valores corruptos sí se manejan
+    aquí (se registran y la conversación empieza de nuevo).
+    """
 
     def __init__(
-        self, redis_url: str = "redis://localhost:6379/0", ttl_seconds: int = 3600
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        ttl_seconds: int = 3600,
+        max_connections: int = 100,
+        pool_timeout: float = 5.0,
+        socket_timeout: Optional[float] = 5.0,
+        connect_timeout: Optional[float] = 2.0,
+        serializer: Optional[StateSerializer] = None,
     ):
         """
-        Inicializa el almacenamiento Redis.
+        Inicializa el almacenamiento Redis asíncrono (sin conectarse aún).
 
         Args:
             redis_url: URL de conexión a Redis
-            ttl_seconds: Tiempo de vida de las conversaciones en segundos (default: 1 hora)
+            ttl_seconds: Tiempo de vida de las conversaciones en segundos
+            max_connections: Tamaño máximo del pool compartido
+            pool_timeout: Segundos de espera por una conexión libre del pool
+            socket_timeout: Timeout de lectura/escritura por comando
+            connect_timeout: Timeout para establecer una conexión
+            serializer: Codificación de los estados
         """
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+        self.pool = aioredis.BlockingConnectionPool.from_url(
+            redis_url,
+            max_connections=max_connections,
+            timeout=pool_timeout,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=connect_timeout,
+        )
+        self.redis_client = aioredis.Redis(connection_pool=self.pool)
         self.ttl_seconds = ttl_seconds
-        self._test_connection()
+        self.serializer = serializer or StateSerializer()
+        self._save_script = self.redis_client.register_script(SAVE_STATE_SCRIPT)
+        self._get_if_changed_script = self.redis_client.register_script(GET_IF_CHANGED_SCRIPT)
 
-    def _test_connection(self):
-        """Prueba la conexión a Redis."""
-        try:
-            self.redis_client.ping()
-        except redis.ConnectionError as e:
-            logger.info("using_memory_store")
-            raise
+    async def connect(self):
+        """Verifica la conexión a Redis (lanza ``redis.RedisError`` si falla)."""
+        await self.redis_client.ping()
 
-    def _get_key(self, conversation_id: str) -> str:
-        """Genera la clave Redis para una conversación."""
-        return f"conversation:{conversation_id}"
+    async def close(self):
+        """Cierra el cliente y desconecta el pool."""
+        await self.redis_client.aclose()
+        await self.pool.disconnect()
 
-    def get_state(self, conversation_id: str, flow_id: str) -> ConversationState:
+    async def get_state(self, conversation_id: str, flow_id: str) -> ConversationState:
         """
         Obtiene el estado de una conversación desde Redis.
         Si no existe, crea uno nuevo.
+
+        Raises:
+            redis.RedisError: Si falla la lectura.
         """
-        key = self._get_key(conversation_id)
+        data = await self.redis_client.get(self._get_key(conversation_id))
+        if data:
+            try:
+                return self._decode_state(data, conversation_id, flow_id)
+            except ValueError as e:
+                _store_failed("read", e)
 
-        try:
-            data = self.redis_client.get(key)
+        # Si no existe o está corrupto, crear nuevo estado
+        return ConversationState(conversation_id, flow_id)
+
+    async def get_states(self, flows: Dict[str, str]) -> Dict[str, ConversationState]:
+        """Obtiene varios estados con un solo ``MGET``.
+
+        Args:
+            flows: flow_id de cada conversation_id (para los estados nuevos)
+
+        Raises:
+            redis.RedisError: Si falla la lectura.
+        """
+        conversation_ids = list(flows)
+        values = await self.redis_client.mget(
+            [self._get_key(conversation_id) for conversation_id in conversation_ids]
+        )
+
+        states = {}
+        for conversation_id, data in zip(conversation_ids, values):
+            state = None
             if data:
-                # Deserializar el estado
-                state_data = json.loads(data)
-                state = ConversationState(conversation_id, flow_id)
-                state.current_node = state_data.get("current_node")
-                state.context = state_data.get("context", {})
-                return state
-        except (json.JSONDecodeError, redis.RedisError) as e:
-            print(f"⚠️  Error leyendo de Redis: {e}")
-
-        # Si no existe o hay error, crear nuevo estado
+                try:
+                    state = self._decode_state(data, conversation_id, flows[conversation_id])
+                except ValueError as e:
+                    _store_failed("read", e)
+            states[conversation_id] = state or ConversationState(
+                conversation_id, flows[conversation_id]
+            )
+        return states
+
+    async def get_state_if_changed(
+        self, conversation_id: str, flow_id: str, version: int
+    ) -> Optional[ConversationState]:
+        """Lee el estado solo si su versión ya no es ``version``.
+
+        Returns:
+            None si la versión guardada sigue siendo ``version``; si no, el
+            estado actual (o uno nuevo si ya no existe).
+
+        Raises:
+            redis.RedisError: Si falla la lectura (quien llama decide el fallback).
+        """
+        key = self._get_key(conversation_id)
+        data = await self._get_if_changed_script(keys=[key], args=[version])
+        if data == 1:
+            return None
+        if data:
+            try:
+                return self._decode_state(data, conversation_id, flow_id)
+            except ValueError as e:
+                _store_failed("read", e)
         return ConversationState(conversation_id, flow_id)
 
-    def save_state(self, state: ConversationState):
-        """Guarda el estado en Redis con TTL."""
-        key = self._get_key(state.conversation_id)
+    async def subscribe_invalidations(self) -> aioredis.client.PubSub:
+        """Suscribe al canal de invalidaciones (ocupa una conexión del pool).
 
+        Activa además la publicación de los guardados y borrados propios.
+        """
+        if self.invalidation_origin is None:
+            self.invalidation_origin = uuid.uuid4().hex
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(INVALIDATION_CHANNEL)
+        return pubsub
+
+    def parse_invalidation(self, message: Dict[str, Any]) -> Optional[str]:
+        """conversation_id invalidado por otro worker, o None si el aviso es propio."""
+        if message.get("type") != "message":
+            return None
+        origin, _, conversation_id = message["data"].decode("utf-8").partition(":")
+        if origin == self.invalidation_origin:
+            return None
+        return conversation_id
+
+    async def save_state(self, state: ConversationState) -> bool:
+        """Guarda el estado con TTL si nadie lo modificó desde que se leyó.
+
+        Returns:
+            False si otro proceso guardó una versión más nueva (conflicto).
+
+        Raises:
+            redis.RedisError: Si falla la escritura.
+        """
+        now = time.time()
+        keys, args = self._save_call(state, now)
+        result = await self._save_script(keys=keys, args=args)
+        return self._apply_save(state, result, now)
+
+    async def save_states(self, states: List[ConversationState]) -> List[bool]:
+        """Persiste varios estados en un solo pipeline.
+
+        Los estados modificados se guardan con compare-and-set y a los demás
+        solo se les renueva el TTL, igual que en ``save_state`` y
+        ``touch_state``.
+
+        Returns:
+            Por cada estado, False si hubo conflicto de versión.
+
+        Raises:
+            redis.RedisError: Si falla el pipeline (parte de él pudo aplicarse).
+        """
+        now = time.time()
+        pipe = self.redis_client.pipeline(transaction=False)
+        # Posición en el pipeline de la respuesta del script (None = touch)
+        positions: List[Optional[int]] = []
+        for state in states:
+            if state.dirty:
+                positions.append(len(pipe))
+                keys, args = self._save_call(state, now)
+                await self._save_script(keys=keys, args=args, client=pipe)
+            else:
+                positions.append(None)
+                self._queue_touch(pipe, state, now)
+        results = await pipe.execute()
+
+        saved = []
+        for state, position in zip(states, positions):
+            if position is None:
+                state.last_activity = now
+                saved.append(True)
+            else:
+                saved.append(self._apply_save(state, results[position], now))
+        return saved
+
+    async def touch_state(self, state: ConversationState):
+        """Renueva el TTL de un estado sin cambios (sin reenviar el JSON).
+
+        Raises:
+            redis.RedisError: Si falla la escritura.
+        """
+        now = time.time()
+        pipe = self.redis_client.pipeline(transaction=False)
+        self._queue_touch(pipe, state, now)
+        await pipe.execute()
+        state.last_activity = now
+
+    async def delete_state(self, conversation_id: str):
+        """Elimina el estado de una conversación y sus entradas en los índices.
+
+        Raises:
+            redis.RedisError: Si falla el borrado.
+        """
+        data = await self.redis_client.get(self._get_key(conversation_id))
+        pipe = self.redis_client.pipeline(transaction=False)
         try:
-            data = {
-                "conversation_id": state.conversation_id,
-                "flow_id": state.flow_id,
-                "current_node": state.current_node,
-                "context": state.context,
-            }
-
-            # Guardar con TTL
-            self.redis_client.setex(key, self.ttl_seconds, json.dumps(data))
-        except redis.RedisError as e:
-            print(f"⚠️  Error guardando en Redis: {e}")
-
-    def delete_state(self, conversation_id: str):
-        """Elimina el estado de una conversación."""
-        try:
-            key = self._get_key(conversation_id)
-            self.redis_client.delete(key)
-        except redis.RedisError as e:
-            print(f"⚠️  Error eliminando de Redis: {e}")
+            self._queue_delete(pipe, conversation_id, data)
+        except ValueError as e:
+            # Valor corrupto: se borra igual, sin limpiar sus índices de flujo y nodo
+            _store_failed("delete", e)
+        await pipe.execute()
+
+    async def count_sessions(
+        self, flow_id: Optional[str] = None, node: Optional[str] = None
+    ) -> int:
+        """Cuenta las sesiones activas en O(log n) usando el índice.
+
+        Raises:
+            redis.RedisError: Si falla la lectura.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        return await self.redis_client.zcount(self._index_key(flow_id, node), cutoff, "+inf")
+
+    async def list_sessions(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        flow_id: Optional[str] = None,
+        node: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Lista sesiones activas de la más reciente a la más antigua (O(log n + limit)).
+
+        Returns:
+            La página de sesiones y el cursor de la siguiente página (o None).
+
+        Raises:
+            redis.RedisError: Si falla la lectura.
+        """
+        index_key = self._index_key(flow_id, node)
+        cutoff = time.time() - self.ttl_seconds
+        position, upper = self._page_bounds(cursor)
 
-    def get_all_conversations(self) -> list:
-        """Obtiene todas las conversaciones activas (para debug/admin)."""
         try:
-            keys = self.redis_client.keys("conversation:*")
-            conversations = []
-            for key in keys:
-                data = self.redis_client.get(key)
-                if data:
-                    conversations.append(json.loads(data))
-            return conversations
-        except redis.RedisError as e:
-            print(f"⚠️  Error obteniendo conversaciones: {e}")
-            return []
+            entries: List[Tuple[str, float]] = []
+            if position is not None:
+                # Empates con la marca del cursor (muy raros): filtrar por id
+                score = position[0]
+                ties = _decode_entries(
+                    await self.redis_client.zrevrangebyscore(index_key, score, score, withscores=True)
+                )
+                entries.extend(e for e in ties if is_after_cursor(e[1], e[0], position))
+            if len(entries) <= limit:
+                entries.extend(
+                    _decode_entries(
+                        await self.redis_client.zrevrangebyscore(
+                            index_key, upper, cutoff, start=0, num=limit + 1 - len(entries), withscores=True
+                        )
+                    )
+                )
+            has_more = len(entries) > limit
+            entries = entries[:limit]
+            if not entries:
+                return [], None
+
+            values = await self.redis_client.mget([self._get_key(member) for member, _ in entries])
+            return self._build_page(entries, values, has_more)
+        except ValueError as e:
+            _store_failed("list_sessions", e)
+            return [], None
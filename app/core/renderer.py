@@ -1,25 +1,89 @@
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 import re
 
+# Template variables: {variable} or {{variable}} (flows ported from the
+# prototype ChatBotEngine)
+VARIABLE_PATTERN = re.compile(r'\{\{\s*([^{}]+?)\s*\}\}|\{([^}]+)\}')
+
+
+class MessageTemplate(str):
+    """A message parsed once into literal/variable segments.
+
+    It is still the original string, so nodes can hand it around like any
+    other message; the renderer uses the precomputed ``segments`` instead of
+    scanning the text on every turn. Messages without variables are
+    ``static`` and are returned as-is.
+    """
+
+    segments: Tuple[Tuple[str, Optional[str], str], ...]
+    variables: FrozenSet[str]
+
+    def __new__(cls, text: str) -> "MessageTemplate":
+        template = super().__new__(cls, text)
+        segments = []
+        position = 0
+        for match in VARIABLE_PATTERN.finditer(text):
+            name = match.group(1) or match.group(2)
+            segments.append((text[position:match.start()], name, match.group(0)))
+            position = match.end()
+        if position < len(text) or not segments:
+            segments.append((text[position:], None, ""))
+        template.segments = tuple(segments)
+        template.variables = frozenset(name for _, name, _ in segments if name is not None)
+        return template
+
+    @property
+    def static(self) -> bool:
+        return not self.variables
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """Substitute context values; unknown variables are left untouched."""
+        if not self.variables:
+            return self
+        parts = []
+        for literal, name, placeholder in self.segments:
+            parts.append(literal)
+            if name is not None:
+                parts.append(str(context[name]) if name in context else placeholder)
+        return "".join(parts)
+
+
+@lru_cache(maxsize=1024)
+def _compile_cached(text: str) -> MessageTemplate:
+    return MessageTemplate(text)
+
+
+def compile_template(text: str) -> MessageTemplate:
+    """Return ``text`` as a :class:`MessageTemplate` (parsed at most once)."""
+    if isinstance(text, MessageTemplate):
+        return text
+    return _compile_cached(text)
+
+
+def literal(text: str) -> MessageTemplate:
+    """Return ``text`` as a static template, rendered as-is even with braces.
+
+    For messages that embed data from outside the flow (service rows, user
+    input) after their own variables were rendered.
+    """
+    template = str.__new__(MessageTemplate, text)
+    template.segments = ((text, None, ""),)
+    template.variables = frozenset()
+    return template
+
 
 class MessageRenderer:
     """Handles message rendering and formatting."""
-    
+
     def render_messages(self, messages: List[str], context: Dict[str, Any]) -> List[str]:
         """Render messages with context variables."""
-        rendered_messages = []
-        
-        for message in messages:
-            rendered_message = self._render_template(message, context)
-            rendered_messages.append(rendered_message)
-        
-        return rendered_messages
-    
+        return [self._render_template(message, context) for message in messages]
+
     def _render_template(self, template: str, context: Dict[str, Any]) -> str:
-        """Render a single template with context variables."""
-        # Simple template rendering - replace {variable} with context values
-        def replace_var(match):
-            var_name = match.group(1)
-            return str(context.get(var_name, match.group(0)))
-        
-        return re.sub(r'\{([^}]+)\}', replace_var, template)
\ No newline at end of file
+        """Render a single template with context variables.
+
+        Flow messages arrive precompiled; messages built in code are parsed
+        on first use and cached.
+        """
+        return compile_template(template).render(context)
@@ -0,0 +1,36 @@
+"""Helpers shared by the state stores to index and paginate active sessions.
+
+Sessions are ordered newest first by ``(last_activity, conversation_id)``.
+A cursor encodes the position of the last item of a page, so pagination
+stays stable while other sessions keep being updated.
+"""
+
+from typing import Optional, Tuple
+
+
+def encode_cursor(score: float, conversation_id: str) -> str:
+    """Build an opaque cursor pointing at a session in the index."""
+    return f"{score!r}:{conversation_id}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+    """Parse a cursor created by :func:`encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    if not cursor:
+        return None
+    score, sep, conversation_id = cursor.partition(":")
+    if not sep:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return float(score), conversation_id
+
+
+def is_after_cursor(
+    score: float, conversation_id: str, cursor: Optional[Tuple[float, str]]
+) -> bool:
+    """Whether a session comes after ``cursor`` in newest-first order."""
+    if cursor is None:
+        return True
+    return (score, conversation_id) < cursor
@@ -1,6 +1,24 @@
-import os
-from typing import Optional
-from app.core.redis_state import RedisStateStore
+import asyncio
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager, nullcontext, suppress
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import redis
+from redis.utils import HIREDIS_AVAILABLE
+from app.core import circuit_breaker
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.codecs import StateSerializer, get_codec
+from app.core.memory_state import MemoryStateStore
+from app.core.metrics import (
+    STATE_BREAKER_STATE,
+    STATE_BREAKER_TRANSITIONS,
+    STATE_DEGRADED_READS,
+    STATE_PENDING_WRITES,
+    STATE_REPLAYED_WRITES,
+    STATE_STORE_ERRORS,
+)
+from app.core.near_cache import NearCache
+from app.core.redis_state import AsyncRedisStateStore
+from app.core.tracing import traced
 from app.config.settings import settings
 from app.persistence.models import ConversationState
 from app.config.logging import logger
@@ -9,60 +27,608 @@ from app.config.logging import logger
 REDIS_URL = settings.REDIS_URL
 REDIS_TTL_SECONDS = settings.REDIS_TTL_SECONDS
 
-# Intentar usar Redis, fallback a memoria si no está disponible
+# Redis (USE_REDIS) o memoria. La conexión se abre en init_state_store()
+# (lifespan de la app) o, en scripts, de forma perezosa en la primera
+# operación; si Redis no responde, el circuit breaker pasa a modo degradado.
 _use_redis = settings.USE_REDIS
-_redis_store: Optional[RedisStateStore] = None
+_redis_store: Optional[AsyncRedisStateStore] = None
+_initialized = False
+_init_lock = asyncio.Lock()
 
-if _use_redis:
+# Almacenamiento en memoria sin Redis (con el mismo TTL que Redis)
+_state_store = MemoryStateStore(REDIS_TTL_SECONDS, settings.MEMORY_STATE_MAX_SESSIONS)
+
+# Near-cache en proceso delante de Redis ("off", "validate" o "pubsub").
+# En "validate" cada lectura confirma la versión en Redis (un viaje corto,
+# sin transferir ni decodificar el estado); en "pubsub" no hay viaje: los
+# demás workers publican lo que guardan y la caché solo sirve entradas
+# mientras la suscripción está activa.
+NEAR_CACHE_MODES = ("off", "validate", "pubsub")
+_near_cache_mode = settings.STATE_NEAR_CACHE_MODE
+if _near_cache_mode not in NEAR_CACHE_MODES:
+    logger.warning("near_cache_mode_unknown", mode=_near_cache_mode, fallback="off")
+    _near_cache_mode = "off"
+_near_cache = NearCache(
+    settings.STATE_NEAR_CACHE_MAX_ENTRIES,
+    min(settings.STATE_NEAR_CACHE_TTL_SECONDS, REDIS_TTL_SECONDS),
+)
+_near_cache_live = False
+_invalidation_task: Optional[asyncio.Task] = None
+
+# Modo degradado, mientras Redis no responde (breaker abierto o fallo de la
+# operación): "local" sirve el último estado que este worker conoce de la
+# conversación y guarda los turnos en memoria para reescribirlos en Redis al
+# recuperarse; "reset" empieza la conversación de nuevo y descarta lo guardado
+DEGRADED_MODES = ("local", "reset")
+_degraded_mode = settings.STATE_DEGRADED_MODE
+if _degraded_mode not in DEGRADED_MODES:
+    logger.warning("state_degraded_mode_unknown", mode=_degraded_mode, fallback="local")
+    _degraded_mode = "local"
+# En "local" la near-cache guarda también la última copia conocida de cada
+# conversación guardada, que en modo degradado se sirve aunque la near-cache
+# esté en "off" o sin suscripción. Una copia desactualizada no pisa a Redis:
+# al reescribirla, el compare-and-set la rechaza
+_keep_last_known = _degraded_mode == "local"
+_cache_states = _near_cache_mode != "off" or _keep_last_known
+
+# Escrituras pendientes del modo "local": conversation_id -> estado guardado
+# sin Redis (con la versión de Redis de la que partió, para el compare-and-set
+# al reescribirlo) o None si se borró. LRU acotado por MEMORY_STATE_MAX_SESSIONS
+_pending: "OrderedDict[str, Optional[ConversationState]]" = OrderedDict()
+_replay_task: Optional[asyncio.Task] = None
+
+_BREAKER_GAUGE = {
+    circuit_breaker.CLOSED: 0,
+    circuit_breaker.HALF_OPEN: 1,
+    circuit_breaker.OPEN: 2,
+}
+
+
+def _on_breaker_change(old: str, new: str):
+    STATE_BREAKER_STATE.set(_BREAKER_GAUGE[new])
+    STATE_BREAKER_TRANSITIONS.labels(new).inc()
+    log = logger.warning if new == circuit_breaker.OPEN else logger.info
+    log("state_breaker_changed", old=old, new=new, pending_writes=len(_pending))
+    if new == circuit_breaker.CLOSED:
+        _start_replay()
+
+
+# Circuit breaker de Redis: con el breaker abierto las operaciones no esperan
+# el timeout de socket y van directo al modo degradado
+_breaker = CircuitBreaker(
+    "redis",
+    failure_rate=settings.STATE_BREAKER_FAILURE_RATE,
+    min_calls=settings.STATE_BREAKER_MIN_CALLS,
+    window_seconds=settings.STATE_BREAKER_WINDOW_SECONDS,
+    open_seconds=settings.STATE_BREAKER_OPEN_SECONDS,
+    on_state_change=_on_breaker_change,
+)
+STATE_BREAKER_STATE.set(0)
+STATE_PENDING_WRITES.set(0)
+
+# Locks por franjas: serializan los turnos de una misma conversación dentro
+# del proceso sin crear un lock por conversación
+_lock_stripes = [asyncio.Lock() for _ in range(max(settings.STATE_LOCK_STRIPES, 0))]
+
+
+class StateConflictError(Exception):
+    """El estado fue modificado por otro worker y se agotaron los reintentos."""
+
+
+def conversation_lock(conversation_id: str) -> AsyncContextManager:
+    """Lock (compartido por franja) que serializa los turnos de una conversación."""
+    if not _lock_stripes:
+        return nullcontext()
+    return _lock_stripes[hash(conversation_id) % len(_lock_stripes)]
+
+
+@asynccontextmanager
+async def conversation_locks(conversation_ids: Iterable[str]) -> AsyncIterator[None]:
+    """Toma los locks de varias conversaciones (para lotes).
+
+    Cada franja se toma una sola vez y siempre en el mismo orden, así dos
+    lotes concurrentes no se bloquean mutuamente.
+    """
+    async with AsyncExitStack() as stack:
+        if _lock_stripes:
+            stripes = {hash(cid) % len(_lock_stripes) for cid in conversation_ids}
+            for stripe in sorted(stripes):
+                await stack.enter_async_context(_lock_stripes[stripe])
+        yield
+
+
+async def init_state_store():
+    """Conecta el backend de estado (Redis asíncrono o memoria)."""
+    global _redis_store, _initialized, _invalidation_task
+    async with _init_lock:
+        if _initialized:
+            return
+        if _use_redis:
+            store = AsyncRedisStateStore(
+                REDIS_URL,
+                REDIS_TTL_SECONDS,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                pool_timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+                serializer=StateSerializer(
+                    get_codec(settings.STATE_CODEC),
+                    compress_threshold=settings.STATE_COMPRESSION_THRESHOLD_BYTES,
+                ),
+            )
+            try:
+                # El ping de arranque también queda acotado por el timeout de
+                # conexión: un Redis que acepta pero no responde no debe
+                # retrasar el arranque hasta el timeout de socket
+                await asyncio.wait_for(store.connect(), settings.REDIS_CONNECT_TIMEOUT_SECONDS)
+                logger.info(
+                    "redis_connected",
+                    url=REDIS_URL,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    hiredis=HIREDIS_AVAILABLE,
+                    codec=store.serializer.codec.name,
+                    near_cache=_near_cache_mode,
+                )
+            except Exception as e:
+                # Se conserva el cliente con el breaker abierto: las
+                # operaciones van al modo degradado hasta que una prueba
+                # encuentre Redis disponible
+                _breaker.trip()
+                logger.warning("redis_connection_failed", url=REDIS_URL, error=str(e) or repr(e))
+            _redis_store = store
+        if _redis_store and _near_cache_mode == "pubsub":
+            _invalidation_task = asyncio.create_task(_listen_invalidations(_redis_store))
+        _initialized = True
+
+
+async def _listen_invalidations(store: AsyncRedisStateStore):
+    """Aplica a la near-cache las invalidaciones publicadas por otros workers.
+
+    Si la suscripción se cae, la caché deja de servir entradas y se vacía al
+    volver a suscribirse, porque podrían haberse perdido avisos.
+    """
+    global _near_cache_live
+    while True:
+        pubsub = None
+        try:
+            pubsub = await store.subscribe_invalidations()
+            # Las entradas guardadas sin suscripción pudieron perder avisos
+            _near_cache.clear()
+            _near_cache_live = True
+            async for message in pubsub.listen():
+                conversation_id = store.parse_invalidation(message)
+                if conversation_id is not None:
+                    _near_cache.invalidate(conversation_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("near_cache_invalidations_lost", error=str(e))
+        finally:
+            # Sin suscripción la caché deja de servirse, pero sus entradas
+            # siguen como últimas copias conocidas para el modo degradado
+            _near_cache_live = False
+            if pubsub is not None:
+                await pubsub.aclose()
+        await asyncio.sleep(1)
+
+
+async def close_state_store():
+    """Cierra el pool de conexiones de Redis."""
+    global _redis_store, _initialized, _invalidation_task, _replay_task
+    if _replay_task:
+        _replay_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await _replay_task
+        _replay_task = None
+    if _pending:
+        logger.warning("state_pending_writes_lost", pending_writes=len(_pending))
+    if _invalidation_task:
+        _invalidation_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await _invalidation_task
+        _invalidation_task = None
+    if _redis_store:
+        await _redis_store.close()
+    _redis_store = None
+    _initialized = False
+
+
+def _backend_failed(operation: str, error: Exception):
+    """Registra un fallo de Redis (breaker, métrica y log)."""
+    _breaker.record_failure()
+    STATE_STORE_ERRORS.labels(operation).inc()
+    logger.warning(f"redis_{operation}_failed", error=str(error) or repr(error))
+
+
+def _set_pending(conversation_id: str, state: Optional[ConversationState]):
+    _pending[conversation_id] = state
+    _pending.move_to_end(conversation_id)
+    max_pending = settings.MEMORY_STATE_MAX_SESSIONS
+    if max_pending and len(_pending) > max_pending:
+        _pending.popitem(last=False)
+        STATE_REPLAYED_WRITES.labels("dropped").inc()
+    STATE_PENDING_WRITES.set(len(_pending))
+
+
+def _degraded_get(conversation_id: str, flow_id: str) -> ConversationState:
+    """Estado servido sin Redis: pendiente, última copia conocida o nuevo."""
+    if conversation_id in _pending:
+        pending = _pending[conversation_id]
+        if pending is not None:
+            STATE_DEGRADED_READS.labels("pending").inc()
+            state = pending.copy()
+            state.mark_clean()
+            return state
+    elif _degraded_mode == "local":
+        cached = _near_cache.peek(conversation_id)
+        if cached is not None:
+            STATE_DEGRADED_READS.labels("last_known").inc()
+            return cached.copy()
+    STATE_DEGRADED_READS.labels("new").inc()
+    return ConversationState(conversation_id, flow_id)
+
+
+def _degraded_save(state: ConversationState) -> bool:
+    """Guardado sin Redis: en "local" queda pendiente de reescribir."""
+    if _degraded_mode == "local":
+        pending = state.copy()
+        pending.mark_clean()
+        _set_pending(state.conversation_id, pending)
+    state.mark_clean()
+    return True
+
+
+def _degraded_touch(state: ConversationState) -> bool:
+    if state.conversation_id in _pending:
+        _pending.move_to_end(state.conversation_id)
+    return True
+
+
+async def _replay(conversation_id: str) -> bool:
+    """Reescribe en Redis lo guardado sin Redis de una conversación.
+
+    El compare-and-set usa la versión de Redis de la que partió el turno: si
+    otro worker la modificó mientras tanto, gana Redis y lo local se descarta.
+
+    Returns:
+        False si Redis sigue sin responder (queda pendiente).
+    """
+    if conversation_id not in _pending:
+        # Otro replay la reescribió, o el límite la descartó, mientras se
+        # esperaba a Redis por otra conversación
+        return True
+    if not _breaker.allow():
+        return False
+    pending = _pending[conversation_id]
+    state = None
     try:
-        _redis_store = RedisStateStore(REDIS_URL, REDIS_TTL_SECONDS)
-        logger.debug(f"redis_connected", url=REDIS_URL)
-    except Exception as e:
-        logger.debug(f"redis_connection_failed", url=REDIS_URL, error=str(e))
-        _redis_store = None
+        if pending is None:
+            await _redis_store.delete_state(conversation_id)
+            result = "deleted"
+        else:
+            state = pending.copy()
+            saved = await _redis_store.save_state(state)
+            if not saved and state.version:
+                # Sin la clave (Redis reiniciado sin persistencia, o expiró) el
+                # compare-and-set contra la versión 0 la vuelve a crear
+                state.version = 0
+                saved = await _redis_store.save_state(state)
+            result = "saved" if saved else "conflict"
+    except redis.RedisError as e:
+        _backend_failed("replay", e)
+        return False
+    _breaker.record_success()
+    _near_cache.invalidate(conversation_id)
+    STATE_REPLAYED_WRITES.labels(result).inc()
+    current = _pending.get(conversation_id, pending)
+    if current is pending:
+        _pending.pop(conversation_id, None)
+        STATE_PENDING_WRITES.set(len(_pending))
+    elif current is not None and state is not None and result == "saved":
+        # Otro turno la volvió a guardar mientras tanto: parte de lo reescrito
+        current.version = state.version
+    if result == "conflict":
+        logger.warning(
+            "state_replay_conflict", conversation_id=conversation_id, version=pending.version
+        )
+    return True
+
+
+def _start_replay():
+    """Reescribe en segundo plano las escrituras pendientes (breaker cerrado)."""
+    global _replay_task
+    if not _pending or _breaker.state != circuit_breaker.CLOSED:
+        return
+    if _replay_task is None or _replay_task.done():
+        _replay_task = asyncio.get_running_loop().create_task(_replay_pending())
 
-# Almacenamiento en memoria como fallback
-_state_store: dict[str, ConversationState] = {}
 
+async def _replay_pending():
+    replayed = 0
+    while _pending:
+        conversation_id = next(iter(_pending))
+        # El lock evita reescribir mientras un turno de la conversación corre
+        async with conversation_lock(conversation_id):
+            if conversation_id not in _pending:
+                continue
+            if not await _replay(conversation_id):
+                break
+        replayed += 1
+    logger.info("state_replay_finished", replayed=replayed, pending_writes=len(_pending))
 
-def get_state(conversation_id: str, flow_id: str) -> ConversationState:
+
+@traced("state_get")
+async def get_state(conversation_id: str, flow_id: str) -> ConversationState:
     """Obtiene el estado de una conversación."""
-    if _redis_store:
-        return _redis_store.get_state(conversation_id, flow_id)
-    else:
-        # Fallback a memoria
-        if conversation_id not in _state_store:
-            state = ConversationState(conversation_id, flow_id)
-            _state_store[conversation_id] = state
-        return _state_store[conversation_id]
+    if not _initialized:
+        await init_state_store()
+    if _redis_store is None:
+        return _state_store.get_state(conversation_id, flow_id)
+    if _pending:
+        # Lo guardado sin Redis se reescribe antes de volver a leer de Redis
+        if conversation_id in _pending and not await _replay(conversation_id):
+            return _degraded_get(conversation_id, flow_id)
+        _start_replay()
+    if _breaker.allow():
+        try:
+            state = await _get_from_redis(conversation_id, flow_id)
+        except redis.RedisError as e:
+            _backend_failed("read", e)
+        else:
+            _breaker.record_success()
+            return state
+    return _degraded_get(conversation_id, flow_id)
 
 
-def save_state(state: ConversationState):
-    """Guarda el estado de una conversación."""
-    if _redis_store:
-        _redis_store.save_state(state)
+async def _get_from_redis(conversation_id: str, flow_id: str) -> ConversationState:
+    if _near_cache_mode == "validate":
+        return await _get_validated(conversation_id, flow_id)
+    if _near_cache_mode == "pubsub" and _near_cache_live:
+        cached = _near_cache.get(conversation_id)
+        if cached is not None:
+            return cached
+        state = await _redis_store.get_state(conversation_id, flow_id)
+        _cache_put(state)
+        return state
+    return await _redis_store.get_state(conversation_id, flow_id)
+
+
+async def _get_validated(conversation_id: str, flow_id: str) -> ConversationState:
+    """Lectura con near-cache validando la versión cacheada contra Redis."""
+    cached = _near_cache.peek(conversation_id)
+    if cached is None:
+        _near_cache.miss()
+        state = await _redis_store.get_state(conversation_id, flow_id)
     else:
-        # Fallback a memoria
-        _state_store[state.conversation_id] = state
+        try:
+            state = await _redis_store.get_state_if_changed(
+                conversation_id, flow_id, cached.version
+            )
+        except redis.RedisError as e:
+            # El breaker cuenta solo la lectura de respaldo: si también falla,
+            # get_state registra un único fallo para esta petición
+            STATE_STORE_ERRORS.labels("near_cache_validate").inc()
+            logger.warning("near_cache_validation_failed", error=str(e))
+            state = await _redis_store.get_state(conversation_id, flow_id)
+        if state is None:
+            _near_cache.hit(conversation_id)
+            return cached.copy()
+        _near_cache.invalidate(conversation_id)
+        _near_cache.miss()
+    _cache_put(state)
+    return state
+
+
+def _cache_put(state: ConversationState):
+    # En "pubsub" sin suscripción activa solo sirve como última copia conocida
+    if _near_cache_mode == "validate" or _near_cache_live or _keep_last_known:
+        _near_cache.put(state)
+
+
+def near_cache_stats() -> Dict[str, Any]:
+    """Contadores de la near-cache (hits, misses, evicciones...)."""
+    return {"mode": _near_cache_mode, "live": _near_cache_live, **_near_cache.stats()}
+
+
+def state_store_health() -> Dict[str, Any]:
+    """Backend de estado, breaker y escrituras pendientes (salud y administración)."""
+    return {
+        "backend": "redis" if _use_redis else "memory",
+        "degraded_mode": _degraded_mode,
+        "pending_writes": len(_pending),
+        "breaker": _breaker.stats(),
+    }
+
+
+@traced("state_save")
+async def save_state(state: ConversationState) -> bool:
+    """Guarda el estado de una conversación (compare-and-set por versión).
+
+    Returns:
+        False si otro worker guardó una versión más nueva desde la lectura.
+    """
+    if not _initialized:
+        await init_state_store()
+    if _redis_store is None:
+        return _state_store.save_state(state)
+    if _breaker.allow():
+        try:
+            saved = await _redis_store.save_state(state)
+        except redis.RedisError as e:
+            _backend_failed("save", e)
+            # Pudo aplicarse o no: la entrada cacheada ya no es confiable
+            _near_cache.invalidate(state.conversation_id)
+        else:
+            _breaker.record_success()
+            if not _cache_states:
+                return saved
+            if saved and not state.dirty:
+                _cache_put(state)
+            else:
+                # Conflicto: la entrada quedó vieja
+                _near_cache.invalidate(state.conversation_id)
+            return saved
+    return _degraded_save(state)
 
 
-def delete_state(conversation_id: str):
+@traced("state_get")
+async def get_states(flows: Dict[str, str]) -> Dict[str, ConversationState]:
+    """Obtiene los estados de varias conversaciones (un solo viaje a Redis).
+
+    Args:
+        flows: flow_id de cada conversation_id (para los estados nuevos)
+    """
+    if not _initialized:
+        await init_state_store()
+    if _redis_store is None:
+        return {cid: _state_store.get_state(cid, flow_id) for cid, flow_id in flows.items()}
+    remote = flows
+    if _pending:
+        for conversation_id in [cid for cid in flows if cid in _pending]:
+            await _replay(conversation_id)
+        # Las que siguen pendientes se sirven desde memoria
+        remote = {cid: flow_id for cid, flow_id in flows.items() if cid not in _pending}
+        _start_replay()
+    states: Dict[str, ConversationState] = {}
+    if remote and _breaker.allow():
+        try:
+            states = await _redis_store.get_states(remote)
+        except redis.RedisError as e:
+            _backend_failed("read", e)
+        else:
+            _breaker.record_success()
+            if _near_cache_mode != "off":
+                for state in states.values():
+                    _cache_put(state)
+    if len(states) < len(flows):
+        for conversation_id, flow_id in flows.items():
+            if conversation_id not in states:
+                states[conversation_id] = _degraded_get(conversation_id, flow_id)
+    return states
+
+
+@traced("state_save")
+async def save_states(states: List[ConversationState]) -> List[bool]:
+    """Persiste varios estados en un solo viaje a Redis.
+
+    Los modificados se guardan con compare-and-set y a los demás solo se les
+    renueva el TTL.
+
+    Returns:
+        Por cada estado, False si otro worker guardó una versión más nueva.
+    """
+    if not _initialized:
+        await init_state_store()
+    if _redis_store is None:
+        saved = []
+        for state in states:
+            if state.dirty:
+                saved.append(_state_store.save_state(state))
+            else:
+                _state_store.touch_state(state)
+                saved.append(True)
+        return saved
+
+    if _breaker.allow():
+        try:
+            saved = await _redis_store.save_states(states)
+        except redis.RedisError as e:
+            _backend_failed("save", e)
+            for state in states:
+                _near_cache.invalidate(state.conversation_id)
+        else:
+            _breaker.record_success()
+            if _cache_states:
+                for state, ok in zip(states, saved):
+                    if ok and not state.dirty:
+                        _cache_put(state)
+                    else:
+                        _near_cache.invalidate(state.conversation_id)
+            return saved
+    return [_degraded_save(state) if state.dirty else _degraded_touch(state) for state in states]
+
+
+@traced("state_touch")
+async def touch_state(state: ConversationState):
+    """Renueva el TTL de una conversación cuyo estado no cambió."""
+    if not _initialized:
+        await init_state_store()
+    if _redis_store is None:
+        _state_store.touch_state(state)
+        return
+    if _breaker.allow():
+        try:
+            await _redis_store.touch_state(state)
+        except redis.RedisError as e:
+            _backend_failed("touch", e)
+        else:
+            _breaker.record_success()
+            return
+    _degraded_touch(state)
+
+
+async def delete_state(conversation_id: str):
     """Elimina el estado de una conversación."""
-    if _redis_store:
-        _redis_store.delete_state(conversation_id)
-    else:
-        # Fallback a memoria
-        _state_store.pop(conversation_id, None)
+    if not _initialized:
+        await init_state_store()
+    if _redis_store is None:
+        _state_store.delete_state(conversation_id)
+        return
+    _near_cache.invalidate(conversation_id)
+    if _breaker.allow():
+        try:
+            await _redis_store.delete_state(conversation_id)
+        except redis.RedisError as e:
+            _backend_failed("delete", e)
+        else:
+            _breaker.record_success()
+            if _pending.pop(conversation_id, False) is not False:
+                STATE_PENDING_WRITES.set(len(_pending))
+            return
+    if _degraded_mode == "local":
+        _set_pending(conversation_id, None)
 
 
-def debug_state_store():
-    """Función de debug para ver el estado actual del almacenamiento."""
-    if _redis_store:
-        conversations = _redis_store.get_all_conversations()
-        logger.debug(f"DEBUG: Redis - {len(conversations)} conversaciones activas")
-        for conv in conversations:
-            logger.debug(f"  - {conv['conversation_id']}: current_node={conv.get('current_node')}, context={conv.get('context')}")
-    else:
-        logger.debug(f"DEBUG: Memoria - {len(_state_store)} conversaciones activas")
-        for conversation_id, state in _state_store.items():
-            logger.debug(f"  - {conversation_id}: current_node={state.current_node}, context={state.context}")
\ No newline at end of file
+async def count_sessions(flow_id: Optional[str] = None, node: Optional[str] = None) -> int:
+    """Cuenta las sesiones activas, opcionalmente filtradas por flujo y nodo.
+
+    Sin Redis (modo degradado) devuelve 0.
+    """
+    if not _initialized:
+        await init_state_store()
+    if _redis_store is None:
+        return _state_store.count_sessions(flow_id, node)
+    if _breaker.allow():
+        try:
+            count = await _redis_store.count_sessions(flow_id, node)
+        except redis.RedisError as e:
+            _backend_failed("count_sessions", e)
+        else:
+            _breaker.record_success()
+            return count
+    return 0
+
+
+async def list_sessions(
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    flow_id: Optional[str] = None,
+    node: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Lista sesiones activas (paginadas por cursor) para administración.
+
+    Sin Redis (modo degradado) devuelve una página vacía.
+    """
+    if not _initialized:
+        await init_state_store()
+    if _redis_store is None:
+        return _state_store.list_sessions(cursor, limit, flow_id, node)
+    if _breaker.allow():
+        try:
+            page = await _redis_store.list_sessions(cursor, limit, flow_id, node)
+        except redis.RedisError as e:
+            _backend_failed("list_sessions", e)
+        else:
+            _breaker.record_success()
+            return page
+    return [], None
@@ -0,0 +1,154 @@
+"""Per-request spans: where the time of one request went.
+
+A trace is started per request by :class:`app.api.middleware.ServerTimingMiddleware`;
+code on the request path opens nested spans with :func:`span`::
+
+    with span("state_get"):
+        state = await get_state(conversation_id, flow_id)
+
+Outside a trace (scripts, benchmarks, background tasks) :func:`span` returns
+a shared no-op, so instrumented code costs a context-variable read. Spans
+opened by concurrent tasks of the same request (``asyncio.gather``) are
+attached to the span that was current when the task was created.
+"""
+
+import functools
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+
+class Span:
+    """A timed section of a request, with its nested spans."""
+
+    __slots__ = ("name", "fields", "children", "started", "duration", "_token")
+
+    def __init__(self, name: str, fields: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.fields = fields
+        self.children: List["Span"] = []
+        self.started = 0.0
+        self.duration = 0.0
+        self._token = None
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.duration = time.perf_counter() - self.started
+        _current_span.reset(self._token)
+        self._token = None
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        """The span tree in milliseconds, offsets relative to ``origin``."""
+        data: Dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.fields:
+            data.update(self.fields)
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        return data
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _add_durations(parent: Span, totals: Dict[str, float]) -> None:
+    for child in parent.children:
+        totals[child.name] = totals.get(child.name, 0.0) + child.duration
+        _add_durations(child, totals)
+
+
+class Trace(Span):
+    """Root span of a request, plus what identifies the turn it ran."""
+
+    __slots__ = ("conversation_id", "node_path", "_trace_token")
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.conversation_id: Optional[str] = None
+        self.node_path: List[str] = []
+        self._trace_token = None
+
+    def __enter__(self) -> "Trace":
+        self._trace_token = _current_trace.set(self)
+        return super().__enter__()
+
+    def __exit__(self, *exc_info) -> None:
+        super().__exit__(*exc_info)
+        _current_trace.reset(self._trace_token)
+        self._trace_token = None
+
+    def totals(self) -> Dict[str, float]:
+        """Seconds per span name over the whole tree, in first-seen order."""
+        totals: Dict[str, float] = {}
+        _add_durations(self, totals)
+        return totals
+
+    def elapsed(self) -> float:
+        """Seconds since the trace started (its duration once finished)."""
+        if self._token is None:
+            return self.duration
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value: total and per span name, in ms."""
+        metrics = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.totals().items()]
+        metrics.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(metrics)
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        return super().to_dict(self.started if origin is None else origin)
+
+
+def span(name: str, **fields: Any):
+    """Context manager timing a section as a child of the current span.
+
+    ``fields`` are included in the slow-request record. A no-op outside a
+    trace.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP_SPAN
+    child = Span(name, fields or None)
+    parent.children.append(child)
+    return child
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace of the request being handled, if any."""
+    return _current_trace.get()
+
+
+def traced(name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorator running an async function inside ``span(name)``."""
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
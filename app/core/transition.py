@@ -1,38 +1,69 @@
+import time
 from typing import Dict, Any, Optional, List
-from app.agents.decision_tree.nodes.factory import create_node
+from app.agents.decision_tree.flow import CompiledFlow
+from app.core.metrics import INVALID_SELECTIONS, NODE_EXECUTE_LATENCY, RENDER_LATENCY
 from app.core.renderer import MessageRenderer
+from app.core.tracing import current_trace, span
 
 
 class TransitionManager:
     """Manages transitions between nodes in the decision tree."""
 
-    def __init__(self):
-        self.renderer = MessageRenderer()
+    def __init__(self, renderer: Optional[MessageRenderer] = None):
+        self.renderer = renderer or MessageRenderer()
 
-    def process_node(
+    async def process_node(
         self,
         node_id: str,
-        flow_data: Dict[str, Any],
+        flow: CompiledFlow,
         context: Dict[str, Any],
         user_input: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Process a single node and return the result."""
-        nodes = flow_data.get("nodes", {})
+        """Process a single node and return the result.
 
-        if node_id not in nodes:
-            raise ValueError(f"Node {node_id} not found in flow")
+        If ``node_id`` starts a precomputed macro-step, the whole run of
+        message nodes is resolved at once and ``next_node`` is the first
+        node after it.
+        """
+        trace = current_trace()
+        if trace is not None:
+            trace.node_path.append(node_id)
 
-        node_data = nodes[node_id]
-        node = create_node(node_id, node_data)
+        chain = flow.chains.get(node_id)
+        if chain is not None:
+            with span("node", node_id=node_id, node_type="macro_step"):
+                started = time.perf_counter()
+                messages = list(chain.messages)
+                if not chain.static:
+                    messages = self.renderer.render_messages(messages, context)
+                NODE_EXECUTE_LATENCY.labels(flow.flow_id, "macro_step").observe(
+                    time.perf_counter() - started
+                )
+            return {
+                "messages": messages,
+                "next_node": chain.next_node,
+                "should_continue": True,
+                "handoff": False,
+            }
+
+        node = flow.get_node(node_id)
 
         # Execute the node
-        result = node.execute(context, user_input)
+        with span("node", node_id=node_id, node_type=node.node_type):
+            started = time.perf_counter()
+            result = await node.run(context, user_input)
+            executed = time.perf_counter()
+        NODE_EXECUTE_LATENCY.labels(flow.flow_id, node.node_type).observe(executed - started)
+        if result.get("invalid_input"):
+            INVALID_SELECTIONS.labels(flow.flow_id, node.node_type).inc()
 
         # Render any messages
         if result.get("messages"):
-            result["messages"] = self.renderer.render_messages(
-                result["messages"], context
-            )
+            with span("render"):
+                result["messages"] = self.renderer.render_messages(
+                    result["messages"], context
+                )
+            RENDER_LATENCY.labels(flow.flow_id).observe(time.perf_counter() - executed)
 
         return result
 
@@ -1,24 +1,37 @@
 from contextlib import asynccontextmanager
 
+from app.api.middleware import ServerTimingMiddleware
 from app.api.v1.api import api_router
-from app.config.logging import logger
-from app.config.settings import settings
-from dotenv import load_dotenv
-from fastapi import FastAPI
-
-load_dotenv()
+from app.config.logging import logger, setup_logging
+from app.config.settings import ENV_FILE, settings
+from app.core.actions import close_action_executor
+from app.core.metrics import CONTENT_TYPE, registry
+from app.core.orchestrator import Orchestrator
+from app.core.state import close_state_store, init_state_store, state_store_health
+from fastapi import FastAPI, Response
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle application startup and shutdown events."""
+    setup_logging()
     logger.info(
         "application_startup",
         project_name=settings.PROJECT_NAME,
         version=settings.VERSION,
         api_prefix=settings.API_V1_STR,
+        environment=settings.ENVIRONMENT.value,
+        env_file=ENV_FILE,
     )
-    yield
-    logger.info("application_shutdown")
+    # Application-scoped singletons shared by every request
+    await init_state_store()
+    app.state.orchestrator = Orchestrator()
+    try:
+        yield
+    finally:
+        app.state.orchestrator.close()
+        close_action_executor()
+        await close_state_store()
+        logger.info("application_shutdown")
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -29,17 +42,33 @@ app = FastAPI(
 )
 
 
+app.add_middleware(
+    ServerTimingMiddleware,
+    path_prefixes=(f"{settings.API_V1_STR}/agent/process",),
+    slow_threshold_ms=settings.SLOW_REQUEST_THRESHOLD_MS,
+)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.get("/")
 async def root():
     logger.info("root_endpoint_called")
+    # Degraded while the state store breaker is not closed (still HTTP 200:
+    # the worker keeps serving conversations)
+    breaker_state = state_store_health()["breaker"]["state"]
     return {
         "name": settings.PROJECT_NAME,
         "version": settings.VERSION,
-        "status": "healthy",
+        "status": "healthy" if breaker_state == "closed" else "degraded",
+        "state_store": breaker_state,
         "environment": settings.ENVIRONMENT.value,
         "swagger_url": "/docs",
         "redoc_url": "/redoc",
     }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (metrics of this worker process)."""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
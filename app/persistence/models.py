@@ -1,6 +1,102 @@
+from typing import Any, Dict, Optional
+
+
+class TrackedContext(dict):
+    """Contexto de conversación que marca su estado como modificado al mutarse.
+
+    Solo se rastrean mutaciones de primer nivel (``context[k] = v``,
+    ``update``, ``pop``...); los valores anidados deben reasignarse.
+    """
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: "ConversationState", *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._owner = owner
+
+    def __setitem__(self, key, value):
+        if key not in self or self[key] != value:
+            self._owner._dirty = True
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._owner._dirty = True
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key in self:
+            self._owner._dirty = True
+        return super().pop(key, *default)
+
+    def popitem(self):
+        self._owner._dirty = True
+        return super().popitem()
+
+    def clear(self):
+        if self:
+            self._owner._dirty = True
+        super().clear()
+
+
 class ConversationState:
     def __init__(self, conversation_id: str, flow_id: str):
         self.conversation_id = conversation_id
         self.flow_id = flow_id
-        self.current_node = None
-        self.context = {}
\ No newline at end of file
+        self._current_node: Optional[str] = None
+        self._context = TrackedContext(self)
+        # Un estado nuevo aún no está persistido
+        self._dirty = True
+        # Versión persistida (0 = aún no existe en el almacenamiento); se usa
+        # para compare-and-set entre workers
+        self.version = 0
+        # Última actividad (epoch) y nodo bajo el que está indexada la sesión
+        self.last_activity: Optional[float] = None
+        self.indexed_node: Optional[str] = None
+
+    @property
+    def current_node(self) -> Optional[str]:
+        return self._current_node
+
+    @current_node.setter
+    def current_node(self, value: Optional[str]):
+        if value != self._current_node:
+            self._current_node = value
+            self._dirty = True
+
+    @property
+    def context(self) -> Dict[str, Any]:
+        return self._context
+
+    @context.setter
+    def context(self, value: Dict[str, Any]):
+        self._context = TrackedContext(self, value)
+        self._dirty = True
+
+    @property
+    def dirty(self) -> bool:
+        """Si ``current_node`` o ``context`` cambiaron desde la última persistencia."""
+        return self._dirty
+
+    def mark_clean(self):
+        """Marca el estado como sincronizado con el almacenamiento."""
+        self._dirty = False
+
+    def copy(self) -> "ConversationState":
+        """Copia el estado (con una copia superficial del contexto)."""
+        copy = ConversationState(self.conversation_id, self.flow_id)
+        copy._current_node = self._current_node
+        copy._context = TrackedContext(copy, self._context)
+        copy.version = self.version
+        copy.last_activity = self.last_activity
+        copy.indexed_node = self.indexed_node
+        copy._dirty = self._dirty
+        return copy
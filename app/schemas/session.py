@@ -0,0 +1,72 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class SessionSummary(BaseModel):
+    conversation_id: str
+    flow_id: Optional[str] = None
+    current_node: Optional[str] = None
+    # Datos del usuario (DNI, nombres...): solo con include_context=true
+    context: Optional[Dict[str, Any]] = None
+    last_activity: Optional[float] = Field(None, description="Última actividad (epoch)")
+
+
+class SessionPage(BaseModel):
+    """Página de sesiones activas, de la más reciente a la más antigua."""
+    items: List[SessionSummary]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la siguiente página")
+
+
+class SessionCount(BaseModel):
+    count: int
+    flow_id: Optional[str] = None
+    node: Optional[str] = None
+
+
+class StateCacheStats(BaseModel):
+    """Contadores de la near-cache de estados (por worker)."""
+    mode: str
+    live: bool = Field(..., description="Si recibe invalidaciones (modo pubsub)")
+    size: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    expirations: int
+    invalidations: int
+
+
+class BreakerStats(BaseModel):
+    """Circuit breaker del backend de estado."""
+    name: str
+    state: str = Field(..., description="closed, open o half_open")
+    window_calls: int = Field(..., description="Llamadas en la ventana actual")
+    window_failures: int
+    opened: int = Field(..., description="Veces que se abrió")
+    rejected: int = Field(..., description="Llamadas que fallaron rápido sin ir a Redis")
+    open_for_seconds: Optional[float] = None
+
+
+class StateStoreHealth(BaseModel):
+    """Salud del backend de estado (por worker)."""
+    backend: str
+    degraded_mode: str = Field(..., description="local o reset")
+    pending_writes: int = Field(..., description="Conversaciones guardadas sin Redis por reescribir")
+    breaker: BreakerStats
+
+
+class ActionLatency(BaseModel):
+    """Latencia de una acción de flujo (por worker; percentiles recientes)."""
+    action: str
+    calls: int
+    errors: int
+    timeouts: int
+    in_flight: int
+    avg_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    cache: Optional[Dict[str, Any]] = Field(None, description="Contadores de la caché de resultados")
@@ -30,4 +30,13 @@ class WebhookResponse(BaseModel):
                     "context": {}
                 }
             }
-        }
\ No newline at end of file
+        }
+
+
+class WebhookBatchItem(BaseModel):
+    """
+    Resultado de un mensaje dentro de /agent/process/batch
+    """
+    status: int = Field(200, description="Código HTTP equivalente al de /agent/process")
+    response: Optional[WebhookResponse] = Field(None, description="Respuesta si status es 200")
+    error: Optional[str] = Field(None, description="Detalle del error si status no es 200")
@@ -0,0 +1,152 @@
+"""Thundering herd against a dynamicService node, with and without the action cache.
+
+Starts a local stub HTTP service (slow, counts its requests) and runs many
+conversations at once through a flow whose dynamicService node lists the
+stub's services with ``service_get``. Each scenario reports the upstream
+requests it caused and the turn latency:
+
+- ``uncached``: the same action without cache (one request per user);
+- ``cold``: empty cache, every user arrives together (single-flight: 1);
+- ``warm``: within the TTL (0 requests);
+- ``stale``: TTL expired, within the stale window (users are served the
+  stale list at once, 1 background refresh);
+- ``down``: the stub answers 503 (1 request, then negative-cached).
+
+Exits with status 1 if a cached scenario makes more upstream requests than
+expected.
+
+Usage:
+    python -m benchmarks.bench_action_cache [--users 200] [--delay-ms 100]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="bench_action_cache_"))
+os.environ.setdefault("USE_REDIS", "false")
+# Short windows so the stale scenario does not wait a minute
+os.environ.setdefault("SERVICE_CACHE_TTL_SECONDS", "0.5")
+os.environ.setdefault("SERVICE_CACHE_STALE_SECONDS", "30")
+os.environ.setdefault("SERVICE_CACHE_NEGATIVE_TTL_SECONDS", "30")
+
+from app.actions.services import service_get  # noqa: E402
+from app.agents.decision_tree.flow import compile_flow  # noqa: E402
+from app.core.actions import ACTIONS, register_action  # noqa: E402
+from app.core.engine import DecisionTreeEngine  # noqa: E402
+from app.persistence.models import ConversationState  # noqa: E402
+
+SERVICES = [{"id": i, "nombre": f"Servicio {i}", "precio": f"${i}00"} for i in range(1, 6)]
+
+
+class StubService(BaseHTTPRequestHandler):
+    delay_seconds = 0.1
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubService.lock:
+            StubService.requests += 1
+        time.sleep(self.delay_seconds)
+        if self.path.startswith("/down"):
+            self.send_response(503)
+            self.end_headers()
+            return
+        body = json.dumps({"items": SERVICES}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def service_flow(endpoint: str, action: str) -> dict:
+    return {
+        "flow_id": f"services_{action}",
+        "start_node": "servicios",
+        "nodes": {
+            "servicios": {
+                "type": "dynamicService",
+                "content": "Estos son los servicios disponibles:",
+                "service": {"action": action, "endpoint": endpoint, "method": "GET"},
+                "next": "fin",
+            },
+            "fin": {"type": "end", "message": "Gracias"},
+        },
+    }
+
+
+async def herd(engine, flow, users: int, settle_seconds: float) -> tuple:
+    """Run ``users`` first turns at once; returns (upstream requests, p50, max)."""
+    async def one(user: int) -> float:
+        state = ConversationState(f"user{user}", flow.flow_id)
+        started = time.perf_counter()
+        await engine._advance(flow, state, {"conversation_id": state.conversation_id})
+        return (time.perf_counter() - started) * 1000
+
+    before = StubService.requests
+    latencies = await asyncio.gather(*(one(user) for user in range(users)))
+    # Background refreshes (stale scenario) reach the stub after the turns
+    await asyncio.sleep(settle_seconds)
+    return StubService.requests - before, statistics.median(latencies), max(latencies)
+
+
+async def run(args, base_url: str) -> int:
+    engine = DecisionTreeEngine()
+    # Same action without the cache (nor concurrency limit), for the baseline
+    register_action("service_get_uncached", max_concurrency=0)(service_get)
+    flows = {
+        action: compile_flow(f"services_{action}", service_flow(f"{base_url}/{path}", action))
+        for action, path in (("service_get_uncached", "services"), ("service_get", "services"))
+    }
+    down = compile_flow("services_down", service_flow(f"{base_url}/down", "service_get"))
+
+    scenarios = [
+        ("uncached", flows["service_get_uncached"], None),
+        ("cold", flows["service_get"], 1),
+        ("warm", flows["service_get"], 0),
+        ("stale", flows["service_get"], 1),
+        ("down", down, 1),
+        ("down again", down, 0),
+    ]
+    failed = False
+    print(f"{'scenario':12} {'users':>6} {'upstream':>9} {'p50 ms':>8} {'max ms':>8}")
+    for name, flow, expected in scenarios:
+        if name == "stale":
+            await asyncio.sleep(float(os.environ["SERVICE_CACHE_TTL_SECONDS"]) + 0.1)
+        upstream, p50, worst = await herd(engine, flow, args.users, args.delay_ms / 1000 * 2)
+        ok = expected is None or upstream <= expected
+        failed |= not ok
+        print(f"{name:12} {args.users:6d} {upstream:9d} {p50:8.2f} {worst:8.2f}{'' if ok else '  FAIL'}")
+    print(json.dumps(ACTIONS["service_get"].cache.stats()))
+    return 1 if failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    StubService.delay_seconds = args.delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubService)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        return asyncio.run(run(args, f"http://127.0.0.1:{server.server_port}"))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
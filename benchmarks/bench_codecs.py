@@ -0,0 +1,122 @@
+"""Compare state codecs: encode/decode cost and stored bytes per session.
+
+Builds synthetic contexts of several sizes and measures, for each codec and
+with/without zlib, the microseconds to encode and decode a state and the
+size of the value written to Redis. ``legacy`` is the previous format
+(``json.dumps`` of the whole state dict, conversation_id included).
+
+Usage:
+    python -m benchmarks.bench_codecs [--iterations 2000] [--threshold 1024]
+
+``orjson`` and ``msgpack`` are optional (``pip install .[fast]``); codecs
+that are not installed are skipped.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="bench_codecs_"))
+
+from app.core import codecs  # noqa: E402
+from app.core.codecs import JsonCodec, MsgpackCodec, StateRecord, StateSerializer  # noqa: E402
+
+
+class StdlibJsonCodec(JsonCodec):
+    """JSON codec forced onto the standard library, to compare with orjson."""
+
+    name = "stdlib-json"
+
+    def dumps(self, obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+def make_context(fields: int) -> dict:
+    context = {}
+    for i in range(fields):
+        if i % 3 == 0:
+            context[f"campo_{i}"] = f"valor de ejemplo número {i} con acentos áéíóú"
+        elif i % 3 == 1:
+            context[f"campo_{i}"] = i * 1000
+        else:
+            context[f"campo_{i}"] = {"opcion": str(i), "confirmado": i % 2 == 0}
+    return context
+
+
+def timeit(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def bench_legacy(record: StateRecord, iterations: int) -> dict:
+    state = {
+        "conversation_id": "5215512345678@s.whatsapp.net",
+        "flow_id": record.flow_id,
+        "current_node": record.current_node,
+        "context": record.context,
+    }
+    payload = json.dumps(state).encode("utf-8")
+    return {
+        "encode_us": timeit(lambda: json.dumps(state).encode("utf-8"), iterations),
+        "decode_us": timeit(lambda: json.loads(payload), iterations),
+        "bytes": len(payload),
+    }
+
+
+def bench_serializer(serializer: StateSerializer, record: StateRecord, iterations: int) -> dict:
+    payload = serializer.encode(record)
+    assert serializer.decode(payload) == record
+    return {
+        "encode_us": timeit(lambda: serializer.encode(record), iterations),
+        "decode_us": timeit(lambda: serializer.decode(payload), iterations),
+        "bytes": len(payload),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--threshold", type=int, default=1024)
+    args = parser.parse_args()
+
+    available = [StdlibJsonCodec()]
+    if codecs.orjson is not None:
+        available.append(JsonCodec())
+    try:
+        # msgpack is imported when the codec is created, not with app.core.codecs
+        available.append(MsgpackCodec())
+    except ImportError:
+        pass
+
+    sizes = {"small": 3, "medium": 30, "large": 300}
+    print(f"{'context':8} {'codec':16} {'zlib':5} {'encode µs':>10} {'decode µs':>10} {'bytes':>8}")
+    for size_name, fields in sizes.items():
+        record = StateRecord("citas_essalud", "confirmar_cita", make_context(fields))
+        rows = [("legacy", "-", bench_legacy(record, args.iterations))]
+        for codec in available:
+            label = "orjson" if codec.name == "json" else codec.name
+            rows.append((label, "no", bench_serializer(
+                StateSerializer(codec, compress_threshold=0), record, args.iterations
+            )))
+            rows.append((label, "yes", bench_serializer(
+                StateSerializer(codec, compress_threshold=args.threshold), record, args.iterations
+            )))
+        for label, zlib_flag, result in rows:
+            print(
+                f"{size_name:8} {label:16} {zlib_flag:5} {result['encode_us']:10.2f} "
+                f"{result['decode_us']:10.2f} {result['bytes']:8d}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""Micro-benchmarks of the engine internals, by flow size.
+
+Times the hot functions of a turn on synthetic flows of growing size (a
+menu hub with ``--menu-options`` options, each leading to a chain of message
+nodes back to the menu, ``--nodes`` nodes in total) and on the state
+codecs:
+
+- ``create_node``: a menu with every option of the flow, a message, an input;
+- ``load_flow``: reading the flow file; ``compile_flow``: building the graph;
+- ``render_messages``: static and templated messages;
+- ``process_node``: the hub menu with a valid (last) and an invalid choice;
+- ``engine_run``: one full turn (menu choice, chain back to the menu) with
+  the in-memory state store;
+- ``codec_encode`` / ``codec_decode``: a state of ``--context-fields`` fields.
+
+Methodology: each case is called once, calibrated so a sample lasts at
+least ``--min-sample-ms`` (which warms it up), then timed ``--repeat`` times
+with the garbage collector collected beforehand and disabled while timing.
+The report gives the minimum (the most repeatable estimate, used for
+comparisons), the median and the spread ((max - min) / min) in µs per call.
+
+``--json`` saves the report; ``--baseline`` compares with a saved one and
+exits with status 1 if a case's minimum grew by more than ``--tolerance``.
+
+Usage:
+    python -m benchmarks.bench_engine_micro [--nodes 10 100 1000 5000]
+        [--menu-options 5 50 500] [--repeat 7] [--min-sample-ms 50]
+        [--filter engine_run] [--json micro.json] [--baseline micro.json]
+        [--tolerance 0.1]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="bench_engine_micro_"))
+os.environ.setdefault("USE_REDIS", "false")
+
+from app.agents.decision_tree import loader  # noqa: E402
+from app.agents.decision_tree.flow import compile_flow  # noqa: E402
+from app.agents.decision_tree.nodes.factory import create_node  # noqa: E402
+from app.config.settings import settings  # noqa: E402
+from app.core.codecs import StateRecord, StateSerializer, get_codec  # noqa: E402
+from app.core.engine import DecisionTreeEngine  # noqa: E402
+from app.core.renderer import MessageRenderer, compile_template  # noqa: E402
+from app.core.transition import TransitionManager  # noqa: E402
+
+CONTEXT = {"nombre": "Ana", "dni": "12345678", "fecha": "2026-10-20", "sede": "Rebagliati"}
+
+
+def synthetic_flow(flow_id: str, nodes: int, menu_options: int) -> dict:
+    """Menu hub with ``menu_options`` options; each runs a message chain back to it."""
+    chain_length = max(1, (nodes - 3) // menu_options)
+    flow_nodes: Dict[str, Any] = {}
+    options = {}
+    lines = []
+    for option in range(1, menu_options + 1):
+        options[str(option)] = f"opcion_{option}_0"
+        lines.append(f"{option}. Opción número {option}")
+        for step in range(chain_length):
+            last = step + 1 == chain_length
+            flow_nodes[f"opcion_{option}_{step}"] = {
+                "type": "message",
+                "message": "Hola {nombre}, su cita en {sede}" if step % 2 else f"Paso {step}",
+                "next": "menu" if last else f"opcion_{option}_{step + 1}",
+            }
+    # Option 0 asks for the variables the chains render
+    options["0"] = "pedir_nombre"
+    flow_nodes["pedir_nombre"] = {
+        "type": "input", "message": "¿Su nombre?", "save_as": "nombre", "next": "pedir_sede"
+    }
+    flow_nodes["pedir_sede"] = {
+        "type": "input", "message": "¿Su sede?", "save_as": "sede", "next": "menu"
+    }
+    flow_nodes["menu"] = {
+        "type": "menu",
+        "message": "Seleccione una opción:\n0. Mis datos\n" + "\n".join(lines),
+        "options": options,
+    }
+    return {"flow_id": flow_id, "version": "1", "start_node": "menu", "nodes": flow_nodes}
+
+
+def measure(
+    call: Callable[[int], float], repeat: int, min_sample_seconds: float
+) -> Dict[str, Any]:
+    """Time ``call(number)`` (returns seconds for ``number`` calls); µs per call.
+
+    After one warmup call (caches, lazy initialization), ``number`` doubles
+    until one sample lasts ``min_sample_seconds``; the calibration samples
+    double as the warmup.
+    """
+    call(1)
+    number = 1
+    while call(number) < min_sample_seconds:
+        number *= 2
+
+    samples = []
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            samples.append(call(number) / number * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    best = min(samples)
+    return {
+        "min_us": round(best, 4),
+        "median_us": round(statistics.median(samples), 4),
+        "spread": round((max(samples) - best) / best, 4) if best else 0.0,
+        "number": number,
+    }
+
+
+def sync_case(fn: Callable[[], Any]) -> Callable[[int], float]:
+    def call(number: int) -> float:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - started
+
+    return call
+
+
+def async_case(loop: asyncio.AbstractEventLoop, fn: Callable[[], Any]) -> Callable[[int], float]:
+    """Time ``number`` awaits of ``fn()`` inside one running loop."""
+
+    async def batch(number: int) -> float:
+        started = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        return time.perf_counter() - started
+
+    return lambda number: loop.run_until_complete(batch(number))
+
+
+def cases(args, loop: asyncio.AbstractEventLoop, flows_dir: Path) -> Dict[str, Callable[[int], float]]:
+    """Every benchmark case by name (``function[parameters]``)."""
+    found: Dict[str, Callable[[int], float]] = {}
+    renderer = MessageRenderer()
+    transitions = TransitionManager()
+    engine = DecisionTreeEngine()
+
+    static = [compile_template(f"Paso {i}: texto fijo del flujo") for i in range(3)]
+    templated = [compile_template("Hola {nombre}, su DNI {dni}, cita el {fecha} en {sede}")] * 3
+    found["render_messages[static]"] = sync_case(lambda: renderer.render_messages(static, CONTEXT))
+    found["render_messages[templated]"] = sync_case(
+        lambda: renderer.render_messages(templated, CONTEXT)
+    )
+    found["create_node[message]"] = sync_case(
+        lambda: create_node("m", {"type": "message", "message": "Hola {nombre}", "next": "x"})
+    )
+    found["create_node[input]"] = sync_case(
+        lambda: create_node("i", {"type": "input", "message": "¿DNI?", "save_as": "dni", "next": "x"})
+    )
+
+    for nodes in args.nodes:
+        for menu_options in args.menu_options:
+            if menu_options >= nodes:
+                continue
+            params = f"nodes={nodes},options={menu_options}"
+            flow_id = f"micro_{nodes}_{menu_options}"
+            data = synthetic_flow(flow_id, nodes, menu_options)
+            (flows_dir / f"{flow_id}.json").write_text(json.dumps(data), encoding="utf-8")
+            flow = compile_flow(flow_id, data)
+            menu_data = data["nodes"]["menu"]
+            last = str(menu_options)
+
+            found[f"create_node[menu,options={menu_options}]"] = sync_case(
+                lambda menu_data=menu_data: create_node("menu", menu_data)
+            )
+            found[f"load_flow[{params}]"] = sync_case(lambda flow_id=flow_id: loader.load_flow(flow_id))
+            found[f"compile_flow[{params}]"] = sync_case(
+                lambda flow_id=flow_id, data=data: compile_flow(flow_id, data)
+            )
+            found[f"process_node[menu,valid,{params}]"] = async_case(
+                loop,
+                lambda flow=flow, last=last: transitions.process_node("menu", flow, dict(CONTEXT), last),
+            )
+            found[f"process_node[menu,invalid,{params}]"] = async_case(
+                loop,
+                lambda flow=flow: transitions.process_node("menu", flow, dict(CONTEXT), "no existe"),
+            )
+            request = {
+                "conversation_id": f"micro:{uuid.uuid4().hex[:8]}",
+                "flow_id": flow_id,
+                "user_input": last,
+                "context": {},
+            }
+            found[f"engine_run[{params}]"] = async_case(
+                loop, lambda request=request: engine.run(request)
+            )
+
+    codec = StateSerializer(get_codec(settings.STATE_CODEC), settings.STATE_COMPRESSION_THRESHOLD_BYTES)
+    context = {
+        f"campo_{i}": f"valor de ejemplo {i}" if i % 2 else {"opcion": i, "ok": True}
+        for i in range(args.context_fields)
+    }
+    record = StateRecord("citas_essalud", "menu_principal", context)
+    encoded = codec.encode(record)
+    params = f"{settings.STATE_CODEC},fields={args.context_fields}"
+    found[f"codec_encode[{params}]"] = sync_case(lambda: codec.encode(record))
+    found[f"codec_decode[{params}]"] = sync_case(lambda: codec.decode(encoded))
+    return found
+
+
+def compare(report: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """Print the change of every case against ``baseline``; returns regressions."""
+    regressions = []
+    print(f"\n{'case':55} {'baseline µs':>12} {'now µs':>10} {'change':>8}")
+    for name, result in report.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:55} {'-':>12} {result['min_us']:10.3f} {'new':>8}")
+            continue
+        change = result["min_us"] / previous["min_us"] - 1 if previous["min_us"] else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  SLOWER"
+            regressions.append(name)
+        elif change < -tolerance:
+            flag = "  faster"
+        print(f"{name:55} {previous['min_us']:12.3f} {result['min_us']:10.3f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--menu-options", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--context-fields", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-sample-ms", type=float, default=50)
+    parser.add_argument("--filter", help="Only cases whose name contains this text")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Previous --json report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    baseline: Optional[Dict[str, Dict[str, Any]]] = None
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["cases"]
+
+    loop = asyncio.new_event_loop()
+    report: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="bench_engine_micro_") as tmp:
+        loader.flows_path = Path(tmp)
+        all_cases = cases(args, loop, Path(tmp))
+        print(f"{'case':55} {'min µs':>10} {'median µs':>10} {'spread':>7} {'calls':>8}")
+        for name, call in all_cases.items():
+            if args.filter and args.filter not in name:
+                continue
+            result = report[name] = measure(call, args.repeat, args.min_sample_ms / 1000)
+            print(
+                f"{name:55} {result['min_us']:10.3f} {result['median_us']:10.3f} "
+                f"{result['spread']:7.1%} {result['number']:8d}"
+            )
+    loop.close()
+
+    if args.json:
+        output = {"python": sys.version.split()[0], "repeat": args.repeat, "cases": report}
+        Path(args.json).write_text(json.dumps(output, indent=2) + "\n", encoding="utf-8")
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Import time and cold start of the service, with budgets.
+
+Each run starts a fresh interpreter with ``python -X importtime`` that
+imports ``app.main`` and then runs the application lifespan (state store
+connection, orchestrator) the way uvicorn does before accepting requests:
+
+- ``import``: cumulative import time of ``app.main``, from the
+  ``-X importtime`` report (which itself adds a little overhead);
+- ``ready``: wall time from spawning the process to the end of the
+  lifespan startup, i.e. what an autoscaled pod waits before it is ready.
+
+The report keeps the fastest of ``--repeat`` runs and lists the modules
+with the largest cumulative import time (``--top``), first-party (``app.``)
+ones separately.
+
+The runs also check that importing has no side effects: the log directory
+is not created and the log writer thread is not started (at the default
+``LOG_LEVEL``, so the startup records would be written), and modules that
+are only needed by some deployments (``--lazy``: msgpack, the HTTP client
+of service actions...) are not loaded. Exits with status 1 if a check fails
+or a budget is exceeded.
+
+By default the state store is in memory; ``--redis-url`` measures the
+startup against a Redis server (its connection is part of ``ready``).
+
+Usage:
+    python -m benchmarks.bench_import_time [--repeat 5] [--top 15]
+        [--import-budget-ms 1500] [--ready-budget-ms 2500]
+        [--redis-url redis://localhost:6379/0] [--json import.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Modules that must not be loaded by ``import app.main``
+LAZY_MODULES = ("msgpack", "urllib.request", "fakeredis", "pydantic_settings")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def child(lazy: Tuple[str, ...]) -> None:
+    """Run in a subprocess: import the app, run its startup, print a report."""
+    import asyncio
+    import threading
+
+    log_dir = Path(os.environ["LOG_DIR"])
+    started = time.perf_counter()
+    from app.main import app
+
+    imported = time.perf_counter()
+    report: Dict[str, Any] = {
+        "log_dir_created_at_import": log_dir.exists(),
+        "log_writer_started_at_import": any(
+            thread.name == "jsonl-log-writer" for thread in threading.enumerate()
+        ),
+        "lazy_modules_loaded": [name for name in lazy if name in sys.modules],
+    }
+
+    async def startup() -> None:
+        async with app.router.lifespan_context(app):
+            report["ready_wall"] = time.time()
+            report["startup_ms"] = (time.perf_counter() - imported) * 1000
+
+    asyncio.run(startup())
+    report["import_wall_ms"] = (imported - started) * 1000
+    sys.stdout.write(json.dumps(report) + "\n")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """``(module, self_us, cumulative_us, depth)`` per line of ``-X importtime``."""
+    modules = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def run_once(root: str, env: Dict[str, str], lazy: Tuple[str, ...]) -> Dict[str, Any]:
+    spawned = time.time()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "benchmarks.bench_import_time", "--child",
+         "--lazy", *lazy],
+        cwd=root, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"startup failed:\n{result.stderr[-2000:]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+    app_main = next(cumulative for name, _, cumulative, _ in modules if name == "app.main")
+    report["import_ms"] = app_main / 1000
+    report["ready_ms"] = (report.pop("ready_wall") - spawned) * 1000
+    report["modules"] = modules
+    return report
+
+
+def print_top(title: str, modules: List[Tuple[str, int, int, int]], top: int) -> None:
+    print(f"\n{title:55} {'self ms':>9} {'cumul. ms':>10}")
+    for name, self_us, cumulative_us, depth in sorted(modules, key=lambda m: -m[2])[:top]:
+        print(f"{'  ' * min(depth, 4) + name:55} {self_us / 1000:9.1f} {cumulative_us / 1000:10.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--import-budget-ms", type=float, default=1500)
+    parser.add_argument("--ready-budget-ms", type=float, default=2500)
+    parser.add_argument("--redis-url", help="Start against this Redis (default: in-memory state)")
+    parser.add_argument("--lazy", nargs="*", default=list(LAZY_MODULES),
+                        help="Modules that importing app.main must not load")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(tuple(args.lazy))
+        return 0
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="bench_import_time_") as tmp:
+        env = {k: v for k, v in os.environ.items() if not k.startswith(("LOG_", "REDIS_"))}
+        # Default LOG_LEVEL: the log directory must not exist before the
+        # lifespan sets up logging (one directory per run, see below)
+        env.update(
+            LOG_DIR=os.path.join(tmp, "logs"), PYTHONPATH=root, PYTHONDONTWRITEBYTECODE="1",
+        )
+        if args.redis_url:
+            env.update(USE_REDIS="true", REDIS_URL=args.redis_url)
+        else:
+            env["USE_REDIS"] = "false"
+        # Compile the bytecode once so every run starts from the same cache
+        subprocess.run([sys.executable, "-c", "import app.main"], cwd=root, env={
+            **env, "PYTHONDONTWRITEBYTECODE": ""
+        }, capture_output=True, check=True)
+        for i in range(args.repeat):
+            # The previous run's lifespan created its log directory
+            env["LOG_DIR"] = os.path.join(tmp, f"logs-{i}")
+            runs.append(run_once(root, env, tuple(args.lazy)))
+
+    best_import = min(runs, key=lambda r: r["import_ms"])
+    best_ready = min(run["ready_ms"] for run in runs)
+    modules = best_import["modules"]
+    print_top("slowest imports", modules, args.top)
+    print_top("slowest first-party imports", [m for m in modules if m[0].startswith("app.")], args.top)
+
+    print(f"\n{'import app.main (min of %d)' % args.repeat:40} {best_import['import_ms']:9.1f} ms"
+          f"  (budget {args.import_budget_ms:g})")
+    print(f"{'spawn to ready (min of %d)' % args.repeat:40} {best_ready:9.1f} ms"
+          f"  (budget {args.ready_budget_ms:g})")
+    print(f"{'lifespan startup':40} {min(run['startup_ms'] for run in runs):9.1f} ms")
+
+    failures = []
+    if best_import["import_ms"] > args.import_budget_ms:
+        failures.append(f"import {best_import['import_ms']:.1f} ms > {args.import_budget_ms:g} ms")
+    if best_ready > args.ready_budget_ms:
+        failures.append(f"ready {best_ready:.1f} ms > {args.ready_budget_ms:g} ms")
+    if any(run["log_dir_created_at_import"] for run in runs):
+        failures.append("importing app.main created the log directory")
+    if any(run["log_writer_started_at_import"] for run in runs):
+        failures.append("importing app.main started the log writer thread")
+    loaded = sorted({name for run in runs for name in run["lazy_modules_loaded"]})
+    if loaded:
+        failures.append(f"importing app.main loaded lazy modules: {', '.join(loaded)}")
+
+    if args.json:
+        output = {
+            "python": sys.version.split()[0],
+            "repeat": args.repeat,
+            "import_ms": round(best_import["import_ms"], 3),
+            "ready_ms": round(best_ready, 3),
+            "startup_ms": round(min(run["startup_ms"] for run in runs), 3),
+            "modules": {name: cumulative for name, _, cumulative, _ in modules},
+        }
+        Path(args.json).write_text(json.dumps(output, indent=2) + "\n", encoding="utf-8")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Per-request logging overhead of the webhook path, by logging configuration.
+
+Replays the same conversations through ``process_webhook`` (endpoint
+function, orchestrator, engine, in-memory state) once per configuration,
+each in its own process because the logging setup is fixed once done:
+
+- ``disabled``: LOG_LEVEL=CRITICAL, the baseline;
+- ``production``: APP_ENV=production defaults (WARNING, JSON, no callsite);
+- ``production-info``: production at INFO (every ``webhook_received``);
+- ``production-sampled``: production at INFO keeping 10% of the per-request
+  events (``LOG_SAMPLE_RATES``);
+- ``development``: DEBUG, console renderer and callsite info.
+
+Console output goes to /dev/null and the JSONL files to a temp directory,
+so the numbers are the cost of producing the records, not of a terminal.
+
+Usage:
+    python -m benchmarks.bench_log_overhead [--requests 5000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+CONFIGS = {
+    "disabled": {"APP_ENV": "production", "LOG_LEVEL": "CRITICAL"},
+    "production": {"APP_ENV": "production"},
+    "production-info": {"APP_ENV": "production", "LOG_LEVEL": "INFO"},
+    "production-sampled": {
+        "APP_ENV": "production",
+        "LOG_LEVEL": "INFO",
+        "LOG_SAMPLE_RATES": "webhook_received:0.1,turn_started:0.1",
+    },
+    "development": {"APP_ENV": "development", "LOG_LEVEL": "DEBUG", "LOG_FORMAT": "console"},
+}
+
+MESSAGES = ["Hola", "1", "12345678", "Hola", "2"]
+
+
+def child(requests: int) -> None:
+    """Run in a subprocess: time ``requests`` webhooks, print µs/request."""
+    import asyncio
+    import time
+
+    # The console handler binds sys.stdout when logging is set up
+    result_stream = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+
+    from app.api.v1.process import process_webhook
+    from app.config.logging import setup_logging
+    from app.core.orchestrator import Orchestrator
+    from app.schemas.webhook_request import WebhookRequest
+
+    # What the application lifespan does first
+    setup_logging()
+
+    payloads = [
+        WebhookRequest.model_validate({
+            "channel": "whatsapp",
+            "from": f"5199{i // len(MESSAGES):05d}",
+            "message": {"type": "text", "content": MESSAGES[i % len(MESSAGES)]},
+        })
+        for i in range(requests)
+    ]
+
+    async def run() -> float:
+        orchestrator = Orchestrator()
+        # Warm up the flow cache and the state store
+        await process_webhook(payloads[0], orchestrator)
+        started = time.perf_counter()
+        for payload in payloads:
+            await process_webhook(payload, orchestrator)
+        return (time.perf_counter() - started) / len(payloads) * 1e6
+
+    us_per_request = asyncio.run(run())
+    result_stream.write(json.dumps({"us_per_request": us_per_request}) + "\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.requests)
+        return 0
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_log_overhead_") as log_dir:
+        for name, overrides in CONFIGS.items():
+            env = {
+                k: v for k, v in os.environ.items()
+                if not k.startswith("LOG_") and k != "APP_ENV"
+            }
+            env.update(USE_REDIS="false", LOG_DIR=log_dir, PYTHONPATH=root, **overrides)
+            runs = []
+            for _ in range(args.repeat):
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_log_overhead", "--child",
+                     "--requests", str(args.requests)],
+                    cwd=root, env=env, capture_output=True, text=True, check=True,
+                ).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1])["us_per_request"])
+            results[name] = min(runs)
+
+    baseline = results["disabled"]
+    print(f"{'config':20} {'µs/request':>11} {'logging µs':>11}")
+    for name, us in results.items():
+        print(f"{name:20} {us:11.1f} {us - baseline:11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Throughput of the JSONL log file sink: per-record open/write/close vs queued writer.
+
+Logs the same records through the previous ``JsonlFileHandler`` (opens,
+appends one line and closes the file on every record, in the caller's
+thread) and through the current one (bounded queue, batched writes from a
+writer thread). For each it reports the time the callers spend logging
+(what a request pays) and the time until every line is on disk, then checks
+the files hold every record.
+
+Usage:
+    python -m benchmarks.bench_logging [--records 20000] [--threads 1 8]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["LOG_DIR"] = tempfile.mkdtemp(prefix="bench_logging_")
+
+from app.config.logging import JsonlFileHandler  # noqa: E402
+from app.config.settings import settings  # noqa: E402
+
+
+class LegacyJsonlFileHandler(logging.Handler):
+    """The handler before the queued writer (one open/close per record)."""
+
+    def __init__(self, file_path: Path):
+        super().__init__()
+        self.file_path = file_path
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            log_entry = {
+                "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+                "level": record.levelname,
+                "message": record.getMessage(),
+                "module": record.module,
+                "function": record.funcName,
+                "filename": record.pathname,
+                "line": record.lineno,
+                "environment": settings.ENVIRONMENT.value,
+            }
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(log_entry) + "\n")
+        except Exception:
+            self.handleError(record)
+
+
+def run(handler: logging.Handler, records: int, threads: int) -> tuple:
+    """Log ``records`` split over ``threads``; returns (caller s, total s)."""
+    bench_logger = logging.getLogger(f"bench.{id(handler)}")
+    bench_logger.propagate = False
+    bench_logger.setLevel(logging.INFO)
+    bench_logger.addHandler(handler)
+    per_thread = records // threads
+    caller_seconds = [0.0] * threads
+
+    def work(index: int) -> None:
+        started = time.perf_counter()
+        for i in range(per_thread):
+            bench_logger.info(
+                '{"event": "webhook_received", "channel": "whatsapp", "seq": %d}', i
+            )
+        caller_seconds[index] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    handler.close()
+    total = time.perf_counter() - started
+    bench_logger.removeHandler(handler)
+    return max(caller_seconds), total
+
+
+def count_lines(directory: Path) -> int:
+    return sum(
+        1
+        for path in directory.glob("*.jsonl")
+        for line in path.read_text(encoding="utf-8").splitlines()
+        if '"webhook_received' in line
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'handler':8} {'threads':>7} {'caller rec/s':>13} {'µs/record':>10} {'on disk s':>10} {'lines':>7} {'dropped':>8}")
+    for threads in args.threads:
+        records = args.records // threads * threads
+        for name in ("legacy", "queued"):
+            directory = Path(tempfile.mkdtemp(dir=settings.LOG_DIR))
+            if name == "legacy":
+                handler = LegacyJsonlFileHandler(directory / "legacy.jsonl")
+            else:
+                settings.LOG_DIR = directory
+                # Room for the whole run: this measures throughput, not drops
+                handler = JsonlFileHandler(queue_size=records)
+            caller, total = run(handler, records, threads)
+            lines = count_lines(directory)
+            dropped = getattr(handler, "dropped", 0)
+            failed |= lines + dropped != records
+            print(
+                f"{name:8} {threads:7d} {records / caller:13,.0f} {caller / records * 1e6:10.2f} "
+                f"{total:10.3f} {lines:7d} {dropped:8d}"
+            )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
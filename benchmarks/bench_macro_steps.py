@@ -0,0 +1,129 @@
+"""Check and time precomputed auto-advance chains ("macro-steps").
+
+Replays the same random conversations through every flow twice: once with
+macro-steps (the default) and once with ``auto_advance_chains`` disabled, so
+every message node is walked one by one. Both runs must produce identical
+transcripts (messages, handoff and resulting node/context per turn); the
+script exits 1 on the first difference. Also reports µs per turn.
+
+Usage:
+    python -m benchmarks.bench_macro_steps [--conversations 200] [--turns 12]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="bench_macro_steps_"))
+
+from app.agents.decision_tree import loader  # noqa: E402
+from app.agents.decision_tree.flow import compile_flow  # noqa: E402
+from app.agents.decision_tree.nodes.menu import MenuNode  # noqa: E402
+from app.core.engine import DecisionTreeEngine  # noqa: E402
+from app.persistence.models import ConversationState  # noqa: E402
+
+
+def synthetic_flow(chain_length: int) -> dict:
+    """Welcome chain -> menu whose options lead to more message chains."""
+    nodes = {}
+
+    def chain(prefix: str, target: str) -> str:
+        for i in range(chain_length):
+            nodes[f"{prefix}_{i}"] = {
+                "type": "message",
+                "message": [f"{prefix} paso {i}", "Hola {nombre}, seguimos"]
+                if i % 2 else f"{prefix} paso {i}",
+                "next": f"{prefix}_{i + 1}" if i + 1 < chain_length else target,
+            }
+        return f"{prefix}_0"
+
+    nodes["menu"] = {
+        "type": "menu",
+        "message": "Elija: 1, 2 o 3",
+        "options": {"1": "pedir_nombre", "2": chain("info", "menu"), "3": chain("salida", "fin")},
+    }
+    nodes["pedir_nombre"] = {
+        "type": "input",
+        "message": "¿Su nombre?",
+        "save_as": "nombre",
+        "next": chain("saludo", "menu"),
+    }
+    nodes["fin"] = {"type": "end", "message": "Adiós {nombre}"}
+    start = chain("bienvenida", "menu")
+    return {"flow_id": "synthetic", "version": "1", "start_node": start, "nodes": nodes}
+
+
+def flows() -> dict:
+    found = {}
+    for path in sorted(loader.flows_path.glob("*.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data.get("nodes"), dict):
+            found[path.stem] = data
+    for length in (3, 10):
+        found[f"synthetic_{length}"] = synthetic_flow(length)
+    return found
+
+
+def inputs_for(flow_data: dict) -> list:
+    inputs = {"hola", "x", "Ana", "12345678"}
+    flow = compile_flow("inputs", dict(flow_data, auto_advance_chains=False))
+    for node in flow.nodes.values():
+        if isinstance(node, MenuNode):
+            inputs.update(node.options)
+    return sorted(inputs)
+
+
+async def replay(engine, flow, scripts) -> tuple:
+    transcript = []
+    started = time.perf_counter()
+    turns = 0
+    for conversation_id, script in enumerate(scripts):
+        state = ConversationState(str(conversation_id), flow.flow_id)
+        for user_input in script:
+            messages, handoff = await engine._advance(
+                flow, state, {"conversation_id": state.conversation_id, "user_input": user_input}
+            )
+            transcript.append((messages, handoff, state.current_node, dict(state.context)))
+            turns += 1
+            if handoff:
+                state = ConversationState(str(conversation_id), flow.flow_id)
+    return transcript, (time.perf_counter() - started) / turns * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    engine = DecisionTreeEngine()
+    failed = False
+    print(f"{'flow':16} {'chains':>6} {'walk µs':>9} {'macro µs':>9}  transcripts")
+    for flow_id, flow_data in flows().items():
+        rng = random.Random(args.seed)
+        inputs = inputs_for(flow_data)
+        scripts = [
+            [rng.choice(inputs) for _ in range(args.turns)] for _ in range(args.conversations)
+        ]
+        walk = compile_flow(flow_id, dict(flow_data, auto_advance_chains=False))
+        macro = compile_flow(flow_id, dict(flow_data, auto_advance_chains=True))
+        expected, walk_us = asyncio.run(replay(engine, walk, scripts))
+        actual, macro_us = asyncio.run(replay(engine, macro, scripts))
+        identical = expected == actual
+        failed |= not identical
+        print(
+            f"{flow_id:16} {len(macro.chains):6d} {walk_us:9.2f} {macro_us:9.2f}  "
+            f"{'identical' if identical else 'DIFFERENT'}"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Micro-benchmark of option matching: normalized index vs linear scan.
+
+Builds menus with hundreds of options (number, value and label each) and
+matches a mix of user inputs (numbers, keycap emoji, values, labels with
+different case/accents, misses) two ways: the linear scan of the prototype
+``options`` handler in ``test/chatbot.py`` (``.lower()`` per option on every
+message) and the ``OptionIndex`` built once at flow compile time.
+
+Usage:
+    python -m benchmarks.bench_option_matching [--options 10 100 500] [--iterations 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="bench_option_matching_"))
+
+from app.agents.decision_tree.nodes.matching import OptionIndex  # noqa: E402
+
+KEYCAPS = {str(i): f"{i}️⃣" for i in range(10)}
+
+
+def make_options(count: int) -> list:
+    return [
+        {"label": f"Servicio de atención número {i} 💼", "value": f"servicio_{i}", "next": f"n{i}"}
+        for i in range(count)
+    ]
+
+
+def linear_match(options: list, user_input: str):
+    """The prototype handler: index, then value/label scan."""
+    user_input_lower = user_input.strip().lower()
+    if user_input.isdigit():
+        idx = int(user_input) - 1
+        if 0 <= idx < len(options):
+            return options[idx]["next"]
+    for opt in options:
+        if user_input_lower == opt["value"].lower() or user_input_lower in opt["label"].lower():
+            return opt["next"]
+    return None
+
+
+def build_index(options: list) -> OptionIndex:
+    return OptionIndex(
+        ([str(position), opt["value"], opt["label"]], opt["next"])
+        for position, opt in enumerate(options, start=1)
+    )
+
+
+def make_inputs(count: int, rng: random.Random) -> list:
+    inputs = []
+    for _ in range(200):
+        i = rng.randrange(count)
+        inputs.append(rng.choice([
+            str(i + 1),
+            KEYCAPS[str((i + 1) % 10)],
+            f"SERVICIO_{i}",
+            f"servicio de atencion numero {i}",
+            "ninguna de las anteriores",
+        ]))
+    return inputs
+
+
+def timeit(fn, inputs: list, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for text in inputs:
+            fn(text)
+    return (time.perf_counter() - started) / (iterations * len(inputs)) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--options", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    print(f"{'options':>8} {'scan µs':>9} {'index µs':>9} {'build ms':>9} {'speedup':>8}")
+    for count in args.options:
+        options = make_options(count)
+        started = time.perf_counter()
+        index = build_index(options)
+        build_ms = (time.perf_counter() - started) * 1e3
+        inputs = make_inputs(count, rng)
+        scan = timeit(lambda text: linear_match(options, text), inputs, args.iterations)
+        indexed = timeit(index.lookup, inputs, args.iterations)
+        print(f"{count:8d} {scan:9.2f} {indexed:9.2f} {build_ms:9.2f} {scan / indexed:7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
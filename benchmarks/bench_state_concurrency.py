@@ -0,0 +1,194 @@
+"""Stress test for per-conversation serialization of state updates.
+
+Every conversation runs a synthetic flow that is a chain of menu nodes
+(``step_0 -> step_1 -> ...``) where each "go" message advances exactly one
+step. Many messages are fired concurrently at each conversation; once they
+settle, every conversation must sit on the step matching the number of
+turns that were accepted, otherwise a transition was lost. Turns rejected
+with ``StateConflictError`` (retries exhausted) were never applied, so they
+do not count.
+
+Also reports the per-turn cost of the lock + compare-and-set path on an
+uncontended conversation.
+
+Usage:
+    python -m benchmarks.bench_state_concurrency [--backend memory|fakeredis|redis]
+        [--redis-url URL] [--conversations 50] [--messages 20] [--no-locks]
+        [--latency-ms 1]
+
+``--no-locks`` disables the in-process lock stripes, so only the
+cross-worker compare-and-set protects the state (what happens when the
+messages land on different workers). ``--latency-ms`` adds a delay between
+reading and writing the state, standing in for the network round trip that
+opens the race window (in-process backends would otherwise never
+interleave). ``fakeredis`` needs ``fakeredis`` and ``lupa`` installed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="bench_state_concurrency_"))
+
+from app.agents.decision_tree import loader  # noqa: E402
+from app.core import engine as engine_module  # noqa: E402
+from app.core import state as state_module  # noqa: E402
+from app.core.engine import DecisionTreeEngine  # noqa: E402
+from app.core.redis_state import (  # noqa: E402
+    GET_IF_CHANGED_SCRIPT,
+    SAVE_STATE_SCRIPT,
+    AsyncRedisStateStore,
+)
+from app.core.state import StateConflictError  # noqa: E402
+
+FLOW_ID = "bench_chain"
+
+
+def write_chain_flow(directory: Path, steps: int) -> None:
+    nodes = {
+        f"step_{i}": {
+            "type": "menu",
+            "message": f"Paso {i}",
+            "options": {"go": f"step_{i + 1}"} if i < steps else {},
+        }
+        for i in range(steps + 1)
+    }
+    flow = {"flow_id": FLOW_ID, "version": "1.0.0", "start_node": "step_0", "nodes": nodes}
+    (directory / f"{FLOW_ID}.json").write_text(json.dumps(flow), encoding="utf-8")
+
+
+async def use_backend(backend: str, redis_url: str) -> None:
+    if backend == "memory":
+        state_module._redis_store = None
+    else:
+        store = AsyncRedisStateStore(redis_url, max_connections=200)
+        if backend == "fakeredis":
+            import fakeredis
+
+            store.redis_client = fakeredis.FakeAsyncRedis(max_connections=10_000)
+            store._save_script = store.redis_client.register_script(SAVE_STATE_SCRIPT)
+            store._get_if_changed_script = store.redis_client.register_script(
+                GET_IF_CHANGED_SCRIPT
+            )
+        await store.connect()
+        state_module._redis_store = store
+    state_module._initialized = True
+
+
+async def stress(
+    engine: DecisionTreeEngine, conversations: int, messages: int, latency: float
+) -> dict:
+    prefix = uuid.uuid4().hex[:8]
+    conflicts = 0
+    original_get = engine_module.get_state
+    original_save = engine_module.save_state
+
+    async def slow_get(conversation_id, flow_id):
+        state = await original_get(conversation_id, flow_id)
+        await asyncio.sleep(latency)
+        return state
+
+    async def counting_save(state):
+        nonlocal conflicts
+        saved = await original_save(state)
+        conflicts += not saved
+        return saved
+
+    async def send(conversation_id: str) -> bool:
+        try:
+            await engine.run(
+                {"conversation_id": conversation_id, "flow_id": FLOW_ID, "user_input": "go"}
+            )
+            return True
+        except StateConflictError:
+            return False
+
+    ids = [f"bench:{prefix}:{i}" for i in range(conversations)]
+    engine_module.get_state = slow_get
+    engine_module.save_state = counting_save
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(send(cid) for cid in ids for _ in range(messages)))
+        elapsed = time.perf_counter() - started
+    finally:
+        engine_module.get_state = original_get
+        engine_module.save_state = original_save
+
+    accepted = dict.fromkeys(ids, 0)
+    for cid, ok in zip((cid for cid in ids for _ in range(messages)), results):
+        accepted[cid] += ok
+
+    lost = 0
+    for cid in ids:
+        state = await state_module.get_state(cid, FLOW_ID)
+        reached = int(state.current_node.split("_")[1]) if state.current_node else 0
+        lost += accepted[cid] - reached
+
+    return {
+        "turns": conversations * messages,
+        "accepted": sum(accepted.values()),
+        "rejected": conversations * messages - sum(accepted.values()),
+        "cas_conflicts": conflicts,
+        "lost_transitions": lost,
+        "elapsed_s": round(elapsed, 4),
+    }
+
+
+async def uncontended(engine: DecisionTreeEngine, turns: int, stripes: list) -> dict:
+    async def timed() -> float:
+        cid = f"bench:{uuid.uuid4().hex[:8]}"
+        started = time.perf_counter()
+        for _ in range(turns):
+            await engine.run({"conversation_id": cid, "flow_id": FLOW_ID, "user_input": "go"})
+        return (time.perf_counter() - started) / turns * 1e6
+
+    state_module._lock_stripes = stripes
+    with_lock = await timed()
+    state_module._lock_stripes = []
+    without_lock = await timed()
+    return {
+        "us_per_turn_with_lock": round(with_lock, 1),
+        "us_per_turn_without_lock": round(without_lock, 1),
+    }
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--backend", choices=["memory", "fakeredis", "redis"], default="fakeredis")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--no-locks", action="store_true")
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loader.flows_path = Path(tmp)
+        steps = max(args.messages, 200)
+        write_chain_flow(Path(tmp), steps)
+        await use_backend(args.backend, args.redis_url)
+
+        stripes = state_module._lock_stripes
+        if args.no_locks:
+            state_module._lock_stripes = []
+
+        engine = DecisionTreeEngine()
+        report = await stress(
+            engine, args.conversations, args.messages, args.latency_ms / 1000
+        )
+        report.update(await uncontended(engine, min(steps, 200), stripes))
+
+    report.update(backend=args.backend, locks=not args.no_locks)
+    print(json.dumps(report, indent=2))
+    return 1 if report["lost_transitions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,415 @@
+"""Load test of the webhook path: the real ASGI app, in process, no network.
+
+Builds scripted multi-turn conversations from the sample payloads
+(``webhook_test_data.json``: the WhatsApp and Telegram conversations;
+``test_data.json``: the engine-level samples, a null ``user_input`` sent as
+empty text) and replays them through the full ASGI stack (middleware,
+routing, validation, orchestrator, engine, state store) with a fixed number
+of conversations in flight. Every simulated user gets its own ``from``, so
+each runs a fresh conversation. Scenarios:
+
+- ``whatsapp``, ``telegram``, ``engine_samples``: one script each;
+- ``mixed``: users cycle through every script;
+- ``batch``: the ``mixed`` turns posted to ``/agent/process/batch`` in
+  batches of ``--batch-size``, one turn per conversation per batch.
+
+Reports throughput and p50/p95/p99 latency per scenario, and the
+per-request numbers as JSON with ``--json``. State backends:
+
+- ``memory``: the in-process store (the Redis fallback);
+- ``fakeredis``: an in-process Redis stand-in (needs ``fakeredis`` and
+  ``lupa`` for the Lua scripts);
+- ``redis-server``: spawns a throwaway local ``redis-server`` (on PATH);
+- ``redis``: an existing server at ``--redis-url`` (use a scratch database).
+
+Exits with status 1 if a scenario has errors or breaks a threshold.
+``--thresholds`` is a JSON file of limits per scenario (``"*"`` applies to
+all), e.g. ``{"*": {"p95_ms": 50, "min_rps": 300}, "batch": {"p99_ms": 400}}``;
+keys are ``p50_ms``, ``p95_ms``, ``p99_ms``, ``min_rps`` and
+``max_error_rate``. ``--baseline`` compares with a previous ``--json``
+report of the same backend and fails if a percentile grew (or throughput
+fell) by more than ``--max-regression``.
+
+Usage:
+    python -m benchmarks.bench_webhook_load [--backend memory|fakeredis|redis-server|redis]
+        [--users 200] [--concurrency 50] [--batch-size 50] [--scenarios whatsapp mixed ...]
+        [--json report.json] [--thresholds benchmarks/webhook_load_thresholds.json]
+        [--baseline previous.json] [--max-regression 0.25]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# The lifespan starts on the in-memory store; use_backend() swaps it
+os.environ.setdefault("USE_REDIS", "false")
+# Measured latency is reported here; no slow_request records under load
+os.environ.setdefault("SLOW_REQUEST_THRESHOLD_MS", "-1")
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="bench_webhook_load_"))
+
+from app.config.settings import settings  # noqa: E402
+from app.core import state as state_module  # noqa: E402
+from app.core.redis_state import (  # noqa: E402
+    GET_IF_CHANGED_SCRIPT,
+    SAVE_STATE_SCRIPT,
+    AsyncRedisStateStore,
+)
+from app.main import app  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+PROCESS_PATH = f"{settings.API_V1_STR}/agent/process"
+BATCH_PATH = f"{PROCESS_PATH}/batch"
+SCENARIOS = ["whatsapp", "telegram", "engine_samples", "mixed", "batch"]
+THRESHOLD_KEYS = {"p50_ms", "p95_ms", "p99_ms", "min_rps", "max_error_rate"}
+
+# A script is the (channel, message) of each turn of one conversation
+Script = List[Tuple[str, Dict[str, Any]]]
+
+
+def load_scripts() -> Dict[str, Script]:
+    """Conversations from the sample payloads, turns in file order."""
+    scripts: Dict[str, Script] = {}
+    webhooks = json.loads((ROOT / "webhook_test_data.json").read_text(encoding="utf-8"))
+    for example in webhooks["ejemplos_webhook"]:
+        request = example["request"]
+        scripts.setdefault(request["channel"], []).append((request["channel"], request["message"]))
+
+    samples = json.loads((ROOT / "test_data.json").read_text(encoding="utf-8"))
+    conversations: Dict[str, Script] = {}
+    for example in samples["ejemplos"]:
+        request = example["request"]
+        # Empty text reaches the nodes as no input, like a null user_input
+        message = {"type": "text", "content": request["user_input"] or ""}
+        conversations.setdefault(request["conversation_id"], []).append(("api", message))
+    scripts["engine_samples"] = [turn for script in conversations.values() for turn in script]
+    return scripts
+
+
+async def asgi_post(path: str, payload: Any) -> Tuple[int, bytes]:
+    """POST ``payload`` as JSON straight into the ASGI app."""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    request_sent = False
+    status = 0
+    chunks: List[bytes] = []
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if request_sent:
+            return {"type": "http.disconnect"}
+        request_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def use_backend(backend: str, redis_url: str) -> AsyncIterator[None]:
+    """Point the state store at ``backend`` for the duration of the block."""
+    server = None
+    if backend == "redis-server":
+        executable = shutil.which("redis-server")
+        if executable is None:
+            raise SystemExit("redis-server is not on PATH")
+        port = free_port()
+        server = subprocess.Popen(
+            [executable, "--port", str(port), "--save", "", "--appendonly", "no"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        redis_url = f"redis://127.0.0.1:{port}/0"
+
+    try:
+        if backend == "memory":
+            state_module._redis_store = None
+        else:
+            store = AsyncRedisStateStore(redis_url, max_connections=settings.REDIS_MAX_CONNECTIONS)
+            if backend == "fakeredis":
+                import fakeredis
+
+                store.redis_client = fakeredis.FakeAsyncRedis(max_connections=10_000)
+                store._save_script = store.redis_client.register_script(SAVE_STATE_SCRIPT)
+                store._get_if_changed_script = store.redis_client.register_script(
+                    GET_IF_CHANGED_SCRIPT
+                )
+            for attempt in itertools.count():
+                try:
+                    await store.connect()
+                    break
+                except Exception:
+                    # A freshly spawned redis-server takes a moment to listen
+                    if server is None or attempt >= 50:
+                        raise
+                    await asyncio.sleep(0.1)
+            state_module._redis_store = store
+        state_module._initialized = True
+        yield
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float, turns: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    requests = len(latencies)
+    return {
+        "requests": requests,
+        "turns": turns,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "elapsed_s": round(elapsed, 4),
+        "rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "turns_per_s": round(turns / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def webhook(channel: str, user: str, message: Dict[str, Any]) -> Dict[str, Any]:
+    return {"channel": channel, "from": user, "message": message}
+
+
+async def run_conversations(
+    scripts: List[Script], users: int, concurrency: int, prefix: str
+) -> Dict[str, Any]:
+    """Each user plays one script turn by turn; ``concurrency`` users at a time."""
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def user(index: int) -> None:
+        nonlocal errors
+        script = scripts[index % len(scripts)]
+        async with semaphore:
+            for channel, message in script:
+                started = time.perf_counter()
+                status, _ = await asgi_post(PROCESS_PATH, webhook(channel, f"{prefix}{index}", message))
+                latencies.append(time.perf_counter() - started)
+                errors += status != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(index) for index in range(users)))
+    return summarize(latencies, errors, time.perf_counter() - started, len(latencies))
+
+
+async def run_batches(
+    scripts: List[Script], users: int, concurrency: int, prefix: str, batch_size: int
+) -> Dict[str, Any]:
+    """Turn ``n`` of every user's script in batches of ``batch_size``, in rounds."""
+    latencies: List[float] = []
+    errors = 0
+    turns = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    rounds: List[List[Dict[str, Any]]] = []
+    for index in range(users):
+        for turn, (channel, message) in enumerate(scripts[index % len(scripts)]):
+            if turn == len(rounds):
+                rounds.append([])
+            rounds[turn].append(webhook(channel, f"{prefix}{index}", message))
+
+    async def post(chunk: List[Dict[str, Any]]) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            status, body = await asgi_post(BATCH_PATH, chunk)
+            latencies.append(time.perf_counter() - started)
+        if status != 200:
+            errors += 1
+        else:
+            errors += any(item["status"] != 200 for item in json.loads(body))
+
+    size = max(1, min(batch_size, settings.WEBHOOK_BATCH_MAX_SIZE))
+    started = time.perf_counter()
+    for messages in rounds:
+        turns += len(messages)
+        # Rounds in order (a conversation's turn n+1 after turn n); the
+        # chunks of a round concurrently
+        await asyncio.gather(
+            *(post(messages[i:i + size]) for i in range(0, len(messages), size))
+        )
+    return summarize(latencies, errors, time.perf_counter() - started, turns)
+
+
+def check(
+    report: Dict[str, Dict[str, Any]],
+    thresholds: Dict[str, Dict[str, float]],
+    baseline: Optional[Dict[str, Dict[str, Any]]],
+    max_regression: float,
+) -> List[str]:
+    """Threshold and baseline violations, as readable lines."""
+    failures = []
+    for name, result in report.items():
+        if result["errors"]:
+            failures.append(f"{name}: {result['errors']} failed requests")
+        limits = {**thresholds.get("*", {}), **thresholds.get(name, {})}
+        for key, limit in limits.items():
+            if key == "min_rps":
+                if result["rps"] < limit:
+                    failures.append(f"{name}: {result['rps']} req/s < {limit}")
+            elif key == "max_error_rate":
+                if result["error_rate"] > limit:
+                    failures.append(f"{name}: error rate {result['error_rate']} > {limit}")
+            elif result[key] > limit:
+                failures.append(f"{name}: {key} {result[key]} > {limit}")
+
+        previous = (baseline or {}).get(name)
+        if previous is None:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if previous[key] and result[key] > previous[key] * (1 + max_regression):
+                failures.append(f"{name}: {key} {result[key]} vs baseline {previous[key]}")
+        if previous["rps"] and result["rps"] < previous["rps"] * (1 - max_regression):
+            failures.append(f"{name}: {result['rps']} req/s vs baseline {previous['rps']}")
+    return failures
+
+
+def load_thresholds(path: Optional[str]) -> Dict[str, Dict[str, float]]:
+    if not path:
+        return {}
+    thresholds = json.loads(Path(path).read_text(encoding="utf-8"))
+    for name, limits in thresholds.items():
+        unknown = set(limits) - THRESHOLD_KEYS
+        if name != "*" and name not in SCENARIOS or unknown:
+            raise SystemExit(f"Invalid thresholds for {name!r}: {sorted(unknown) or 'unknown scenario'}")
+    return thresholds
+
+
+async def run(args) -> Dict[str, Dict[str, Any]]:
+    scripts = load_scripts()
+    every_script = [scripts[name] for name in ("whatsapp", "telegram", "engine_samples")]
+    report: Dict[str, Dict[str, Any]] = {}
+    async with app.router.lifespan_context(app), use_backend(args.backend, args.redis_url):
+        # Warm up: flow cache, state store, routing
+        await run_conversations(every_script, 10, 10, f"warmup-{uuid.uuid4().hex[:8]}-")
+        for name in args.scenarios:
+            prefix = f"{name}-{uuid.uuid4().hex[:8]}-"
+            if name == "mixed":
+                result = await run_conversations(every_script, args.users, args.concurrency, prefix)
+            elif name == "batch":
+                result = await run_batches(
+                    every_script, args.users, args.concurrency, prefix, args.batch_size
+                )
+            else:
+                result = await run_conversations([scripts[name]], args.users, args.concurrency, prefix)
+            report[name] = result
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--backend", choices=["memory", "fakeredis", "redis-server", "redis"], default="memory"
+    )
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--json", help="Write the report to this file ('-' for stdout)")
+    parser.add_argument("--thresholds", help="JSON file of limits per scenario")
+    parser.add_argument("--baseline", help="Previous --json report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args()
+
+    thresholds = load_thresholds(args.thresholds)
+    baseline = None
+    if args.baseline:
+        previous = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        if previous.get("backend") != args.backend:
+            raise SystemExit(f"Baseline is for backend {previous.get('backend')!r}")
+        baseline = previous["scenarios"]
+
+    report = asyncio.run(run(args))
+    failures = check(report, thresholds, baseline, args.max_regression)
+
+    # Keep stdout for the JSON report when it goes there
+    table = sys.stderr if args.json == "-" else sys.stdout
+    print(
+        f"{'scenario':15} {'requests':>8} {'turns/s':>9} {'req/s':>9} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>7}",
+        file=table,
+    )
+    for name, result in report.items():
+        print(
+            f"{name:15} {result['requests']:8d} {result['turns_per_s']:9.1f} {result['rps']:9.1f} "
+            f"{result['p50_ms']:8.2f} {result['p95_ms']:8.2f} {result['p99_ms']:8.2f} "
+            f"{result['errors']:7d}",
+            file=table,
+        )
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+
+    if args.json:
+        output = json.dumps(
+            {
+                "backend": args.backend,
+                "users": args.users,
+                "concurrency": args.concurrency,
+                "scenarios": report,
+                "failures": failures,
+            },
+            indent=2,
+        )
+        if args.json == "-":
+            print(output)
+        else:
+            Path(args.json).write_text(output + "\n", encoding="utf-8")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())